@@ -1,5 +1,5 @@
 from .config.db_config import DATABASE_CONFIG
 from .importers.base_importer import BaseImporter
-from .importers.av_patient_importer import AVpatientImporter
+from .importers.av_patient_importer import AvPatientImporter
 
-__all__ = ['DATABASE_CONFIG', 'BaseImporter', 'AVpatientImporter']
+__all__ = ['DATABASE_CONFIG', 'BaseImporter', 'AvPatientImporter']
@@ -0,0 +1,489 @@
+"""
+End-to-end performance benchmark of the pipeline on synthetic data.
+
+Usage:
+    python benchmark.py run --scales 0.1 1 --label my-change [--baseline main]
+    python benchmark.py run --dsn postgresql://postgres@localhost/postgres --scales 1
+    python benchmark.py compare --run my-change --baseline main
+
+For each scale a synthetic extract is written (synthetic_data.py) and loaded
+into a fresh database, then these stages run in order:
+
+    generate                   synthetic_data.py
+    import:<table>             import_data_bulk for every table in importers/registry.py
+    impute:vitalstatusdate     data_imputation/av_patient/av_patient_vitalstatusdate.py
+    impute:regimen_dates       data_imputation/rtds_regimen/sact_regimen_major_flled.py
+    initial_data_preparation   4.Final_ver/scripts/initial_preprocess.py
+    final_preprocessing        4.Final_ver/scripts/final_preprocess.py
+    extract:<analysis>         4.Final_ver/scripts/visualization_code.py, every analysis type
+
+Every stage runs in a fresh process, so that its peak resident memory is its
+own, and records its wall time, the rows it processed, rows/s and peak RSS.
+The run is appended to a JSON history file (benchmark_history.json) and can be
+compared with any earlier run by label.
+
+Without --dsn a throwaway PostgreSQL server is started in a temporary directory
+with initdb/pg_ctl (from --pg-bin or PATH) or, if they are not available or the
+benchmark runs as root, with the optional pgserver package. It is removed when
+the benchmark ends.
+"""
+import argparse
+import contextlib
+import csv
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from urllib.parse import quote
+
+import psycopg2
+from psycopg2.extensions import parse_dsn
+
+from importers.batching import peak_rss_mb
+from importers.registry import IMPORTERS, load_importer
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+IMPUTATION_DIR = os.path.join(PROJECT_DIR, '1.Data_Preparation_and_Management', 'dataCleaning_Validation',
+                              'data_imputation')
+FINAL_SCRIPTS_DIR = os.path.join(PROJECT_DIR, '4.Final_ver', 'scripts')
+
+# The tables av_patient depends on come first, as in a manifest import.
+IMPORT_ORDER = ['av_patient', 'av_tumour', 'av_gene'] + [
+    table for table in IMPORTERS if table not in ('av_patient', 'av_tumour', 'av_gene')]
+ANALYSIS_TYPES = ('success_rate', 'cancer_type', 'modifications', 'survival', 'evolution')
+DEFAULT_HISTORY = 'benchmark_history.json'
+# A stage is reported as slower only when it is both this much slower in relative terms...
+DEFAULT_THRESHOLD = 0.10
+# ...and by more than this many seconds, so that sub-second stages do not flag noise.
+NOISE_SECONDS = 0.1
+
+
+class ThrowawayPostgres:
+    """
+    A PostgreSQL server in a temporary directory, listening only on a Unix
+    socket there, deleted on exit. `params` are the connection parameters
+    of its `postgres` database.
+    """
+
+    def __init__(self, pg_bin=None):
+        self.pg_bin = pg_bin
+        self.params = None
+        self._dir = None
+        self._pg_ctl = None
+        self._server = None
+
+    def _binary(self, name):
+        if self.pg_bin:
+            path = os.path.join(self.pg_bin, name)
+            return path if os.path.isfile(path) else None
+        return shutil.which(name)
+
+    def __enter__(self):
+        self._dir = tempfile.mkdtemp(prefix='cancer_bench_pg_')
+        initdb, pg_ctl = self._binary('initdb'), self._binary('pg_ctl')
+        # initdb refuses to run as root; pgserver works around that with a system user.
+        as_root = hasattr(os, 'geteuid') and os.geteuid() == 0
+        try:
+            if initdb and pg_ctl and not as_root:
+                self._start_cluster(initdb, pg_ctl)
+            else:
+                self._start_pgserver()
+        except Exception:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def _start_cluster(self, initdb, pg_ctl):
+        data_dir = os.path.join(self._dir, 'data')
+        subprocess.run([initdb, '-D', data_dir, '-U', 'postgres', '-A', 'trust', '-E', 'UTF8', '--no-sync'],
+                       check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([pg_ctl, '-D', data_dir, '-l', os.path.join(self._dir, 'postgres.log'), '-w',
+                        '-o', f"-k {self._dir} -c listen_addresses='' -p 5432", 'start'],
+                       check=True, stdout=subprocess.DEVNULL)
+        self._pg_ctl = (pg_ctl, data_dir)
+        self.params = {'dbname': 'postgres', 'user': 'postgres', 'host': self._dir, 'port': '5432'}
+
+    def _start_pgserver(self):
+        try:
+            import pgserver
+        except ImportError:
+            raise RuntimeError("No PostgreSQL to benchmark against: put initdb and pg_ctl on PATH (or pass "
+                               "--pg-bin) and run as a regular user, install pgserver, or pass --dsn") from None
+        self._server = pgserver.get_server(self._dir, cleanup_mode='delete')
+        self.params = parse_dsn(self._server.get_uri('postgres'))
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._pg_ctl:
+            pg_ctl, data_dir = self._pg_ctl
+            subprocess.run([pg_ctl, '-D', data_dir, '-m', 'fast', '-w', 'stop'], stdout=subprocess.DEVNULL)
+            self._pg_ctl = None
+        if self._server is not None:
+            self._server.cleanup()
+            self._server = None
+        if self._dir:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = None
+        return False
+
+
+def connection_uri(params):
+    """A postgresql:// URI for connection parameters; both libpq and SQLAlchemy accept it."""
+    credentials = quote(params.get('user') or '', safe='')
+    if params.get('password'):
+        credentials += ':' + quote(params['password'], safe='')
+    query = '&'.join(f"{name}={quote(str(params[name]), safe='/')}" for name in ('host', 'port')
+                     if params.get(name))
+    return f"postgresql://{credentials}@/{params['dbname']}" + (f"?{query}" if query else '')
+
+
+def fresh_database(params, name):
+    """Drop and create database `name` on the server of `params`; returns its connection parameters."""
+    connection = psycopg2.connect(**params)
+    connection.autocommit = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS {name}")
+            cursor.execute(f"CREATE DATABASE {name}")
+    finally:
+        connection.close()
+    return {**params, 'dbname': name}
+
+
+def drop_database(params, name):
+    connection = psycopg2.connect(**params)
+    connection.autocommit = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS {name}")
+    finally:
+        connection.close()
+
+
+def server_version(params):
+    connection = psycopg2.connect(**params)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW server_version")
+            return cursor.fetchone()[0]
+    finally:
+        connection.close()
+
+
+def count_rows(params, table):
+    connection = psycopg2.connect(**params)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {table}")
+            return cursor.fetchone()[0]
+    finally:
+        connection.close()
+
+
+def count_records(csv_path):
+    with open(csv_path, 'r', newline='', encoding='utf-8') as csv_file:
+        return max(0, sum(1 for _ in csv.reader(csv_file)) - 1)
+
+
+def load_script(path):
+    """Import a pipeline script by path (its directory is not a package)."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# --- stages ----------------------------------------------------------------------------------
+# Each stage does its set-up, times only the work itself and returns (rows, seconds).
+
+def _timed(work, *args, **kwargs):
+    started = time.perf_counter()
+    result = work(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def stage_generate(context):
+    from synthetic_data import SyntheticExtract
+    rows, seconds = _timed(SyntheticExtract(context['data_dir'], scale=context['scale'],
+                                            seed=context['seed']).write)
+    return sum(rows.values()), seconds
+
+
+def stage_import(context, table):
+    importer = load_importer(table)(context['params'])
+    file_path = os.path.join(context['data_dir'], f"sim_{table}.csv")
+    summary, seconds = _timed(importer.import_data_bulk, file_path,
+                              report_path=os.path.join(context['work_dir'], f"{table}.import_report.json"))
+    if summary['rows_failed']:
+        raise RuntimeError(f"{summary['rows_failed']} rows of {table} were rejected")
+    return summary['rows_inserted'], seconds
+
+
+def stage_impute_vitalstatusdate(context):
+    script = load_script(os.path.join(IMPUTATION_DIR, 'av_patient', 'av_patient_vitalstatusdate.py'))
+    _, seconds = _timed(script.main)
+    return count_rows(context['params'], 'av_patient'), seconds
+
+
+def stage_impute_regimen_dates(context):
+    script = load_script(os.path.join(IMPUTATION_DIR, 'rtds_regimen', 'sact_regimen_major_flled.py'))
+    results, seconds = _timed(script.impute_treatment_dates)
+    if results is None:
+        raise RuntimeError("impute_treatment_dates failed")
+    return count_rows(context['params'], 'sact_regimen'), seconds
+
+
+def stage_initial_preparation(context):
+    sys.path.insert(0, FINAL_SCRIPTS_DIR)
+    from initial_preprocess import initial_data_preparation
+    merged, seconds = _timed(initial_data_preparation, context['uri'], context['initial_file'])
+    return len(merged), seconds
+
+
+def stage_final_preprocessing(context):
+    sys.path.insert(0, FINAL_SCRIPTS_DIR)
+    from final_preprocess import execute_final_preprocessing
+    # As in 4.Final_ver/main.py, the raw data file is the initial output itself.
+    _, seconds = _timed(execute_final_preprocessing, context['initial_file'], context['initial_file'],
+                        context['final_file'])
+    return count_records(context['initial_file']), seconds
+
+
+def stage_extract(context, analysis_type):
+    import pandas as pd
+    sys.path.insert(0, FINAL_SCRIPTS_DIR)
+    import visualization_code
+    visualization_code.VIS_DATA_DIR = context['work_dir']
+    data = pd.read_csv(context['final_file'], low_memory=False)
+    output_path, seconds = _timed(visualization_code.extract_visualization_data, data, analysis_type)
+    if output_path is None:
+        raise RuntimeError(f"extraction of {analysis_type} failed")
+    return len(data), seconds
+
+
+def pipeline_stages():
+    """The benchmarked stages in order: (name, function, extra arguments)."""
+    stages = [('generate', stage_generate, ())]
+    stages += [(f"import:{table}", stage_import, (table,)) for table in IMPORT_ORDER]
+    stages += [
+        ('impute:vitalstatusdate', stage_impute_vitalstatusdate, ()),
+        ('impute:regimen_dates', stage_impute_regimen_dates, ()),
+        ('initial_data_preparation', stage_initial_preparation, ()),
+        ('final_preprocessing', stage_final_preprocessing, ()),
+    ]
+    stages += [(f"extract:{analysis_type}", stage_extract, (analysis_type,)) for analysis_type in ANALYSIS_TYPES]
+    return stages
+
+
+def run_stage(name, function, arguments, context):
+    """
+    Process entry point: run one stage with its output sent to a log file.
+    Returns (rows, seconds, peak RSS in MB).
+    """
+    os.environ['DB_CONNECTION_STRING'] = context['uri']
+    log_path = os.path.join(context['work_dir'], 'logs', f"{name.replace(':', '_')}.log")
+    with open(log_path, 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log), \
+            contextlib.redirect_stderr(log):
+        rows, seconds = function(context, *arguments)
+    peaks = [peak for peak in (peak_rss_mb(), peak_rss_mb(children=True)) if peak is not None]
+    return rows, seconds, max(peaks) if peaks else None
+
+
+def benchmark_scale(server_params, scale, seed, work_root):
+    """Run every stage at one scale against a new database; returns the stage results."""
+    work_dir = os.path.join(work_root, f"scale_{scale:g}")
+    os.makedirs(os.path.join(work_dir, 'logs'), exist_ok=True)
+    database = f"cancer_bench_{scale:g}".replace('.', '_')
+    params = fresh_database(server_params, database)
+    context = {
+        'scale': scale,
+        'seed': seed,
+        'params': params,
+        'uri': connection_uri(params),
+        'work_dir': work_dir,
+        'data_dir': os.path.join(work_dir, 'data'),
+        'initial_file': os.path.join(work_dir, 'initial_raw_data.csv'),
+        'final_file': os.path.join(work_dir, 'final_merged_data.csv'),
+    }
+    results = []
+    print(f"\nScale {scale:g} (database {database}, logs in {os.path.join(work_dir, 'logs')}):")
+    try:
+        for name, function, arguments in pipeline_stages():
+            result = {'scale': scale, 'stage': name}
+            # A fresh interpreter per stage: peak RSS is the stage's own, not the largest so far.
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+                try:
+                    rows, seconds, peak = executor.submit(run_stage, name, function, arguments, context).result()
+                    result.update(status='ok', seconds=round(seconds, 4), rows=rows,
+                                  rows_per_second=round(rows / seconds, 1) if seconds > 0 else None,
+                                  peak_rss_mb=round(peak, 1) if peak is not None else None)
+                    print(f"  {name}: {seconds:.2f}s, {rows} rows ({result['rows_per_second'] or 0:,.0f} rows/s), "
+                          f"peak RSS {result['peak_rss_mb']} MB")
+                except Exception as e:
+                    result.update(status='failed', error=str(e))
+                    print(f"  {name}: FAILED ({e})")
+            results.append(result)
+    finally:
+        drop_database(server_params, database)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# --- history and comparison --------------------------------------------------------------------
+
+def load_history(path):
+    if not os.path.exists(path):
+        return {'runs': []}
+    with open(path, 'r', encoding='utf-8') as history_file:
+        return json.load(history_file)
+
+
+def save_history(path, history):
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, 'w', encoding='utf-8') as history_file:
+        json.dump(history, history_file, indent=2)
+    os.replace(temporary_path, path)
+
+
+def find_run(history, label, before=None):
+    """The latest run labelled `label` (or simply the latest run for 'latest'), optionally before `before`."""
+    runs = history['runs'] if before is None else history['runs'][:history['runs'].index(before)]
+    for run in reversed(runs):
+        if label == 'latest' or run.get('label') == label:
+            return run
+    return None
+
+
+def compare_runs(run, baseline, threshold=DEFAULT_THRESHOLD):
+    """Print run against baseline stage by stage; returns the number of stages that got slower."""
+    baseline_results = {(result['scale'], result['stage']): result for result in baseline['stages']}
+    print(f"\nComparison of '{run.get('label')}' ({run['started_at']}) "
+          f"with baseline '{baseline.get('label')}' ({baseline['started_at']}):")
+    slower = 0
+    for result in run['stages']:
+        before = baseline_results.get((result['scale'], result['stage']))
+        label = f"  [{result['scale']:g}] {result['stage']}"
+        if before is None or before['status'] != 'ok' or result['status'] != 'ok':
+            print(f"{label}: no comparison (baseline {before['status'] if before else 'missing'}, "
+                  f"now {result['status']})")
+            continue
+        change = (result['seconds'] - before['seconds']) / before['seconds'] if before['seconds'] else 0.0
+        verdict = ''
+        if change > threshold and result['seconds'] - before['seconds'] > NOISE_SECONDS:
+            verdict = '  SLOWER'
+            slower += 1
+        elif change < -threshold and before['seconds'] - result['seconds'] > NOISE_SECONDS:
+            verdict = '  faster'
+        memory = ''
+        if result.get('peak_rss_mb') and before.get('peak_rss_mb'):
+            memory = f", peak RSS {before['peak_rss_mb']} -> {result['peak_rss_mb']} MB"
+        print(f"{label}: {before['seconds']:.2f}s -> {result['seconds']:.2f}s ({change:+.1%}){memory}{verdict}")
+    print(f"  {slower} stage(s) more than {threshold:.0%} slower")
+    return slower
+
+
+# --- command line -------------------------------------------------------------------------------
+
+def run_benchmark(args):
+    history = load_history(args.history)
+    run = {
+        'label': args.label,
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': args.seed,
+        'scales': args.scales,
+        'stages': [],
+    }
+    work_root = args.workdir or tempfile.mkdtemp(prefix='cancer_bench_')
+    server = contextlib.nullcontext() if args.dsn else ThrowawayPostgres(args.pg_bin)
+    try:
+        with server:
+            server_params = parse_dsn(args.dsn) if args.dsn else server.params
+            run['postgres'] = server_version(server_params)
+            for scale in args.scales:
+                run['stages'] += benchmark_scale(server_params, scale, args.seed, work_root)
+    finally:
+        if not args.keep and not args.workdir:
+            shutil.rmtree(work_root, ignore_errors=True)
+
+    history['runs'].append(run)
+    save_history(args.history, history)
+    print(f"\nRun '{args.label}' appended to {args.history}")
+
+    failed = [result['stage'] for result in run['stages'] if result['status'] != 'ok']
+    if args.baseline:
+        baseline = find_run(history, args.baseline, before=run)
+        if baseline is None:
+            print(f"No earlier run labelled '{args.baseline}' in {args.history}")
+            return 2
+        if compare_runs(run, baseline, args.threshold):
+            return 1
+    return 1 if failed else 0
+
+
+def run_compare(args):
+    history = load_history(args.history)
+    run = find_run(history, args.run)
+    if run is None:
+        print(f"No run labelled '{args.run}' in {args.history}")
+        return 2
+    baseline = find_run(history, args.baseline, before=run)
+    if baseline is None:
+        print(f"No run labelled '{args.baseline}' before '{args.run}' in {args.history}")
+        return 2
+    return 1 if compare_runs(run, baseline, args.threshold) else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline end to end on synthetic data.")
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help=f"JSON history file (default {DEFAULT_HISTORY})")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slow-down reported as a regression (default 0.10)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="run the benchmark and append it to the history")
+    run.add_argument('--scales', type=float, nargs='+', default=[0.1, 1.0],
+                     help="synthetic data scales (1 = 10,000 patients)")
+    run.add_argument('--seed', type=int, default=0)
+    run.add_argument('--label', default=datetime.now().strftime('%Y%m%d-%H%M%S'),
+                     help="name of this run in the history, e.g. a branch name")
+    run.add_argument('--baseline', help="label of an earlier run to compare with ('latest': the previous run)")
+    run.add_argument('--dsn', help="use this PostgreSQL server instead of a throwaway one "
+                                   "(databases cancer_bench_* are created and dropped on it)")
+    run.add_argument('--pg-bin', help="directory with initdb and pg_ctl for the throwaway server")
+    run.add_argument('--workdir', help="keep the synthetic data, outputs and logs in this directory")
+    run.add_argument('--keep', action='store_true', help="do not delete the temporary working directory")
+
+    compare = commands.add_parser('compare', help="compare two runs from the history")
+    compare.add_argument('--run', default='latest', help="label of the run to check (default: the latest run)")
+    compare.add_argument('--baseline', required=True, help="label of the run to compare with")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == 'run':
+        return run_benchmark(args)
+    return run_compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
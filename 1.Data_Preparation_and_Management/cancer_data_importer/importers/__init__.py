@@ -1,4 +1,15 @@
-from .base_importer import BaseImporter
-from .av_patient_importer import AvPatientImporter
+from .registry import IMPORTERS, load_importer
 
 __all__ = ['BaseImporter', 'AvPatientImporter', 'AvTumourImporter', 'AvGeneImporter']
+
+
+def __getattr__(name):
+    # Classes are imported on first access, so importing the package (or the
+    # registry) does not load every importer module.
+    if name == 'BaseImporter':
+        from .base_importer import BaseImporter
+        return BaseImporter
+    for table, (module_name, class_name) in IMPORTERS.items():
+        if class_name == name:
+            return load_importer(table)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,6 +1,5 @@
 from .base_importer import BaseImporter
-from datetime import datetime
-import logging
+from .schema import Column
 
 #TUMOURID, Pseudonymised tumour ID, Integer, The format of this field in the Simulacrum is deliberately different from the format of pseudonymised tumour id for real individuals. For real individuals TUMOURID is different and stored in different formats.
 #GENDER, Person stated gender, Character, Consult ZGENDER for lookup table. Data is identical to that in AV_PATIENT and the field is present for convenience.
@@ -41,146 +40,44 @@ import logging
 #GLEASON_COMBINED, Combined Gleason primary and secondary scores, Integer, These are only available for certain primary sites
 
 class AvTumourImporter(BaseImporter):
-    def create_table(self):
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS AV_TUMOUR (
-                TUMOURID INTEGER PRIMARY KEY,
-                GENDER CHAR(30),
-                PATIENTID INTEGER, 
-                DIAGNOSISDATEBEST DATE,
-                SITE_ICD10_O2_3CHAR CHAR(3),
-                SITE_ICD10_O2 CHAR(30),
-                SITE_ICD10R4_O2_3CHAR_FROM2013 CHAR(3),
-                SITE_ICD10R4_O2_FROM2013 CHAR(30),
-                SITE_ICDO3REV2011 CHAR(30),
-                SITE_ICDO3REV2011_3CHAR CHAR(3),
-                MORPH_ICD10_O2 CHAR(30),
-                MORPH_ICDO3REV2011 CHAR(30),
-                BEHAVIOUR_ICD10_O2 CHAR(30),
-                BEHAVIOUR_ICDO3REV2011 CHAR(30),
-                T_BEST CHAR(30),
-                N_BEST CHAR(30),
-                M_BEST CHAR(30),
-                STAGE_BEST CHAR(30),
-                GRADE CHAR(30),
-                AGE INTEGER,
-                CREG_CODE CHAR(30),
-                STAGE_BEST_SYSTEM CHAR(30),
-                LATERALITY CHAR(30),
-                SCREENINGSTATUSFULL_CODE CHAR(30),
-                ER_STATUS CHAR(30),
-                PR_STATUS CHAR(30),
-                HER2_STATUS CHAR(30),
-                QUINTILE_2019 CHAR(30),
-                DATE_FIRST_SURGERY DATE,
-                CANCERCAREPLANINTENT CHAR(30),
-                PERFORMANCESTATUS CHAR(30),
-                CHRL_TOT_27_03 CHAR(30),
-                COMORBIDITIES_27_03 CHAR(60),
-                GLEASON_PRIMARY CHAR(30),
-                GLEASON_SECONDARY CHAR(30),
-                GLEASON_TERTIARY CHAR(30),
-                GLEASON_COMBINED INTEGER
-            )
-        ''')
-        self.conn.commit()
-        print("Table AV_TUMOUR created or already exists.")
-
-    def process_row(self, row):
-        try:
-            # Convert integer fields
-            integer_fields = ['TUMOURID', 'PATIENTID', 'AGE', 'GLEASON_COMBINED']
-            for field in integer_fields:
-                if row.get(field) == '':
-                    row[field] = None
-                elif row.get(field):
-                    row[field] = int(row[field])
-            
-            # Convert DIAGNOSISDATEBEST field
-            if row.get('DIAGNOSISDATEBEST'):
-                try:
-                    row['DIAGNOSISDATEBEST'] = datetime.strptime(row['DIAGNOSISDATEBEST'], '%Y-%m-%d').date()
-                except ValueError as ve:
-                    print(f"Date parsing error for DIAGNOSISDATEBEST: {ve}")
-                    return None
-
-            # Convert DATE_FIRST_SURGERY field if present
-            if row.get('DATE_FIRST_SURGERY') and row['DATE_FIRST_SURGERY'].strip():
-                try:
-                    row['DATE_FIRST_SURGERY'] = datetime.strptime(row['DATE_FIRST_SURGERY'], '%Y-%m-%d').date()
-                except ValueError:
-                    row['DATE_FIRST_SURGERY'] = None
-            else:
-                row['DATE_FIRST_SURGERY'] = None
-
-            # Build and return a tuple of values in the correct order
-            values = (
-                row['TUMOURID'],
-                row['GENDER'],
-                row['PATIENTID'],
-                row['DIAGNOSISDATEBEST'],
-                row['SITE_ICD10_O2_3CHAR'],
-                row['SITE_ICD10_O2'],
-                row['SITE_ICD10R4_O2_3CHAR_FROM2013'],
-                row['SITE_ICD10R4_O2_FROM2013'],
-                row['SITE_ICDO3REV2011'],
-                row['SITE_ICDO3REV2011_3CHAR'],
-                row['MORPH_ICD10_O2'],
-                row['MORPH_ICDO3REV2011'],
-                row['BEHAVIOUR_ICD10_O2'],
-                row['BEHAVIOUR_ICDO3REV2011'],
-                row.get('T_BEST'),
-                row.get('N_BEST'),
-                row.get('M_BEST'),
-                row['STAGE_BEST'],
-                row['GRADE'],
-                row['AGE'],
-                row['CREG_CODE'],
-                row.get('STAGE_BEST_SYSTEM'),
-                row['LATERALITY'],
-                row.get('SCREENINGSTATUSFULL_CODE'),
-                row.get('ER_STATUS'),
-                row.get('PR_STATUS'),
-                row.get('HER2_STATUS'),
-                row['QUINTILE_2019'],
-                row.get('DATE_FIRST_SURGERY'),
-                row.get('CANCERCAREPLANINTENT'),
-                row.get('PERFORMANCESTATUS'),
-                row['CHRL_TOT_27_03'],
-                row.get('COMORBIDITIES_27_03'),
-                row.get('GLEASON_PRIMARY'),
-                row.get('GLEASON_SECONDARY'),
-                row.get('GLEASON_TERTIARY'),
-                row.get('GLEASON_COMBINED')
-            )
-            return values
-
-        except KeyError as ke:
-            print(f"Missing key in row: {ke}")
-            return None
-
-        except Exception as e:
-            print(f"Unexpected error in processing row: {e}")
-            return None
-
-    def bulk_insert(self, data):
-        sql = """
-            INSERT INTO AV_TUMOUR (
-                TUMOURID, GENDER, PATIENTID, DIAGNOSISDATEBEST, 
-                SITE_ICD10_O2_3CHAR, SITE_ICD10_O2, SITE_ICD10R4_O2_3CHAR_FROM2013, 
-                SITE_ICD10R4_O2_FROM2013, SITE_ICDO3REV2011, SITE_ICDO3REV2011_3CHAR,
-                MORPH_ICD10_O2, MORPH_ICDO3REV2011, BEHAVIOUR_ICD10_O2, BEHAVIOUR_ICDO3REV2011,
-                T_BEST, N_BEST, M_BEST, STAGE_BEST, GRADE, AGE, CREG_CODE, STAGE_BEST_SYSTEM,
-                LATERALITY, SCREENINGSTATUSFULL_CODE, ER_STATUS, PR_STATUS, HER2_STATUS,
-                QUINTILE_2019, DATE_FIRST_SURGERY, CANCERCAREPLANINTENT, PERFORMANCESTATUS,
-                CHRL_TOT_27_03, COMORBIDITIES_27_03, GLEASON_PRIMARY, GLEASON_SECONDARY,
-                GLEASON_TERTIARY, GLEASON_COMBINED
-            ) VALUES %s
-        """
-        try:
-            from psycopg2.extras import execute_values
-            execute_values(self.cursor, sql, data, page_size=100)
-            self.conn.commit()
-        except Exception as e:
-            print("Bulk insert error:", e)
-            self.conn.rollback()
+    table_name = 'AV_TUMOUR'
+    indexes = ('PATIENTID',)
+    columns = (
+        Column('TUMOURID', 'INTEGER', primary_key=True),
+        Column('GENDER', 'CHAR(30)'),
+        Column('PATIENTID', 'INTEGER'),
+        Column('DIAGNOSISDATEBEST', 'DATE'),
+        Column('SITE_ICD10_O2_3CHAR', 'CHAR(3)'),
+        Column('SITE_ICD10_O2', 'CHAR(30)'),
+        Column('SITE_ICD10R4_O2_3CHAR_FROM2013', 'CHAR(3)'),
+        Column('SITE_ICD10R4_O2_FROM2013', 'CHAR(30)'),
+        Column('SITE_ICDO3REV2011', 'CHAR(30)'),
+        Column('SITE_ICDO3REV2011_3CHAR', 'CHAR(3)'),
+        Column('MORPH_ICD10_O2', 'CHAR(30)'),
+        Column('MORPH_ICDO3REV2011', 'CHAR(30)'),
+        Column('BEHAVIOUR_ICD10_O2', 'CHAR(30)'),
+        Column('BEHAVIOUR_ICDO3REV2011', 'CHAR(30)'),
+        Column('T_BEST', 'CHAR(30)'),
+        Column('N_BEST', 'CHAR(30)'),
+        Column('M_BEST', 'CHAR(30)'),
+        Column('STAGE_BEST', 'CHAR(30)'),
+        Column('GRADE', 'CHAR(30)'),
+        Column('AGE', 'INTEGER'),
+        Column('CREG_CODE', 'CHAR(30)'),
+        Column('STAGE_BEST_SYSTEM', 'CHAR(30)'),
+        Column('LATERALITY', 'CHAR(30)'),
+        Column('SCREENINGSTATUSFULL_CODE', 'CHAR(30)'),
+        Column('ER_STATUS', 'CHAR(30)'),
+        Column('PR_STATUS', 'CHAR(30)'),
+        Column('HER2_STATUS', 'CHAR(30)'),
+        Column('QUINTILE_2019', 'CHAR(30)'),
+        Column('DATE_FIRST_SURGERY', 'DATE'),
+        Column('CANCERCAREPLANINTENT', 'CHAR(30)'),
+        Column('PERFORMANCESTATUS', 'CHAR(30)'),
+        Column('CHRL_TOT_27_03', 'CHAR(30)'),
+        Column('COMORBIDITIES_27_03', 'CHAR(60)'),
+        Column('GLEASON_PRIMARY', 'CHAR(30)'),
+        Column('GLEASON_SECONDARY', 'CHAR(30)'),
+        Column('GLEASON_TERTIARY', 'CHAR(30)'),
+        Column('GLEASON_COMBINED', 'INTEGER'),
+    )
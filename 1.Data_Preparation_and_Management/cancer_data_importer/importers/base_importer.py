@@ -1,89 +1,1422 @@
+import contextlib
 import csv
+import functools
+import io
+import os
+import shutil
 import time
+import logging
+from datetime import date
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import get_context
 from tqdm import tqdm
-from abc import ABC, abstractmethod
+from abc import ABC
 import psycopg2
+from psycopg2 import errorcodes
+from psycopg2.extras import execute_values
+
+from . import columnar, conversion
+from .batching import BatchSizer, peak_rss_mb
+from .checkpoint import ImportCheckpoint
+from .compression import detect_compression, open_input
+from .deferred import DeferredLoad
+from .duplicates import DuplicateKeys, combine_summaries, print_summary
+from .fingerprint import discard_fingerprints
+from .merge import MergeLoad
+from .metrics import ImportMetrics
+from .partitioning import RangePartitions
+from .pipeline import BatchPipeline
+from .rejects import RejectSink
+from .sharding import combine_parts, import_shard, shard_ranges
+from .sinks import TextSink
+from .schema import compile_converter, compile_row_converter, index_ddl, key_columns, table_ddl, value_parser
+from .snapshot import ParquetSnapshot, publish_parts
+
+# COPY text format: backslash, tab, newline and carriage return must be escaped,
+# and NULL is written as \N.
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+_COPY_NULL = '\\N'
+# Size of the reads psycopg2's copy_expert makes from a CopyStream.
+_COPY_READ_SIZE = 8192
+
+
+def encode_copy_row(row):
+    """
+    Encode one tuple produced by `process_row` as a line of COPY text format.
+    dates, times and Decimals are written with str(), which gives the ISO /
+    plain numeric forms PostgreSQL accepts.
+    """
+    return '\t'.join(
+        _COPY_NULL if value is None else str(value).translate(_COPY_ESCAPES)
+        for value in row
+    ) + '\n'
+
+
+class CopyStream(io.TextIOBase):
+    """
+    File-like object that encodes rows lazily for `cursor.copy_expert`.
+    Only the chunk psycopg2 asks for is materialised, so a batch is never
+    held twice in memory (once as tuples, once as text).
+    """
+
+    def __init__(self, rows):
+        self._lines = map(encode_copy_row, rows)
+        self._pending = ''
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            data = self._pending + ''.join(self._lines)
+            self._pending = ''
+            return data
+
+        chunks = [self._pending]
+        length = len(self._pending)
+        for line in self._lines:
+            chunks.append(line)
+            length += len(line)
+            if length >= size:
+                break
+        data = ''.join(chunks)
+        self._pending = data[size:]
+        return data[:size]
+
+
+class ProgressLineReader:
+    """
+    Iterate the decoded lines of a file opened in binary mode and advance a
+    byte-based progress bar, so the CSV is read once and progress is measured
+    against the file size instead of a pre-counted number of rows.
+    `offset` is the number of (decompressed) bytes consumed so far.
+    With `start_offset`, the header line is yielded first and reading then
+    jumps straight to that offset (used to resume from a checkpoint).
+    For compressed input, `raw_file` is the decompressing stream and
+    `progress_file` the underlying file: progress then follows the compressed
+    bytes read from disk, matching a progress bar sized to the file on disk.
+    With `end_offset`, reading stops there (one shard of a file; see
+    sharding.shard_ranges) and the progress bar counts only the bytes from
+    `start_offset` to `end_offset`.
+    """
+
+    # Push progress to tqdm every ~1MB rather than once per line.
+    report_every = 1 << 20
+
+    def __init__(self, raw_file, progress, encoding='utf-8', start_offset=0, progress_file=None,
+                 end_offset=None):
+        self.raw_file = raw_file
+        self.progress = progress
+        self.encoding = encoding
+        self.start_offset = start_offset
+        self.progress_file = progress_file
+        self.end_offset = end_offset
+        self.offset = 0
+
+    def _position(self):
+        return self.offset if self.progress_file is None else self.progress_file.tell()
+
+    def __iter__(self):
+        if self.start_offset:
+            header_line = self.raw_file.readline()
+            if self.progress_file is None:
+                self.raw_file.seek(self.start_offset)
+            else:
+                # A decompressed stream can only move forward by reading.
+                remaining = self.start_offset - len(header_line)
+                while remaining > 0:
+                    skipped = self.raw_file.read(min(remaining, self.report_every))
+                    if not skipped:
+                        break
+                    remaining -= len(skipped)
+            self.offset = self.start_offset
+            yield header_line.decode(self.encoding)
+        reported = self._position()
+        if self.end_offset is None:
+            self.progress.update(reported)
+        next_report = self.offset + self.report_every
+        for raw_line in self.raw_file:
+            if self.end_offset is not None and self.offset >= self.end_offset:
+                break
+            self.offset += len(raw_line)
+            if self.offset >= next_report:
+                position = self._position()
+                self.progress.update(position - reported)
+                reported = position
+                next_report = self.offset + self.report_every
+            yield raw_line.decode(self.encoding)
+        self.progress.update(self._position() - reported)
+
+
+# Importer instance owned by each conversion worker process (see workers=N).
+_worker_importer = None
+# The worker's record converters, by header.
+_worker_converters = {}
+
+
+def _init_conversion_worker(importer):
+    global _worker_importer
+    _worker_importer = importer
+    _worker_converters.clear()
+
+
+def _convert_block(fieldnames, block):
+    """
+    Convert a block of raw CSV records (lists of values) inside a worker process
+    with the importer's `row_converter`, compiled once per worker. Only plain
+    lists cross the process boundary.
+    Returns the converted rows, the rejected records as (values, column, reason),
+    the number of blank lines skipped, the conversion time and the worker's
+    (pid, parser cache stats).
+    """
+    started = time.perf_counter()
+    convert = _worker_converters.get(tuple(fieldnames))
+    if convert is None:
+        convert = _worker_converters[tuple(fieldnames)] = _worker_importer.row_converter(fieldnames)
+    converted = []
+    rejected = []
+    blank = 0
+    for values in block:
+        # A blank line is [], which the converter would pad to an all-NULL row.
+        if not values:
+            blank += 1
+            continue
+        processed_tuple = convert(values)
+        if processed_tuple:
+            converted.append(processed_tuple)
+        else:
+            rejected.append((values, *_worker_importer.reject_reason(dict(zip(fieldnames, values)))))
+    return converted, rejected, blank, time.perf_counter() - started, conversion.process_cache_stats()
+
 
 class BaseImporter(ABC):
-    def __init__(self, config):
+    """
+    Subclasses describe their table once:
+      table_name   target table
+      columns      tuple of schema.Column in table order
+      on_conflict  optional ON CONFLICT action for bulk_insert, e.g. 'DO NOTHING'
+      indexes      secondary (non-unique) index columns, built after the load
+      natural_key  columns identifying a row for strategy='merge'; defaults to the
+                   primary key. With no key at all, merge matches whole rows.
+      partition_key       DATE column to range-partition the table on when it is
+                          imported with partitioned=True
+      partition_interval  'year' (default) or 'month' partitions
+    The DDL, the INSERT/COPY column list and the row converter are all derived
+    from `columns`, so the three can no longer drift apart.
+    """
+    table_name = None
+    columns = ()
+    column_names = ()
+    on_conflict = None
+    indexes = ()
+    natural_key = None
+    partition_key = None
+    partition_interval = 'year'
+    # Retry a failed execute_values batch one row at a time (keeps the good rows).
+    retry_rows_on_error = False
+    # Values per execute_values statement; see insert_page_size.
+    insert_page_values = 20000
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if 'columns' in cls.__dict__:
+            cls.column_names = tuple(column.name for column in cls.columns)
+            cls._convert = staticmethod(compile_converter(cls.columns))
+
+    def __init__(self, config, pool=None):
+        """
+        `pool` is an optional psycopg2 connection pool; when given, connections
+        are borrowed from it instead of opened from `config`.
+        """
         self.config = config
+        self.pool = pool
         self.conn = None
         self.cursor = None
+        # Table the write paths load into: the target table, or a staging table.
+        self.load_table = self.table_name
+        # Rejected rows; import_data_bulk replaces this with a sink writing <file>.rejects.csv.
+        self.rejects = RejectSink()
+        # Partitions of the target table during an import with partitioned=True.
+        self.partitions = None
+        # Rows bulk_insert skipped on a key conflict during the current import.
+        self.conflicts = 0
+        # Positions of the rows the last write_batch/write_frame call did not write.
+        self.lost_rows = []
 
     def connect(self):
-        self.conn = psycopg2.connect(**self.config)
+        if self.pool is not None:
+            self.conn = self.pool.getconn()
+        else:
+            self.conn = psycopg2.connect(**self.config)
         self.cursor = self.conn.cursor()
-        self.conn.autocommit = True
+        # Each batch is committed explicitly, together with its checkpoint.
+        self.conn.autocommit = False
 
     def disconnect(self):
+        if self.partitions is not None:
+            self.partitions.close()
         if self.cursor:
             self.cursor.close()
+            self.cursor = None
         if self.conn:
-            self.conn.close()
+            if self.pool is not None:
+                # A connection that cannot even roll back is closed rather than returned to the pool.
+                try:
+                    self.conn.rollback()
+                    broken = False
+                except psycopg2.Error:
+                    broken = True
+                self.pool.putconn(self.conn, close=broken)
+            else:
+                self.conn.close()
+            self.conn = None
+
+    def __getstate__(self):
+        # Connections cannot be pickled; worker processes only need the config
+        # and the conversion logic.
+        state = self.__dict__.copy()
+        state['conn'] = None
+        state['cursor'] = None
+        state['pool'] = None
+        state['rejects'] = None
+        state['partitions'] = None
+        state['metrics'] = None
+        return state
 
-    @abstractmethod
     def create_table(self):
-        pass
+        partition_by = self.partitions.key if self.partitions is not None else None
+        self.cursor.execute(table_ddl(self.table_name, self.columns, partition_by=partition_by))
+        self.conn.commit()
+        print(f"Table {self.table_name} created or already exists.")
+
+    def create_indexes(self):
+        """Build the secondary indexes once the rows are in (no-op if they exist)."""
+        for column_name in self.indexes:
+            self.cursor.execute(index_ddl(self.table_name, column_name))
+        self.conn.commit()
+
+    def _table_exists(self, table_name):
+        self.cursor.execute("SELECT to_regclass(%s)", (table_name,))
+        return self.cursor.fetchone()[0] is not None
+
+    def _prepare_partitions(self):
+        """
+        Create the target table range-partitioned on `partition_key`, with its
+        default partition, and return its RangePartitions. An existing table
+        that is not partitioned is kept as it is and imported into normally.
+        """
+        partitions = self._range_partitions()
+        if self._table_exists(self.table_name) and not partitions.is_partitioned():
+            self.conn.commit()
+            print(f"{self.table_name} already exists as a regular table; importing without partitions.")
+            return None
+        self.partitions = partitions
+        self.create_table()
+        existing = partitions.load()
+        print(f"{self.table_name} is partitioned by {self.partition_interval} of {self.partition_key} "
+              f"({existing} partitions).")
+        return partitions
+
+    def _range_partitions(self):
+        return RangePartitions(self.cursor, self.table_name, self.column_names, self.partition_key,
+                               self.partition_interval,
+                               unique_columns=[column.name for column, _ in key_columns(self.columns)],
+                               connect=lambda: psycopg2.connect(**self.config))
+
+    def _routes_partitions(self):
+        """True when batches are written to a partitioned target table rather than a staging table."""
+        return self.partitions is not None and self.load_table == self.table_name
+
+    def merge_key(self):
+        """Columns used to match staged rows to existing rows in strategy='merge'."""
+        if self.natural_key:
+            return tuple(self.natural_key)
+        return tuple(column.name for column, constraint in key_columns(self.columns)
+                     if constraint == 'PRIMARY KEY')
 
-    @abstractmethod
     def process_row(self, row):
         """
-        Should return a tuple of values in the correct column order
+        Return a tuple of values in the correct column order
         (or None if the row is invalid).
+        Empty or unparseable values become NULL; a missing value in a NOT NULL
+        or primary key column rejects the row.
+        The rows engine calls `row_converter` instead, which skips the dict;
+        an importer that overrides this method keeps being called with dicts.
         """
-        pass
+        return self._convert(row)
+
+    def row_converter(self, fieldnames):
+        """
+        Converter from a csv.reader record (a list of values) of a file with
+        header `fieldnames` to the insert tuple, or None for a rejected record.
+        Header positions are resolved once and compiled in
+        (schema.compile_row_converter), so no dict is built per row. If a
+        subclass overrides `process_row`, records are zipped into dicts for it.
+        """
+        if type(self).process_row is BaseImporter.process_row:
+            return compile_row_converter(self.columns, fieldnames)
+        process_row = self.process_row
+        width = len(fieldnames)
+
+        def convert(values):
+            if len(values) < width:
+                values = values + [None] * (width - len(values))
+            return process_row(dict(zip(fieldnames, values)))
+        return convert
+
+    def insert_sql(self, placeholders='%s'):
+        sql = (f"INSERT INTO {self.load_table} ({', '.join(self.column_names)}) "
+               f"VALUES {placeholders}")
+        if self.on_conflict:
+            sql += f" ON CONFLICT {self.on_conflict}"
+        return sql
+
+    def insert_page_size(self):
+        """
+        Rows per INSERT statement in bulk_insert: about `insert_page_values`
+        values per statement, so narrow tables send more rows per round trip
+        than wide ones (6-column Sact_Outcome: 3333 rows, 37-column AV_TUMOUR: 540).
+        """
+        return max(100, self.insert_page_values // max(1, len(self.column_names)))
 
-    @abstractmethod
     def bulk_insert(self, data):
         """
-        Should accept a list of tuples (rows) and perform a bulk insert.
+        Perform a bulk insert using psycopg2's execute_values.
+        `data` is a list of tuples produced by process_row.
+        The caller commits; on error the batch is rolled back.
+        With an ON CONFLICT clause, the statement RETURNs the key of each row it
+        really inserted; rows it skipped are counted in `conflicts`.
+        The positions in `data` of the rows not inserted go to `lost_rows`.
+        Returns the number of rows that could not be inserted.
+        """
+        keys = self._returning_keys()
+        try:
+            if self.on_conflict:
+                inserted = execute_values(self.cursor, f"{self.insert_sql()} RETURNING {', '.join(keys) or '1'}",
+                                          data, page_size=self.insert_page_size(), fetch=True)
+            else:
+                execute_values(self.cursor, self.insert_sql(), data, page_size=self.insert_page_size())
+        except Exception as e:
+            logging.error(f"Bulk insert error on {self.load_table}: {e}")
+            self.conn.rollback()
+            if self.retry_rows_on_error:
+                return self._insert_rows_individually(data)
+            reason, column = self._error_reason(e)
+            for row in data:
+                self.rejects.add(row, reason, column)
+            self.lost_rows.extend(range(len(data)))
+            return len(data)
+        if not self.on_conflict or len(inserted) == len(data):
+            return 0
+        skipped = len(data) - len(inserted)
+        self.conflicts += skipped
+        if keys:
+            self.lost_rows.extend(self._skipped_positions(data, inserted, keys))
+        return skipped
+
+    def _returning_keys(self):
+        """Key columns identifying the rows an INSERT ... ON CONFLICT DO NOTHING skipped."""
+        return [column.name for column, _ in key_columns(self.columns)]
+
+    def _skipped_positions(self, data, inserted, keys):
+        """
+        Positions in `data` of the rows not among the RETURNed keys `inserted`.
+        Of rows repeating a key within the batch the first one was inserted.
+        """
+        def normalized(values):
+            # The database returns CHAR(n) blank-padded and dates as date objects.
+            return tuple(None if value is None else str(value).rstrip() for value in values)
+
+        remaining = {}
+        for values in inserted:
+            key = normalized(values)
+            remaining[key] = remaining.get(key, 0) + 1
+        positions = [self.column_names.index(name) for name in keys]
+        skipped = []
+        for index, row in enumerate(data):
+            key = normalized(row[position] for position in positions)
+            if remaining.get(key):
+                remaining[key] -= 1
+            else:
+                skipped.append(index)
+        return skipped
+
+    def _insert_rows_individually(self, data):
+        # A savepoint per row keeps the good rows in the batch transaction.
+        placeholders = "(" + ", ".join(["%s"] * len(self.column_names)) + ")"
+        individual_sql = self.insert_sql(placeholders)
+        failed = 0
+        for index, row in enumerate(data):
+            self.cursor.execute("SAVEPOINT import_row")
+            try:
+                self.cursor.execute(individual_sql, row)
+                inserted = self.cursor.rowcount
+                self.cursor.execute("RELEASE SAVEPOINT import_row")
+            except Exception as inner_e:
+                self.cursor.execute("ROLLBACK TO SAVEPOINT import_row")
+                self.rejects.add(row, *self._error_reason(inner_e))
+                self.lost_rows.append(index)
+                failed += 1
+                continue
+            # ON CONFLICT DO NOTHING inserts no row and raises nothing.
+            if inserted == 0:
+                self.conflicts += 1
+                self.lost_rows.append(index)
+                failed += 1
+        return failed
+
+    @staticmethod
+    def _error_reason(error):
+        """(reason, column) for a database error: e.g. ('unique_violation', 'sact_regimen_pkey')."""
+        pgcode = getattr(error, 'pgcode', None)
+        reason = (errorcodes.lookup(pgcode) or pgcode).lower() if pgcode else 'insert_error'
+        diag = getattr(error, 'diag', None)
+        column = (diag.column_name or diag.constraint_name or '') if diag is not None else ''
+        return reason, column
+
+    def reject_reason(self, row):
+        """
+        (column, reason) for a CSV row dict the converter rejected: the first
+        NOT NULL / key column whose value is missing or cannot be parsed.
+        """
+        for column in self.columns:
+            if column.nullable and not column.primary_key:
+                continue
+            value = row.get(column.name)
+            if value is None or value == '':
+                return column.name, 'missing_value'
+            parser = value_parser(column)
+            if parser is not None and parser(value) is None:
+                return column.name, 'invalid_value'
+        return '', 'rejected'
+
+    def _reject_records(self, rows):
+        for row in rows:
+            column, reason = self.reject_reason(row)
+            self.rejects.add(row.values(), reason, column)
+
+    def _reject_values(self, fieldnames, records):
+        """`_reject_records` for csv.reader records; the dict is only built for the rejected ones."""
+        for values in records:
+            column, reason = self.reject_reason(dict(zip(fieldnames, values)))
+            self.rejects.add(values, reason, column)
+
+    def copy_sql(self, table=None, csv_format=False):
+        sql = f"COPY {table or self.load_table} ({', '.join(self.column_names)}) FROM STDIN"
+        if csv_format:
+            sql += f" WITH (FORMAT csv, NULL '{columnar.CSV_NULL}')"
+        return sql
+
+    def copy_rows(self, data):
         """
-        pass
+        Load a batch with a single COPY ... FROM STDIN statement.
+        COPY has no ON CONFLICT clause, so if the batch is rejected (duplicate key,
+        bad value) it is rolled back and handed to the importer's `bulk_insert`,
+        which keeps the table's conflict handling.
+        A partitioned target gets one COPY per partition the batch touches,
+        straight into the partition.
+        Returns the number of rows that could not be loaded.
+        """
+        try:
+            if self._routes_partitions():
+                for partition, rows in self.partitions.route(data).items():
+                    self.cursor.copy_expert(self.copy_sql(partition), CopyStream(rows))
+            else:
+                self.cursor.copy_expert(self.copy_sql(), CopyStream(data))
+        except psycopg2.Error as e:
+            logging.error(f"COPY into {self.load_table} failed: {e}. Falling back to bulk_insert.")
+            self.conn.rollback()
+            return self.bulk_insert(data)
+        return 0
+
+    def write_batch(self, data, mode='copy'):
+        """
+        Send one batch of processed tuples to the database (the caller commits).
+        mode='copy' streams the batch with COPY; mode='insert' uses the importer's
+        `bulk_insert` (execute_values). Returns the number of rows lost.
+        """
+        self.lost_rows = []
+        if mode == 'copy' and self.table_name and self.column_names:
+            return self.copy_rows(data)
+        if self._routes_partitions():
+            # Only creates the partitions the batch needs; the parent routes the INSERTed rows.
+            self.partitions.route(data)
+        return self.bulk_insert(data)
+
+    def write_frame(self, frame, mode='copy'):
+        """
+        Columnar-engine counterpart of `write_batch` for a converted DataFrame chunk.
+        The chunk is rendered to CSV in one vectorized call and sent with COPY;
+        a rejected chunk falls back to `bulk_insert` like `copy_rows` does.
+        """
+        self.lost_rows = []
+        if mode != 'copy':
+            return self.write_batch(columnar.frame_to_tuples(frame), mode)
+
+        groups = self.partitions.route_frame(frame) if self._routes_partitions() else {None: frame}
+        try:
+            for partition, group in groups.items():
+                buffer = io.StringIO()
+                columnar.frame_to_csv(group, buffer)
+                buffer.seek(0)
+                self.cursor.copy_expert(self.copy_sql(partition, csv_format=True), buffer)
+        except psycopg2.Error as e:
+            logging.error(f"COPY into {self.load_table} failed: {e}. Falling back to bulk_insert.")
+            self.conn.rollback()
+            return self.bulk_insert(columnar.frame_to_tuples(frame))
+        return 0
 
-    def import_data_bulk(self, file_path, batch_size=10000):
+    def _write_snapshot(self, snapshot, batch, lost, engine):
+        """
+        Add a committed batch to the snapshot, less the rows at positions `lost`
+        that the database rejected or skipped on a key conflict.
+        """
+        started = time.perf_counter()
+        if lost:
+            lost = set(lost)
+            keep = [index not in lost for index in range(len(batch))]
+            batch = batch[keep] if engine == 'columnar' else [row for row, kept in zip(batch, keep) if kept]
+        (snapshot.write_frame if engine == 'columnar' else snapshot.write_rows)(batch)
+        self.metrics.add('snapshot', time.perf_counter() - started)
+
+    def _convert_columnar(self, lines, sizer):
+        """
+        Yield (rows_read, converted_frame, end_offset) using the vectorized parser
+        in columnar.py instead of csv.reader + row_converter.
+        """
+        chunks = columnar.read_chunks(lines, self.columns, sizer)
+        while True:
+            started = time.perf_counter()
+            chunk, end_offset = next(chunks, (None, None))
+            if chunk is None:
+                break
+            read_done = time.perf_counter()
+            frame = columnar.convert_chunk(chunk, self.columns)
+            if len(frame) < len(chunk):
+                rejected = chunk.loc[chunk.index.difference(frame.index)]
+                self._reject_records(rejected.to_dict('records'))
+            self.metrics.add('read', read_done - started)
+            self.metrics.add('convert', time.perf_counter() - read_done)
+            yield len(chunk), frame, end_offset
+
+    def _convert_serial(self, lines, sizer):
+        """
+        Yield (rows_read, converted_batch, end_offset), running `row_converter`
+        in this process over blocks of `sizer.size` records. `end_offset` is the
+        byte offset just past the batch's last record.
+        Records stay the lists csv.reader returns; the header is resolved to
+        positions once, instead of csv.DictReader building a dict per row.
+        """
+        csv_reader = csv.reader(lines)
+        fieldnames = next(csv_reader, None)
+        if not fieldnames:
+            return
+        convert = self.row_converter(fieldnames)
+        while True:
+            started = time.perf_counter()
+            records = list(islice(csv_reader, sizer.size))
+            if not records:
+                break
+            read_done = time.perf_counter()
+            # Blank lines ([]) are skipped, not converted or rejected, as csv.DictReader does.
+            records = [values for values in records if values]
+            results = list(map(convert, records))
+            converted = [processed_tuple for processed_tuple in results if processed_tuple]
+            rows_read = len(records)
+            if len(converted) < rows_read:
+                self._reject_values(fieldnames, [values for values, processed_tuple in zip(records, results)
+                                                 if not processed_tuple])
+            self.metrics.add('read', read_done - started)
+            self.metrics.add('convert', time.perf_counter() - read_done)
+            yield rows_read, converted, lines.offset
+
+    def _convert_in_pool(self, lines, sizer, workers):
+        """
+        Yield (rows_read, converted_batch, end_offset) in file order while `workers`
+        processes run `row_converter`. At most 2 * workers blocks are in flight, so a
+        slow writer holds back the reader instead of letting converted rows pile up.
+        The workers are spawned rather than forked: this generator runs on the
+        BatchPipeline thread, and forking a process that has other threads
+        running can copy a lock another thread holds.
+        """
+        csv_reader = csv.reader(lines)
+        fieldnames = next(csv_reader, None)
+        if not fieldnames:
+            return
+
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'),
+                                 initializer=_init_conversion_worker,
+                                 initargs=(self,)) as pool:
+            while True:
+                started = time.perf_counter()
+                block = list(islice(csv_reader, sizer.size))
+                if not block:
+                    break
+                self.metrics.add('read', time.perf_counter() - started)
+                future = pool.submit(_convert_block, fieldnames, block)
+                pending.append((len(block), future, lines.offset))
+                if len(pending) >= workers * 2:
+                    rows_read, future, end_offset = pending.popleft()
+                    yield (*self._block_result(rows_read, future), end_offset)
+            while pending:
+                rows_read, future, end_offset = pending.popleft()
+                yield (*self._block_result(rows_read, future), end_offset)
+
+    def _block_result(self, rows_read, future):
+        """(rows_read, converted) for a finished block; blank lines do not count as rows read."""
+        converted, rejected, blank, convert_seconds, (pid, stats) = future.result()
+        self.metrics.add('convert', convert_seconds)
+        for values, column, reason in rejected:
+            self.rejects.add(values, reason, column)
+        # Worker caches live for the whole pool, so the latest snapshot per pid is its total.
+        self._worker_cache_stats[pid] = stats
+        return rows_read - blank, converted
+
+    def _batches(self, lines, sizer, engine='rows', workers=1):
+        """The (rows_read, converted, end_offset) generator for `engine` and `workers`."""
+        if engine == 'columnar':
+            return self._convert_columnar(lines, sizer)
+        if workers > 1:
+            return self._convert_in_pool(lines, sizer, workers)
+        return self._convert_serial(lines, sizer)
+
+    def _write_batches(self, batches, sizer, write, engine='rows', prefetch=2, duplicates=None, delta=None,
+                       checkpoint=None, snapshot=None, rows_read=0, rows_written=0):
+        """
+        The batch loop of import_data_bulk, _import_range and dry_run.
+        Each (rows_read, converted, end_offset) batch is checked for repeated
+        keys (`duplicates`, a DuplicateKeys), cut down to its new and changed
+        rows (`delta`, a RowFingerprints) and passed to `write`, which returns
+        the number of rows it did not write. With a connection, the batch is
+        then committed together with `checkpoint`, and the rows written go to
+        `snapshot`. Reading and conversion run up to `prefetch` batches ahead
+        on a BatchPipeline thread (prefetch=0: in turn), and `sizer` is told
+        how long each batch took.
+        `rows_read` and `rows_written` start from a resumed import's checkpoint.
+        Returns (rows_read, rows_written, rows_unchanged).
+        """
+        unchanged = 0
+        pipeline = BatchPipeline(batches, depth=prefetch) if prefetch else contextlib.nullcontext(batches)
+        with pipeline as ready_batches:
+            batch_started = time.perf_counter()
+            for batch_rows, converted, end_offset in ready_batches:
+                self.metrics.add('wait', time.perf_counter() - batch_started)
+                rows_read += batch_rows
+                if duplicates is not None:
+                    converted = self._route_duplicates(duplicates, converted, engine)
+                batch = converted
+                if delta is not None:
+                    # Only the delta is written; unchanged rows are counted apart.
+                    delta_started = time.perf_counter()
+                    rows = columnar.frame_to_tuples(converted) if engine == 'columnar' else converted
+                    converted = delta.changed_rows(rows)
+                    unchanged += len(rows) - len(converted)
+                    self.metrics.add('fingerprint', time.perf_counter() - delta_started)
+
+                write_started = time.perf_counter()
+                # Overrides of write_batch that return nothing are taken to lose no rows.
+                failed = (write(converted) or 0) if len(converted) else 0
+                rows_written += len(converted) - failed
+
+                commit_started = time.perf_counter()
+                # A dry run has no connection.
+                if self.conn is not None:
+                    if checkpoint is not None:
+                        checkpoint.save(end_offset, rows_read, rows_written)
+                    self.conn.commit()
+                batch_done = time.perf_counter()
+                self.metrics.end_batch(batch_rows, len(converted) - failed,
+                                       commit_started - write_started, batch_done - commit_started)
+                if snapshot is not None:
+                    lost = self.lost_rows if failed else []
+                    if lost and delta is not None:
+                        # Positions in the changed rows; map them back to the whole batch.
+                        lost_ids = {id(converted[index]) for index in lost}
+                        lost = [index for index, row in enumerate(rows) if id(row) in lost_ids]
+                    self._write_snapshot(snapshot, batch, lost, engine)
+                    batch_done = time.perf_counter()
+                sizer.record(batch_rows, batch_done - batch_started)
+                batch_started = batch_done
+        return rows_read, rows_written, unchanged
+
+    def import_data_bulk(self, file_path, batch_size=10000, mode='copy', workers=1, engine='rows',
+                         resume=False, strategy='append', unlogged=False, report_path=None, adaptive=False,
+                         prefetch=2, partitioned=False, snapshot_dir=None, check_duplicates=True):
         """
         NEW bulk insert method with progress reporting.
-        Reads CSV, processes rows, and calls `bulk_insert` in batches.
-        Shows a progress bar with percentage completed and elapsed time.
+        Reads CSV, processes rows, and writes them in batches with `write_batch`.
+        The file is read exactly once; the progress bar tracks bytes consumed
+        against the file size. .gz, .bz2 and .zst files (detected by extension
+        or magic bytes) are decompressed on the fly, and progress then counts
+        compressed bytes.
+        With workers > 1, `process_row` runs on a process pool in blocks of
+        `batch_size` rows; batches are still written in file order over this
+        importer's single connection.
+        engine='columnar' parses and converts whole column chunks with pandas
+        instead (intended for the large tables such as Sact_Drug_Detail,
+        SACT_CYCLE and AV_GENE); `workers` does not apply to it.
+        Every batch is committed together with a checkpoint (byte offset and row
+        counts) in the import_checkpoint table. With resume=True an interrupted
+        import of the same file continues from its last committed batch.
+        strategy='deferred' loads into an unindexed staging table (UNLOGGED with
+        unlogged=True), then adds the primary/unique keys and secondary indexes
+        once, runs ANALYZE and writes duplicated keys to <file>.duplicate_keys.csv
+        instead of losing whole batches to key violations.
+        strategy='merge' loads the file into a TEMP staging table and applies it
+        with one set-based update + anti-join insert on the importer's natural
+        key, so re-importing a refreshed extract never duplicates rows.
+        strategy='delta' is a merge that first compares each converted row with
+        the fingerprints stored by the previous import of the table; unchanged
+        rows are dropped before they reach the database, so a weekly refresh
+        writes only what changed. Added/changed/unchanged/removed counts are
+        printed and returned under 'delta'.
+        Read, convert, write and commit time per batch, rows/sec per batch, a
+        commit latency histogram and rejected rows by reason are written as JSON
+        to `report_path` (default <file>.import_report.json).
+        Reading/conversion runs on a background thread up to `prefetch` batches
+        ahead of the writer (pipeline.BatchPipeline), so parsing overlaps the
+        database round trips; prefetch=0 reads and writes in turn.
+        With adaptive=True, `batch_size` is only the starting size: it is tuned
+        from the measured rows/sec, commit latency and memory of the batches
+        (see batching.BatchSizer) and the size it settles on is printed.
+        With partitioned=True, an importer that declares `partition_key` creates
+        its table range-partitioned by year (or month) of that date and COPYs
+        each batch straight into the partitions it touches (see
+        partitioning.RangePartitions). An existing unpartitioned table is left
+        as it is.
+        With snapshot_dir set, the rows of each committed batch (less those the
+        database rejected or skipped on a key conflict) are also written
+        to a typed, zstd-compressed Parquet file under
+        <snapshot_dir>/<table>/load_date=<today>/ (see snapshot.ParquetSnapshot),
+        published once the import has finished. A resumed import cannot see the
+        rows committed before the interruption and writes no snapshot.
+        With check_duplicates (the default, append and deferred strategies) the
+        primary, unique and natural keys are tracked as the file streams (see
+        duplicates.DuplicateKeys): a row repeating a primary or unique key is
+        rejected as duplicate_key before it is written, a repeated natural key
+        is only reported, and the repeated values go to <file>.duplicate_keys.csv.
+        A resumed import first re-reads the part of the file loaded before the
+        interruption to learn its keys, so the check and the report still cover
+        the whole file.
+        Returns a summary dict (table, rows read/inserted/failed, elapsed time).
         """
         start_time = time.time()
         total_rows = 0
         successful_imports = 0
-        buffer = []
+        # Rows a delta import found unchanged and did not write.
+        unchanged_rows = 0
+        start_offset = 0
+
+        load = None
+        merge_counts = None
+        delta = None
+        cache_stats_before = conversion.cache_stats()
+        self._worker_cache_stats = {}
+        self.metrics = ImportMetrics()
+        self.conflicts = 0
+        rejects_path = f"{file_path}.rejects.csv"
+        self.rejects = RejectSink(rejects_path, append=resume)
+        # Merge and delta imports keep the last occurrence of a key, so they are not checked.
+        duplicates = None
+        duplicates_path = f"{file_path}.duplicate_keys.csv"
+        if check_duplicates and strategy in ('append', 'deferred'):
+            duplicates = DuplicateKeys.for_importer(self)
+            if duplicates is not None and os.path.exists(duplicates_path):
+                os.remove(duplicates_path)
+
+        try:
+            self.connect()
+            self.partitions = self._prepare_partitions() if partitioned and self.partition_key else None
+            if strategy == 'deferred':
+                # A resumed deferred load can only continue into its own staging table.
+                load = DeferredLoad(self, unlogged)
+                resume = load.prepare(resume)
+            elif strategy in ('merge', 'delta'):
+                # The TEMP staging table does not survive the session, and a merge is
+                # idempotent anyway, so a merge always reads the whole file.
+                load = MergeLoad(self, delta=strategy == 'delta')
+                load.prepare()
+                resume = False
+                delta = load.delta
+            else:
+                self.create_table()
+            if strategy != 'delta':
+                # This import changes the table behind the fingerprints of earlier delta imports.
+                discard_fingerprints(self.cursor, self.table_name)
+
+            checkpoint = ImportCheckpoint(self.cursor, self.table_name, file_path)
+            checkpoint.create_table()
+            if resume:
+                saved = checkpoint.load()
+                if saved:
+                    start_offset, total_rows, successful_imports, completed = saved
+                    if completed:
+                        self.conn.commit()
+                        print(f"{file_path} was already fully imported into {self.table_name}; nothing to resume.")
+                        self.disconnect()
+                        return self._summary(file_path, total_rows, successful_imports, 0.0, skipped=True)
+                    print(f"Resuming at byte {start_offset} ({total_rows} rows already read).")
+                elif checkpoint.range_keys():
+                    raise ValueError(f"{file_path} was interrupted during a sharded import; "
+                                     f"resume it with the same number of shards")
+            else:
+                checkpoint.clear()
+            self.conn.commit()
+            if duplicates is not None and start_offset:
+                self._replay_duplicates(duplicates, file_path, start_offset, engine, batch_size)
+
+            snapshot = None
+            if snapshot_dir and start_offset:
+                print("No snapshot is written for a resumed import; re-import the file to write one.")
+            elif snapshot_dir:
+                snapshot = ParquetSnapshot(snapshot_dir, self.table_name, self.columns, file_path)
+
+            file_size = os.path.getsize(file_path)
+            compression = detect_compression(file_path)
+            if compression:
+                print(f"Reading {compression}-compressed input.")
+            with open(file_path, 'rb') as raw_file, \
+                    open_input(raw_file, compression) as input_file, \
+                    tqdm(total=file_size, desc="Processing rows", unit="B",
+                         unit_scale=True, unit_divisor=1024) as progress, \
+                    (snapshot or contextlib.nullcontext()):
+                lines = ProgressLineReader(input_file, progress, start_offset=start_offset,
+                                           progress_file=raw_file if compression else None)
+                sizer = BatchSizer(batch_size, adaptive=adaptive)
+                batches = self._batches(lines, sizer, engine, workers)
+                # A delta import writes tuples: the rows left after comparing fingerprints.
+                write = self.write_frame if engine == 'columnar' and delta is None else self.write_batch
+                total_rows, successful_imports, unchanged_rows = self._write_batches(
+                    batches, sizer, functools.partial(write, mode=mode), engine=engine, prefetch=prefetch,
+                    duplicates=duplicates, delta=delta, checkpoint=checkpoint, snapshot=snapshot,
+                    rows_read=total_rows, rows_written=successful_imports)
+
+            finish_started = time.perf_counter()
+            if strategy == 'deferred':
+                not_kept = load.finish(file_path, report_duplicates=duplicates is None)
+                self.metrics.reject('duplicate_key', not_kept)
+                successful_imports -= not_kept
+            elif strategy in ('merge', 'delta'):
+                merge_counts = load.finish()
+                self.metrics.reject('missing_or_repeated_key', merge_counts[3])
+                successful_imports -= merge_counts[3]
+                self.create_indexes()
+            else:
+                self.create_indexes()
+            checkpoint.save(lines.offset, total_rows, successful_imports, completed=True)
+            self.conn.commit()
+            if snapshot is not None:
+                snapshot.publish()
+            self.metrics.add('finish', time.perf_counter() - finish_started)
+            self.rejects.close()
+            for (column, reason), count in self.rejects.counts.items():
+                self.metrics.reject(reason, count, column)
 
-        # First, get the total number of rows for progress estimation.
-        # (We skip the header row.)
-        with open(file_path, 'r', encoding='utf-8') as csv_file:
-            total_rows = sum(1 for _ in csv_file) - 1
+            elapsed_time = time.time() - start_time
+
+            print("\nBulk import completed:")
+            print(f"  Total rows read: {total_rows}")
+            print(f"  Successfully inserted: {successful_imports} rows")
+            if delta is not None:
+                print(f"  Unchanged (not written): {unchanged_rows} rows")
+            print(f"  Failed/skipped: {total_rows - successful_imports - unchanged_rows} rows")
+            if self.conflicts:
+                print(f"  Skipped on key conflict (ON CONFLICT {self.on_conflict}): {self.conflicts} rows")
+            print(f"  Elapsed time: {elapsed_time:.2f} seconds")
+            self.metrics.print_summary()
+            if adaptive:
+                print(f"  Batch size: {sizer.size} rows ({'settled' if sizer.settled else 'still adapting'})")
+            if self.rejects.total:
+                print(f"  Rejected rows written to {rejects_path}")
+            if snapshot is not None:
+                print(f"  Snapshot of {snapshot.rows} rows written to {snapshot.path}")
+            duplicate_summary = duplicates.summary(duplicates_path) if duplicates is not None else None
+            if delta is not None:
+                delta_counts = delta.counts()
+                print(f"  Delta: {delta_counts['added']} added, {delta_counts['changed']} changed, "
+                      f"{delta_counts['unchanged']} unchanged, {delta_counts['removed']} removed")
+            parser_cache = self._parser_cache_stats(cache_stats_before)
+            for line in conversion.format_cache_stats(parser_cache):
+                print(f"  Parser cache {line}")
+
+            self.disconnect()
+            summary = self._summary(file_path, total_rows, successful_imports, elapsed_time, unchanged=unchanged_rows)
+            summary['parser_cache'] = parser_cache
+            if merge_counts:
+                summary['merge'] = dict(zip(('inserted', 'updated', 'unchanged', 'skipped'), merge_counts))
+            if delta is not None:
+                summary['delta'] = delta.counts()
+            if self.rejects.total:
+                summary['rejects'] = rejects_path
+            if snapshot is not None:
+                summary['snapshot'] = snapshot.path
+            if duplicate_summary is not None:
+                summary['duplicates'] = duplicate_summary
+
+            report_path = report_path or f"{file_path}.import_report.json"
+            settings = {'batch_size': batch_size, 'mode': mode, 'workers': workers, 'engine': engine,
+                        'resume': resume, 'strategy': strategy, 'unlogged': unlogged, 'adaptive': adaptive,
+                        'prefetch': prefetch, 'partitioned': self.partitions is not None, 'snapshot_dir': snapshot_dir,
+                        'check_duplicates': duplicates is not None}
+            if adaptive:
+                summary['batch_size'] = sizer.size
+            try:
+                self.metrics.write_json(report_path, summary, settings)
+                summary['report'] = report_path
+                print(f"  Import report written to {report_path}")
+            except OSError as e:
+                logging.error(f"Could not write import report {report_path}: {e}")
+            return summary
+        finally:
+            # After a failure: roll back the open batch, give a pooled connection back
+            # and close the rejects file. On success these have already run.
+            self.rejects.close()
+            self.disconnect()
+            self.load_table = self.table_name
+            self.partitions = None
+
+    def import_data_sharded(self, file_path, shards=4, batch_size=10000, mode='copy', engine='rows',
+                            adaptive=False, prefetch=2, partitioned=False, report_path=None, snapshot_dir=None,
+                            resume=False, check_duplicates=True):
+        """
+        Import one large uncompressed CSV with `shards` processes at once.
+        The file is split into byte ranges that start on record boundaries
+        (quoted fields spanning lines included; see sharding.shard_ranges) and
+        each range is imported by its own process over its own connection, with
+        its own progress bar. Each shard commits its batches independently.
+        The per-shard and combined row counts, stage times and rejects are
+        printed, and the rejects are gathered into <file>.rejects.csv. Secondary
+        indexes are built once all shards are done.
+        Sharded imports append; there is no deferred/merge/delta strategy.
+        Compressed files cannot be split into byte ranges and are imported by
+        import_data_bulk as a single stream.
+        Each shard commits a checkpoint of its own byte range with every batch
+        (see checkpoint.ImportCheckpoint). With resume=True every shard
+        continues from its last committed batch; the file must be split into
+        the same number of shards as the interrupted import. Once every shard
+        has finished, the file is recorded as fully imported.
+        With check_duplicates, each shard tracks the keys of its own byte range
+        as import_data_bulk does for a whole file, and the repeated values of
+        all shards go to <file>.duplicate_keys.csv. A key repeated in two
+        different shards is left to the table's constraints, as it is when it
+        is repeated in two different files.
+        With snapshot_dir set, each shard writes its own Parquet part of the
+        snapshot; the parts are published together once every shard succeeded.
+        A resumed sharded import writes no snapshot.
+        Returns the combined summary dict, with one entry per shard under 'shards'.
+        """
+        compression = detect_compression(file_path)
+        if compression or shards <= 1:
+            if compression:
+                print(f"{compression}-compressed input cannot be split into shards; importing it as one stream.")
+            return self.import_data_bulk(file_path, batch_size=batch_size, mode=mode, engine=engine,
+                                         resume=resume, adaptive=adaptive, prefetch=prefetch, partitioned=partitioned,
+                                         report_path=report_path, snapshot_dir=snapshot_dir,
+                                         check_duplicates=check_duplicates)
+
+        start_time = time.time()
+        rejects_path = f"{file_path}.rejects.csv"
+        duplicates_path = f"{file_path}.duplicate_keys.csv"
+        ranges = shard_ranges(file_path, shards)
 
+        # The table (and its partitions) must exist before the shards start writing.
         self.connect()
-        self.create_table()
+        try:
+            self.partitions = self._prepare_partitions() if partitioned and self.partition_key else None
+            self.create_table()
+            discard_fingerprints(self.cursor, self.table_name)
+            checkpoint = ImportCheckpoint(self.cursor, self.table_name, file_path)
+            checkpoint.create_table()
+            saved_ranges = checkpoint.range_keys() if resume else set()
+            if saved_ranges:
+                expected = {ImportCheckpoint(self.cursor, self.table_name, file_path, byte_range).file_path
+                            for byte_range in ranges}
+                if saved_ranges - expected:
+                    raise ValueError(f"{file_path} was interrupted while imported in a different number of "
+                                     f"shards; resume it with the same number of shards")
+            elif resume:
+                saved = checkpoint.load()
+                if saved:
+                    _, total_rows, successful_imports, completed = saved
+                    if not completed:
+                        raise ValueError(f"{file_path} was interrupted during an import without shards; "
+                                         f"resume it without shards")
+                    self.conn.commit()
+                    print(f"{file_path} was already fully imported into {self.table_name}; nothing to resume.")
+                    return self._summary(file_path, total_rows, successful_imports, 0.0, skipped=True)
+            if not saved_ranges:
+                checkpoint.clear()
+            self.conn.commit()
+            partitioned = self.partitions is not None
+        finally:
+            self.disconnect()
+            self.partitions = None
+
+        resume = bool(saved_ranges)
+        if resume:
+            print(f"Resuming the {len(ranges)} shards of {file_path} from their checkpoints.")
+            if snapshot_dir:
+                print("No snapshot is written for a resumed import; re-import the file to write one.")
+                snapshot_dir = None
+        else:
+            # Left by an earlier run; a resumed run adds to the parts of its shards instead.
+            for stale_path in [rejects_path, duplicates_path] + [
+                    f"{file_path}.{name}.shard{shard}.csv" for name in ('rejects', 'duplicate_keys')
+                    for shard in range(len(ranges))]:
+                if os.path.exists(stale_path):
+                    os.remove(stale_path)
+
+        print(f"Importing {file_path} in {len(ranges)} shards.")
+        options = {'batch_size': batch_size, 'mode': mode, 'engine': engine, 'adaptive': adaptive,
+                   'prefetch': prefetch, 'partitioned': partitioned, 'snapshot_dir': snapshot_dir,
+                   'load_date': date.today(), 'resume': resume, 'check_duplicates': check_duplicates}
+        results = []
+        failed = []
+        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            futures = [pool.submit(import_shard, self, file_path, shard, start, end, options)
+                       for shard, (start, end) in enumerate(ranges)]
+            for shard, future in enumerate(futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    logging.error(f"Shard {shard} of {file_path} failed: {e}")
+                    failed.append(shard)
+        if failed:
+            for summary, _, _ in results:
+                if summary.get('snapshot_part'):
+                    os.remove(summary['snapshot_part'])
+            raise RuntimeError(f"{len(failed)} of {len(ranges)} shards failed ({', '.join(map(str, failed))}); "
+                               f"the batches committed by the other shards remain in {self.table_name}")
 
-        with open(file_path, 'r', encoding='utf-8') as csv_file:
-            csv_reader = csv.DictReader(csv_file)
-            # Wrap the reader with tqdm for progress bar
-            for row in tqdm(csv_reader, total=total_rows, desc="Processing rows", unit="row"):
-                processed_tuple = self.process_row(row)
-                if processed_tuple:
-                    buffer.append(processed_tuple)
-
-                # When we reach the batch size, insert the batch
-                if len(buffer) >= batch_size:
-                    self.bulk_insert(buffer)
-                    successful_imports += len(buffer)
-                    buffer.clear()
-
-            # Insert any remaining rows
-            if buffer:
-                self.bulk_insert(buffer)
-                successful_imports += len(buffer)
+        metrics = ImportMetrics()
+        shard_summaries = []
+        shard_cache_stats = {}
+        for summary, report, (pid, stats) in results:
+            metrics.merge_report(report, shard=summary['shard'])
+            shard_summaries.append(summary)
+            shard_cache_stats[summary['shard']] = stats
 
+        total_rows = sum(summary['rows_read'] for summary in shard_summaries)
+        successful_imports = sum(summary['rows_inserted'] for summary in shard_summaries)
+        finish_started = time.perf_counter()
+        self.connect()
+        self.create_indexes()
+        self.cursor.execute(f"ANALYZE {self.table_name}")
+        # The whole file is imported: one completed checkpoint replaces those of the shards.
+        checkpoint = ImportCheckpoint(self.cursor, self.table_name, file_path)
+        checkpoint.clear()
+        checkpoint.save(os.path.getsize(file_path), total_rows, successful_imports, completed=True)
+        self.conn.commit()
+        self.disconnect()
+        metrics.add('finish', time.perf_counter() - finish_started)
+        rejects_path = combine_parts([f"{file_path}.rejects.shard{shard}.csv" for shard in range(len(ranges))],
+                                     rejects_path)
+        duplicate_summary = None
+        if any('duplicates' in summary for summary in shard_summaries):
+            duplicate_summary = combine_summaries([summary.pop('duplicates') for summary in shard_summaries])
+            if combine_parts([f"{file_path}.duplicate_keys.shard{shard}.csv" for shard in range(len(ranges))],
+                             duplicates_path):
+                duplicate_summary['report'] = duplicates_path
+        snapshot_directory = None
+        if snapshot_dir:
+            snapshot_directory = os.path.dirname(shard_summaries[0]['snapshot_part'])
+            prefix = shard_summaries[0]['snapshot_prefix']
+            publish_parts(snapshot_directory, prefix, [summary.pop('snapshot_part') for summary in shard_summaries])
+            for summary in shard_summaries:
+                del summary['snapshot_prefix']
+
+        self.conflicts = sum(summary['rows_skipped_on_conflict'] for summary in shard_summaries)
         elapsed_time = time.time() - start_time
 
-        print(f"\nBulk import completed:")
+        print("\nSharded import completed:")
+        for summary in shard_summaries:
+            print(f"  Shard {summary['shard']} (bytes {summary['start']}-{summary['end']}): "
+                  f"{summary['rows_inserted']} rows inserted, {summary['rows_failed']} failed/skipped, "
+                  f"{summary['elapsed_seconds']:.2f}s")
         print(f"  Total rows read: {total_rows}")
         print(f"  Successfully inserted: {successful_imports} rows")
         print(f"  Failed/skipped: {total_rows - successful_imports} rows")
+        if self.conflicts:
+            print(f"  Skipped on key conflict (ON CONFLICT {self.on_conflict}): {self.conflicts} rows")
         print(f"  Elapsed time: {elapsed_time:.2f} seconds")
+        metrics.print_summary()
+        if rejects_path:
+            print(f"  Rejected rows written to {rejects_path}")
+        if snapshot_directory:
+            print(f"  Snapshot written to {snapshot_directory} ({len(ranges)} parts)")
+        if duplicate_summary is not None:
+            print_summary(duplicate_summary)
+            if 'report' in duplicate_summary:
+                print(f"  Duplicated key values written to {duplicates_path}")
+        parser_cache = conversion.merge_cache_stats(shard_cache_stats)
+        for line in conversion.format_cache_stats(parser_cache):
+            print(f"  Parser cache {line}")
+
+        summary = self._summary(file_path, total_rows, successful_imports, elapsed_time)
+        summary['shards'] = shard_summaries
+        summary['parser_cache'] = parser_cache
+        if rejects_path:
+            summary['rejects'] = rejects_path
+        if snapshot_directory:
+            summary['snapshot'] = snapshot_directory
+        if duplicate_summary is not None:
+            summary['duplicates'] = duplicate_summary
+        report_path = report_path or f"{file_path}.import_report.json"
+        settings = {'batch_size': batch_size, 'mode': mode, 'engine': engine, 'shards': len(ranges),
+                    'resume': resume, 'adaptive': adaptive, 'prefetch': prefetch, 'partitioned': partitioned,
+                    'snapshot_dir': snapshot_dir, 'check_duplicates': check_duplicates}
+        try:
+            metrics.write_json(report_path, summary, settings)
+            summary['report'] = report_path
+            print(f"  Import report written to {report_path}")
+        except OSError as e:
+            logging.error(f"Could not write import report {report_path}: {e}")
+        return summary
 
+    def _import_range(self, file_path, shard, start, end, batch_size=10000, mode='copy', engine='rows',
+                      adaptive=False, prefetch=2, partitioned=False, snapshot_dir=None, load_date=None,
+                      resume=False, check_duplicates=True):
+        """
+        Import the records in bytes [start, end) of `file_path` over a connection
+        of its own; one shard of import_data_sharded, run in a worker process.
+        Every batch is committed with the checkpoint of the shard's byte range,
+        and resume=True continues from it. With check_duplicates the keys of
+        the range are tracked (a resumed shard first re-reads the part it had
+        loaded) and the repeated values go to <file>.duplicate_keys.shard<n>.csv.
+        With snapshot_dir set, the shard's rows go to an unpublished Parquet
+        part whose path is returned as summary['snapshot_part'].
+        Returns (summary, metrics report, (pid, parser cache stats)).
+        """
+        started = time.time()
+        # A forked worker inherits the parent's caches; count only this shard's lookups.
+        conversion.reset_cache_stats()
+        self.metrics = ImportMetrics()
+        self.rejects = RejectSink(f"{file_path}.rejects.shard{shard}.csv", append=resume)
+        self.conflicts = 0
+        offset = start
+        total_rows = 0
+        successful_imports = 0
+
+        self.connect()
+        if partitioned:
+            self.partitions = self._range_partitions()
+            self.partitions.load()
+        checkpoint = ImportCheckpoint(self.cursor, self.table_name, file_path, byte_range=(start, end))
+        checkpoint.create_table()
+        if resume:
+            saved = checkpoint.load()
+            if saved:
+                # A shard that had finished has nothing left to read.
+                offset, total_rows, successful_imports, _ = saved
+        self.conn.commit()
+        duplicates = DuplicateKeys.for_importer(self) if check_duplicates else None
+        if duplicates is not None and offset > start:
+            self._replay_duplicates(duplicates, file_path, offset, engine, batch_size, start_offset=start)
+        snapshot = None
+        if snapshot_dir:
+            snapshot = ParquetSnapshot(snapshot_dir, self.table_name, self.columns, file_path,
+                                       shard=shard, load_date=load_date)
+        with open(file_path, 'rb') as raw_file, \
+                tqdm(total=end - start, initial=offset - start, desc=f"Shard {shard}", unit="B", unit_scale=True,
+                     unit_divisor=1024, position=shard) as progress, \
+                (snapshot or contextlib.nullcontext()):
+            lines = ProgressLineReader(raw_file, progress, start_offset=offset, end_offset=end)
+            sizer = BatchSizer(batch_size, adaptive=adaptive)
+            write = self.write_frame if engine == 'columnar' else self.write_batch
+            total_rows, successful_imports, _ = self._write_batches(
+                self._batches(lines, sizer, engine), sizer, functools.partial(write, mode=mode), engine=engine,
+                prefetch=prefetch, duplicates=duplicates, checkpoint=checkpoint, snapshot=snapshot,
+                rows_read=total_rows, rows_written=successful_imports)
+        checkpoint.save(end, total_rows, successful_imports, completed=True)
+        self.conn.commit()
+
+        self.rejects.close()
+        for (column, reason), count in self.rejects.counts.items():
+            self.metrics.reject(reason, count, column)
         self.disconnect()
+        summary = {
+            'shard': shard,
+            'start': start,
+            'end': end,
+            'rows_read': total_rows,
+            'rows_inserted': successful_imports,
+            'rows_failed': total_rows - successful_imports,
+            'rows_skipped_on_conflict': self.conflicts,
+            'elapsed_seconds': time.time() - started,
+        }
+        if snapshot is not None:
+            summary['snapshot_part'] = snapshot.temporary_path
+            summary['snapshot_prefix'] = snapshot.prefix
+        if duplicates is not None:
+            duplicates.write_report(f"{file_path}.duplicate_keys.shard{shard}.csv")
+            summary['duplicates'] = {'keys': duplicates.counts(), 'memory_bytes': duplicates.nbytes()}
+        return summary, self.metrics.report(summary, {}), conversion.process_cache_stats()
+
+    def dry_run(self, file_path, batch_size=10000, workers=1, engine='rows', adaptive=False, prefetch=2,
+                sink_path=None, report_path=None, check_duplicates=True):
+        """
+        Benchmark reading and conversion without a database.
+        The file goes through the same reader, engine (rows, workers > 1 or
+        columnar), prefetch pipeline and reject accounting as import_data_bulk.
+        Each batch is encoded exactly as it would be for COPY, then written to
+        `sink_path` or discarded. connect() and create_table() are never called,
+        so any importer can be profiled on a machine without PostgreSQL, and the
+        CPU cost of an import can be told apart from its database cost.
+        With check_duplicates, repeated keys are found and counted as in
+        import_data_bulk, without writing a report.
+        Prints and returns the parse throughput (rows/s, MB/s), the reject rate
+        and the peak memory. The JSON report goes to <file>.dry_run_report.json.
+        """
+        start_time = time.time()
+        cache_stats_before = conversion.cache_stats()
+        self._worker_cache_stats = {}
+        self.metrics = ImportMetrics()
+        # Rejects are counted and sampled only; a dry run leaves no files next to the input.
+        self.rejects = RejectSink()
+        duplicates = DuplicateKeys.for_importer(self) if check_duplicates else None
+
+        file_size = os.path.getsize(file_path)
+        compression = detect_compression(file_path)
+        with open(file_path, 'rb') as raw_file, \
+                open_input(raw_file, compression) as input_file, \
+                tqdm(total=file_size, desc="Dry run", unit="B", unit_scale=True, unit_divisor=1024) as progress, \
+                TextSink(sink_path) as sink:
+            lines = ProgressLineReader(input_file, progress, progress_file=raw_file if compression else None)
+            sizer = BatchSizer(batch_size, adaptive=adaptive)
+
+            def encode(converted):
+                if engine == 'columnar':
+                    columnar.frame_to_csv(converted, sink)
+                else:
+                    shutil.copyfileobj(CopyStream(converted), sink, _COPY_READ_SIZE)
+                return 0
+            total_rows, converted_rows, _ = self._write_batches(
+                self._batches(lines, sizer, engine, workers), sizer, encode, engine=engine, prefetch=prefetch,
+                duplicates=duplicates)
+
+        self.rejects.close()
+        for (column, reason), count in self.rejects.counts.items():
+            self.metrics.reject(reason, count, column)
+        elapsed_time = time.time() - start_time
+        rejected_rows = total_rows - converted_rows
+        peak_memory = peak_rss_mb()
+        workers_peak_memory = peak_rss_mb(children=True) if workers > 1 and engine != 'columnar' else None
+
+        print(f"\nDry run completed ({f'output written to {sink_path}' if sink_path else 'output discarded'}):")
+        print(f"  Total rows read: {total_rows}")
+        print(f"  Converted: {converted_rows} rows")
+        print(f"  Rejected: {rejected_rows} rows ({rejected_rows / total_rows if total_rows else 0:.2%})")
+        print(f"  Elapsed time: {elapsed_time:.2f} seconds "
+              f"({total_rows / elapsed_time:,.0f} rows/s, {file_size / 1024 ** 2 / elapsed_time:.1f} MB/s)")
+        if peak_memory is not None:
+            print(f"  Peak memory: {peak_memory:.0f} MB"
+                  f"{f', largest conversion worker {workers_peak_memory:.0f} MB' if workers_peak_memory else ''}")
+        self.metrics.print_summary()
+        if adaptive:
+            print(f"  Batch size: {sizer.size} rows ({'settled' if sizer.settled else 'still adapting'})")
+        duplicate_summary = duplicates.summary() if duplicates is not None else None
+        parser_cache = self._parser_cache_stats(cache_stats_before)
+        for line in conversion.format_cache_stats(parser_cache):
+            print(f"  Parser cache {line}")
+
+        summary = {
+            'table': self.table_name,
+            'file': file_path,
+            'bytes': file_size,
+            'rows_read': total_rows,
+            'rows_converted': converted_rows,
+            'rows_failed': rejected_rows,
+            'reject_rate': rejected_rows / total_rows if total_rows else 0.0,
+            'elapsed_seconds': elapsed_time,
+            'rows_per_second': total_rows / elapsed_time if elapsed_time else None,
+            'mb_per_second': file_size / 1024 ** 2 / elapsed_time if elapsed_time else None,
+            'peak_rss_mb': peak_memory,
+            'workers_peak_rss_mb': workers_peak_memory,
+            'output_characters': sink.characters,
+            'parser_cache': parser_cache,
+        }
+        if adaptive:
+            summary['batch_size'] = sizer.size
+        if duplicate_summary is not None:
+            summary['duplicates'] = duplicate_summary
+        report_path = report_path or f"{file_path}.dry_run_report.json"
+        settings = {'dry_run': True, 'batch_size': batch_size, 'workers': workers, 'engine': engine,
+                    'adaptive': adaptive, 'prefetch': prefetch, 'sink': sink_path,
+                    'check_duplicates': duplicates is not None}
+        try:
+            self.metrics.write_json(report_path, summary, settings)
+            summary['report'] = report_path
+            print(f"  Report written to {report_path}")
+        except OSError as e:
+            logging.error(f"Could not write dry run report {report_path}: {e}")
+        return summary
+
+    def _replay_duplicates(self, duplicates, file_path, end_offset, engine, batch_size, start_offset=0):
+        """
+        Bring a DuplicateKeys tracker up to date for a resumed import: the part
+        of the file committed before the interruption is read and converted
+        again, without writing or rejecting anything, so the keys loaded then,
+        and the repeats among them, are known before the import continues.
+        A shard re-reads its own byte range from `start_offset`.
+        """
+        started = time.perf_counter()
+        metrics, rejects = self.metrics, self.rejects
+        self.metrics, self.rejects = ImportMetrics(), RejectSink(log_samples=0)
+        compression = detect_compression(file_path)
+        try:
+            with open(file_path, 'rb') as raw_file, \
+                    open_input(raw_file, compression) as input_file, \
+                    tqdm(total=end_offset - start_offset, desc="Re-reading loaded keys", unit="B",
+                         unit_scale=True, unit_divisor=1024) as progress:
+                lines = ProgressLineReader(input_file, progress, start_offset=start_offset, end_offset=end_offset)
+                sizer = BatchSizer(batch_size)
+                if engine == 'columnar':
+                    for _, frame, _ in self._convert_columnar(lines, sizer):
+                        duplicates.filter_frame(frame)
+                else:
+                    for _, rows, _ in self._convert_serial(lines, sizer):
+                        duplicates.filter_rows(rows)
+        finally:
+            self.metrics, self.rejects = metrics, rejects
+        self.metrics.add('duplicates', time.perf_counter() - started)
+
+    def _route_duplicates(self, duplicates, converted, engine):
+        """Send the rows of a batch that repeat a primary or unique key to the rejects; returns the rest."""
+        started = time.perf_counter()
+        if engine == 'columnar':
+            converted, routed = duplicates.filter_frame(converted)
+        else:
+            converted, routed = duplicates.filter_rows(converted)
+        for row, key in routed:
+            self.rejects.add(row, 'duplicate_key', key)
+        self.metrics.add('duplicates', time.perf_counter() - started)
+        return converted
+
+    def _parser_cache_stats(self, before):
+        """Parser cache hits/misses of this import: this process's delta plus every conversion worker."""
+        local = {}
+        for name, (hits, misses) in conversion.cache_stats().items():
+            hits_before, misses_before = before.get(name, (0, 0))
+            local[name] = (hits - hits_before, misses - misses_before)
+        return conversion.merge_cache_stats({os.getpid(): local, **self._worker_cache_stats})
+
+    def _summary(self, file_path, total_rows, successful_imports, elapsed_time, skipped=False, unchanged=0):
+        """
+        Result of one import_data_bulk run, for callers that aggregate several imports.
+        `unchanged` rows (delta imports) were neither written nor failed.
+        """
+        return {
+            'table': self.table_name,
+            'file': file_path,
+            'bytes': os.path.getsize(file_path),
+            'rows_read': total_rows,
+            'rows_inserted': successful_imports,
+            'rows_unchanged': unchanged,
+            'rows_failed': total_rows - successful_imports - unchanged,
+            'rows_skipped_on_conflict': self.conflicts,
+            'elapsed_seconds': elapsed_time,
+            'skipped': skipped,
+        }
@@ -0,0 +1,125 @@
+import logging
+import os
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def current_rss_mb():
+    """Resident memory of this process in MB, or None when it cannot be measured."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if resource is not None:
+        # Peak rather than current RSS (KB on Linux, bytes on macOS; close enough as a ceiling check).
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return None
+
+
+def peak_rss_mb(children=False):
+    """
+    Peak resident memory in MB of this process, or with children=True of the
+    largest child process that has exited (e.g. conversion workers), or None.
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is in KB on Linux and in bytes on macOS.
+    return usage.ru_maxrss / (1024 ** 2 if sys.platform == 'darwin' else 1024)
+
+
+class BatchSizer:
+    """
+    Number of records per batch for import_data_bulk.
+
+    Fixed unless adaptive=True. An adaptive sizer measures the throughput
+    (rows/sec of batch wall time) of every `samples` full batches and climbs
+    towards the size that maximises it: it keeps moving in the same direction
+    while throughput improves by more than 5%, and otherwise returns to the best
+    size seen and reverses with a smaller step, settling once the step is under
+    10%. A batch that takes longer than `max_latency` seconds to read, write and
+    commit, or a process larger than `memory_limit_mb`, shrinks the size and
+    caps it there. The size always stays within [min_size, max_size].
+    """
+
+    def __init__(self, size, adaptive=False, min_size=1000, max_size=200000,
+                 max_latency=5.0, memory_limit_mb=2048, samples=2):
+        self.adaptive = adaptive
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_latency = max_latency
+        self.memory_limit_mb = memory_limit_mb
+        self.samples = samples
+        self.size = self._clamp(size) if adaptive else size
+        self.settled = not adaptive
+        self.step = 2.0
+        self.direction = 1
+        self.best_size = None
+        self.best_rate = 0.0
+        self._rows = 0
+        self._seconds = 0.0
+        self._batches = 0
+        # The first full batch pays for warm-up (worker start-up, first COPY); not measured.
+        self._warmed_up = False
+
+    def _clamp(self, size):
+        return int(max(self.min_size, min(self.max_size, size)))
+
+    def record(self, rows, seconds):
+        """Feed back one written batch: its record count and wall time."""
+        if not self.adaptive or rows != self.size or seconds <= 0:
+            return  # fixed size, the short last batch, or a block read before the size changed
+        if not self._warmed_up:
+            self._warmed_up = True
+            return
+        self._rows += rows
+        self._seconds += seconds
+        self._batches += 1
+        if self._batches < self.samples:
+            return
+        rate = self._rows / self._seconds
+        latency = self._seconds / self._batches
+        self._rows, self._seconds, self._batches = 0, 0.0, 0
+
+        rss = current_rss_mb()
+        if latency > self.max_latency or (rss is not None and rss > self.memory_limit_mb):
+            # Too slow to commit or too much memory: never go this large again.
+            self.max_size = max(self.min_size, self.size // 2)
+            logging.info(f"Batch of {self.size} rows took {latency:.2f}s (RSS {rss or 0:.0f} MB); "
+                         f"capping batch size at {self.max_size}")
+            self.best_size = None
+            self.best_rate = 0.0
+            self.step = 2.0
+            self.direction = -1
+            self.settled = False
+            self.size = self.max_size
+            return
+        if self.settled:
+            return
+
+        if self.best_size is None or rate > self.best_rate * 1.05:
+            self.best_size, self.best_rate = self.size, rate
+        else:
+            self.step **= 0.5
+            self.direction = -self.direction
+            if self.step < 1.1:
+                self._settle()
+                return
+
+        next_size = self._clamp(self.best_size * self.step ** self.direction)
+        if next_size == self.size:
+            # Pinned at a limit: nothing left to try on this side.
+            self._settle()
+            return
+        logging.info(f"Batch size {self.size}: {rate:,.0f} rows/s; trying {next_size}")
+        self.size = next_size
+
+    def _settle(self):
+        self.size = self.best_size
+        self.settled = True
+        print(f"Batch size settled at {self.size} rows ({self.best_rate:,.0f} rows/s).")
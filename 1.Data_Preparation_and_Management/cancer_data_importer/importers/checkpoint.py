@@ -0,0 +1,99 @@
+import os
+
+CHECKPOINT_TABLE = 'import_checkpoint'
+
+
+class ImportCheckpoint:
+    """
+    Progress of one CSV file being imported into one table, kept in the
+    import_checkpoint side table.
+
+    A checkpoint row is written in the same transaction as each batch, so the
+    byte offset it records always matches the rows committed to the target table.
+    The file is identified by absolute path, size and modification time; a file
+    that changed since the checkpoint was written is imported from the start.
+    Each shard of a sharded import commits on its own, so it keeps a checkpoint
+    of its own, for its `byte_range` of the file, under <path>#<start>-<end>.
+    """
+
+    def __init__(self, cursor, table_name, file_path, byte_range=None):
+        self.cursor = cursor
+        self.table_name = table_name
+        self.file_path = os.path.abspath(file_path)
+        if byte_range is not None:
+            start, end = byte_range
+            self.file_path += f"#{start}-{end}"
+        stat = os.stat(file_path)
+        self.file_size = stat.st_size
+        self.file_mtime = stat.st_mtime
+
+    def create_table(self):
+        # Concurrent CREATE TABLE IF NOT EXISTS can still collide in the catalog,
+        # so imports running side by side serialise on an advisory lock here.
+        self.cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (CHECKPOINT_TABLE,))
+        self.cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+                TABLE_NAME TEXT NOT NULL,
+                FILE_PATH TEXT NOT NULL,
+                FILE_SIZE BIGINT NOT NULL,
+                FILE_MTIME DOUBLE PRECISION NOT NULL,
+                BYTE_OFFSET BIGINT NOT NULL,
+                ROWS_READ BIGINT NOT NULL,
+                ROWS_COMMITTED BIGINT NOT NULL,
+                COMPLETED BOOLEAN NOT NULL DEFAULT FALSE,
+                UPDATED_AT TIMESTAMP NOT NULL DEFAULT now(),
+                PRIMARY KEY (TABLE_NAME, FILE_PATH)
+            )
+        ''')
+
+    def load(self):
+        """
+        Return (byte_offset, rows_read, rows_committed, completed) for this file,
+        or None when there is no checkpoint for this exact file.
+        """
+        self.cursor.execute(f'''
+            SELECT BYTE_OFFSET, ROWS_READ, ROWS_COMMITTED, COMPLETED, FILE_SIZE, FILE_MTIME
+            FROM {CHECKPOINT_TABLE}
+            WHERE TABLE_NAME = %s AND FILE_PATH = %s
+        ''', (self.table_name, self.file_path))
+        found = self.cursor.fetchone()
+        if found is None:
+            return None
+        byte_offset, rows_read, rows_committed, completed, file_size, file_mtime = found
+        if file_size != self.file_size or file_mtime != self.file_mtime:
+            print(f"{self.file_path} changed since its checkpoint was written; starting from the beginning.")
+            return None
+        return byte_offset, rows_read, rows_committed, completed
+
+    def range_keys(self):
+        """The keys (<path>#<start>-<end>) of the byte-range checkpoints of this file."""
+        self.cursor.execute(f'''
+            SELECT FILE_PATH FROM {CHECKPOINT_TABLE}
+            WHERE TABLE_NAME = %s AND starts_with(FILE_PATH, %s)
+        ''', (self.table_name, f"{self.file_path}#"))
+        return {file_path for file_path, in self.cursor.fetchall()}
+
+    def clear(self):
+        """Delete this file's checkpoints, byte-range ones included, before it is imported afresh. Does not commit."""
+        self.cursor.execute(f'''
+            DELETE FROM {CHECKPOINT_TABLE}
+            WHERE TABLE_NAME = %s AND (FILE_PATH = %s OR starts_with(FILE_PATH, %s))
+        ''', (self.table_name, self.file_path, f"{self.file_path}#"))
+
+    def save(self, byte_offset, rows_read, rows_committed, completed=False):
+        """Record progress. Does not commit: the caller commits it with the batch."""
+        self.cursor.execute(f'''
+            INSERT INTO {CHECKPOINT_TABLE} (
+                TABLE_NAME, FILE_PATH, FILE_SIZE, FILE_MTIME,
+                BYTE_OFFSET, ROWS_READ, ROWS_COMMITTED, COMPLETED, UPDATED_AT
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, now())
+            ON CONFLICT (TABLE_NAME, FILE_PATH) DO UPDATE SET
+                FILE_SIZE = EXCLUDED.FILE_SIZE,
+                FILE_MTIME = EXCLUDED.FILE_MTIME,
+                BYTE_OFFSET = EXCLUDED.BYTE_OFFSET,
+                ROWS_READ = EXCLUDED.ROWS_READ,
+                ROWS_COMMITTED = EXCLUDED.ROWS_COMMITTED,
+                COMPLETED = EXCLUDED.COMPLETED,
+                UPDATED_AT = now()
+        ''', (self.table_name, self.file_path, self.file_size, self.file_mtime,
+              byte_offset, rows_read, rows_committed, completed))
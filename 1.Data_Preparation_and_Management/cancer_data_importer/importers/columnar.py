@@ -0,0 +1,174 @@
+"""
+Vectorized (column-at-a-time) conversion for the columnar import engine.
+
+pandas parses the CSV in chunks of `batch_size` rows with every column read as
+text, and each typed column is converted in one call. The NULL-on-bad-value
+rules are the same as the row converters in schema.py. pandas is only needed
+when engine='columnar' is used, so it is imported lazily.
+"""
+import csv
+import io
+
+from .conversion import to_decimal, to_int
+from .schema import DATE_FORMAT, TIME_FORMAT, column_kind
+
+# NULL marker for COPY ... WITH (FORMAT csv); quoted fields, empty or '\\N', stay text.
+CSV_NULL = '\\N'
+# Plain integer text, which int64 always holds; other integer text goes through to_int.
+PLAIN_INT_TEXT = r'[+-]?[0-9]{1,18}'
+
+
+def _pandas():
+    try:
+        import pandas as pd
+    except ImportError as e:
+        raise ImportError("engine='columnar' requires pandas (pip install pandas)") from e
+    return pd
+
+
+def _matches(values, pattern):
+    """Boolean mask of the text values matching `pattern` in full; NULLs are False."""
+    return values.astype(object).str.fullmatch(pattern).fillna(False).astype(bool)
+
+
+def _to_int64(value):
+    # An integer outside int64 is outside every integer column's range as well.
+    value = to_int(value)
+    return value if value is not None and -2 ** 63 <= value < 2 ** 63 else None
+
+
+def _decimal_text(value):
+    value = to_decimal(value)
+    return None if value is None else str(value)
+
+
+def _parse_rest(values, converted, parser):
+    """
+    Fill in the values the vectorized conversion left NULL but that are not
+    empty ('1_000', ' 7', '1.0', 'NaN'...) by parsing them one at a time as the
+    rows engine does, so both engines accept the same text.
+    """
+    rest = converted.isna() & values.notna() & (values != '')
+    if rest.any():
+        pd = _pandas()
+        dtype = converted.dtype
+        converted = converted.astype(object)
+        # Built as object: map() would infer float64 and round integers above 2**53.
+        converted[rest] = pd.Series([parser(value) for value in values[rest]], index=values.index[rest], dtype=object)
+        converted = converted.astype(dtype)
+    return converted
+
+
+def read_chunks(lines, columns, batch_size):
+    """
+    Yield (chunk, end_offset) pairs: DataFrames of raw string values for the
+    columns the importer knows, and the byte offset just past the chunk's last
+    record (`lines` is a ProgressLineReader). `batch_size` is an int or a
+    batching.BatchSizer, whose current size is read for every chunk.
+    Chunks are cut on record boundaries by tracking open quotes, so a quoted
+    field spanning several lines is never split, and pandas only parses text.
+    """
+    pd = _pandas()
+    wanted = {column.name for column in columns}
+    iterator = iter(lines)
+    header_line = next(iterator, None)
+    if header_line is None:
+        return
+    names = next(csv.reader([header_line]))
+
+    while True:
+        limit = getattr(batch_size, 'size', batch_size)
+        block = []
+        records = 0
+        in_quotes = False
+        for line in iterator:
+            block.append(line)
+            if line.count('"') % 2:
+                in_quotes = not in_quotes
+            if not in_quotes:
+                records += 1
+                if records >= limit:
+                    break
+        if not block:
+            return
+        chunk = pd.read_csv(
+            io.StringIO(''.join(block)),
+            header=None,
+            names=names,
+            dtype=str,
+            keep_default_na=False,
+            na_filter=False,
+            usecols=lambda name: name in wanted,
+        )
+        yield chunk, lines.offset
+
+
+def convert_chunk(chunk, columns):
+    """
+    Convert a chunk of raw strings column-wise.
+    Returns a DataFrame in table column order, with missing/invalid values as NA
+    and rows lacking a NOT NULL / primary key value dropped.
+    Dates and times come back as ISO strings and numerics keep their original
+    text, so no precision is lost on the way into NUMERIC columns.
+    """
+    pd = _pandas()
+    converted = {}
+    required = []
+    for column in columns:
+        if column.name in chunk:
+            values = chunk[column.name]
+        else:
+            values = pd.Series(None, index=chunk.index, dtype=object)
+
+        kind = column_kind(column)
+        if kind == 'int':
+            numbers = values.where(_matches(values, PLAIN_INT_TEXT))
+            numbers = pd.to_numeric(numbers, errors='coerce', dtype_backend='numpy_nullable').astype('Int64')
+            values = _parse_rest(values, numbers, _to_int64)
+        elif kind == 'numeric':
+            # Numbers keep their text; 'NaN', 'Infinity' and other text Decimal reads go through to_decimal.
+            numbers = pd.to_numeric(values, errors='coerce')
+            values = _parse_rest(values, values.where(numbers.notna()), _decimal_text)
+        elif kind == 'date':
+            parsed = pd.to_datetime(values, format=column.parse_format or DATE_FORMAT, errors='coerce')
+            values = parsed.dt.strftime('%Y-%m-%d')
+        elif kind == 'time':
+            parsed = pd.to_datetime(values, format=column.parse_format or TIME_FORMAT, errors='coerce')
+            values = parsed.dt.strftime('%H:%M:%S')
+
+        if not column.nullable or column.primary_key:
+            required.append(column.name)
+            if kind == 'text':
+                values = values.where(values != '')
+        converted[column.name] = values
+
+    frame = pd.DataFrame(converted, index=chunk.index)
+    if required:
+        frame = frame.dropna(subset=required)
+    return frame
+
+
+def frame_to_csv(frame, buffer):
+    """
+    Write a converted frame to `buffer` in the CSV dialect COPY expects.
+    Every non-NULL value of a text column (text, numerics, dates) is quoted,
+    because COPY only reads an unquoted CSV_NULL as NULL: a CHAR value that is
+    literally '\\N' then loads as text, as it does in the rows engine.
+    """
+    if frame.empty:
+        return
+    fields = []
+    for name in frame.columns:
+        values = frame[name]
+        if values.dtype.kind in 'iu':
+            text = values.astype(str)
+        else:
+            values = values.astype(object)
+            text = '"' + values.str.replace('"', '""', regex=False) + '"'
+        fields.append(text.where(values.notna(), CSV_NULL))
+    buffer.write('\n'.join(fields[0].str.cat(fields[1:], sep=',')) + '\n')
+
+
+def frame_to_tuples(frame):
+    """Rows of a converted frame as tuples with None for NULL (for bulk_insert fallback)."""
+    return list(frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None))
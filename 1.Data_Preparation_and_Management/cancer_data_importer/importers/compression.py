@@ -0,0 +1,66 @@
+"""
+Transparent decompression of compressed CSV extracts (.csv.gz, .csv.bz2, .csv.zst).
+
+The compression is detected from the file extension, or from the magic bytes
+at the start of the file when the extension says nothing. Files are
+decompressed as a stream while they are parsed, never to disk. gzip and bz2
+use the standard library; zstd needs the optional zstandard package, which is
+imported only when a .zst file is opened.
+"""
+import bz2
+import gzip
+import io
+import os
+
+EXTENSIONS = {
+    '.gz': 'gzip',
+    '.gzip': 'gzip',
+    '.bz2': 'bz2',
+    '.zst': 'zstd',
+    '.zstd': 'zstd',
+}
+
+MAGIC_BYTES = {
+    b'\x1f\x8b': 'gzip',
+    b'BZh': 'bz2',
+    b'\x28\xb5\x2f\xfd': 'zstd',
+}
+
+
+def detect_compression(file_path):
+    """Return 'gzip', 'bz2', 'zstd' or None (plain text) for `file_path`."""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in EXTENSIONS:
+        return EXTENSIONS[extension]
+    with open(file_path, 'rb') as raw_file:
+        head = raw_file.read(4)
+    for magic, compression in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("Reading .zst files requires zstandard (pip install zstandard)") from e
+    return zstandard
+
+
+def open_input(raw_file, compression):
+    """
+    Wrap a file opened in binary mode in a decompressing binary stream.
+    `raw_file` keeps its position in compressed bytes, which is what progress
+    is reported against. Returns `raw_file` itself for uncompressed input.
+    """
+    if compression is None:
+        return raw_file
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=raw_file, mode='rb')
+    if compression == 'bz2':
+        return bz2.BZ2File(raw_file, mode='rb')
+    if compression == 'zstd':
+        reader = _zstandard().ZstdDecompressor().stream_reader(raw_file, read_across_frames=True)
+        return io.BufferedReader(reader, buffer_size=1 << 20)
+    raise ValueError(f"Unsupported compression '{compression}'")
@@ -0,0 +1,154 @@
+"""
+Value parsers shared by every importer.
+
+A 10-year extract has only a few thousand distinct dates, and dose / height /
+weight values repeat heavily, so date, time and decimal parsing goes through
+bounded LRU caches. All three parse to immutable values, so cached results can
+be shared between rows. ISO dates and HH:MM times also take a fast path that
+avoids strptime. Each parser returns None for empty or invalid input.
+"""
+import os
+from datetime import date, datetime, time
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+DATE_FORMAT = '%Y-%m-%d'
+TIME_FORMAT = '%H:%M'
+
+# Entries per parser cache; distinct values beyond this are evicted least-recently-used.
+CACHE_SIZE = 16384
+
+# name -> lru_cache-wrapped parser, for cache_stats()
+_cached_parsers = {}
+
+
+def _cached(name, func):
+    parser = lru_cache(maxsize=CACHE_SIZE)(func)
+    _cached_parsers[name] = parser
+    return parser
+
+
+def to_int(value):
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def _parse_decimal(value):
+    if not value:
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        return None
+
+
+def _parse_iso_date(value):
+    if not value:
+        return None
+    # Fast path for the canonical YYYY-MM-DD shape; strptime also accepts
+    # unpadded months/days, so anything else goes through it.
+    if len(value) == 10 and value[4] == '-' and value[7] == '-':
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            return None
+    try:
+        return datetime.strptime(value, DATE_FORMAT).date()
+    except ValueError:
+        return None
+
+
+def _parse_hh_mm(value):
+    if not value:
+        return None
+    if len(value) == 5 and value[2] == ':' and value[:2].isdigit() and value[3:].isdigit():
+        try:
+            return time(int(value[:2]), int(value[3:]))
+        except ValueError:
+            return None
+    try:
+        return datetime.strptime(value, TIME_FORMAT).time()
+    except ValueError:
+        return None
+
+
+to_decimal = _cached('decimal', _parse_decimal)
+to_iso_date = _cached('date', _parse_iso_date)
+to_hh_mm = _cached('time', _parse_hh_mm)
+
+
+def date_parser(fmt=DATE_FORMAT):
+    """Cached date parser for `fmt` (the shared ISO parser for the default format)."""
+    if fmt == DATE_FORMAT:
+        return to_iso_date
+    name = f'date {fmt}'
+    if name not in _cached_parsers:
+        def parse(value):
+            if not value:
+                return None
+            try:
+                return datetime.strptime(value, fmt).date()
+            except ValueError:
+                return None
+        _cached(name, parse)
+    return _cached_parsers[name]
+
+
+def time_parser(fmt=TIME_FORMAT):
+    """Cached time parser for `fmt` (the shared HH:MM parser for the default format)."""
+    if fmt == TIME_FORMAT:
+        return to_hh_mm
+    name = f'time {fmt}'
+    if name not in _cached_parsers:
+        def parse(value):
+            if not value:
+                return None
+            try:
+                return datetime.strptime(value, fmt).time()
+            except ValueError:
+                return None
+        _cached(name, parse)
+    return _cached_parsers[name]
+
+
+def cache_stats():
+    """{parser name: (hits, misses)} for this process since the last reset."""
+    stats = {}
+    for name, parser in _cached_parsers.items():
+        info = parser.cache_info()
+        stats[name] = (info.hits, info.misses)
+    return stats
+
+
+def reset_cache_stats():
+    for parser in _cached_parsers.values():
+        parser.cache_clear()
+
+
+def process_cache_stats():
+    """(pid, cache_stats()) so a parent can combine the stats of worker processes."""
+    return os.getpid(), cache_stats()
+
+
+def merge_cache_stats(per_process):
+    """Sum {pid: cache_stats()} snapshots into one cache_stats()-shaped dict."""
+    totals = {}
+    for stats in per_process.values():
+        for name, (hits, misses) in stats.items():
+            total_hits, total_misses = totals.get(name, (0, 0))
+            totals[name] = (total_hits + hits, total_misses + misses)
+    return totals
+
+
+def format_cache_stats(stats):
+    """One summary line per parser that was used."""
+    lines = []
+    for name, (hits, misses) in sorted(stats.items()):
+        lookups = hits + misses
+        if lookups:
+            lines.append(f"{name}: {hits}/{lookups} cache hits ({hits / lookups:.1%}), {misses} parsed")
+    return lines
@@ -0,0 +1,118 @@
+import csv
+
+from .schema import key_columns, table_ddl
+
+
+class DeferredLoad:
+    """
+    strategy='deferred' for one import: the batches are written to an
+    unindexed <table>_staging table (UNLOGGED with unlogged=True), and the
+    target table gets its keys, secondary indexes and statistics once, after
+    the last batch, instead of updating them row by row.
+
+    `prepare` points the importer's write paths at the staging table and
+    `finish` moves the staged rows into the target table. The staging table
+    is a regular table, so an interrupted load can be resumed into it.
+    """
+
+    def __init__(self, importer, unlogged=False):
+        self.importer = importer
+        self.unlogged = unlogged
+        self.staging = f"{importer.table_name}_staging"
+
+    def prepare(self, resume):
+        """
+        Create the staging table, with the target's columns and NOT NULLs but
+        no keys. Returns True when an existing staging table is kept for a
+        resumed import.
+        """
+        importer = self.importer
+        importer.load_table = self.staging
+        if resume and importer._table_exists(self.staging):
+            return True
+        importer.cursor.execute(f"DROP TABLE IF EXISTS {self.staging}")
+        importer.cursor.execute(table_ddl(self.staging, importer.columns, constraints=False, unlogged=self.unlogged))
+        importer.conn.commit()
+        return False
+
+    def report_duplicate_keys(self, file_path):
+        """
+        Find every key value that occurs more than once in the staging table and
+        write the set to <file>.duplicate_keys.csv. Returns the number of extra
+        rows (occurrences beyond the first) across all key columns.
+        """
+        cursor = self.importer.cursor
+        duplicates = []
+        for column, _ in key_columns(self.importer.columns):
+            cursor.execute(f'''
+                SELECT {column.name}, COUNT(*) FROM {self.staging}
+                GROUP BY {column.name} HAVING COUNT(*) > 1
+            ''')
+            duplicates.extend((column.name, value, count) for value, count in cursor.fetchall())
+
+        if not duplicates:
+            return 0
+        duplicates_path = f"{file_path}.duplicate_keys.csv"
+        with open(duplicates_path, 'w', encoding='utf-8', newline='') as duplicates_file:
+            writer = csv.writer(duplicates_file)
+            writer.writerow(['KEY_COLUMN', 'KEY_VALUE', 'OCCURRENCES'])
+            writer.writerows(duplicates)
+        extra_rows = sum(count - 1 for _, _, count in duplicates)
+        print(f"  {len(duplicates)} duplicated key values ({extra_rows} extra rows) written to {duplicates_path}")
+        return extra_rows
+
+    def finish(self, file_path, report_duplicates=True):
+        """
+        Move the completed staging load into the target table and build its keys,
+        indexes and statistics once. The first occurrence of a duplicated key is
+        kept, as ON CONFLICT DO NOTHING would have done row by row.
+        report_duplicates=False skips the GROUP BY report, when the duplicates
+        were already found while the file was read.
+        Returns the number of staged rows that were not kept.
+        """
+        importer = self.importer
+        cursor = importer.cursor
+        table_name = importer.table_name
+        column_names = ', '.join(importer.column_names)
+        if report_duplicates:
+            self.report_duplicate_keys(file_path)
+        if importer.partitions is not None:
+            # The partitioned table was created up front; add the ranges the staged rows need.
+            importer.partitions.create_for_table(self.staging)
+        cursor.execute(f"SELECT COUNT(*) FROM {self.staging}")
+        staged_rows = cursor.fetchone()[0]
+
+        if importer._table_exists(table_name):
+            # Existing table: one set-based insert instead of per-batch index updates.
+            cursor.execute(f'''
+                INSERT INTO {table_name} ({column_names})
+                SELECT {column_names} FROM {self.staging}
+                ON CONFLICT DO NOTHING
+            ''')
+            kept_rows = cursor.rowcount
+            cursor.execute(f"DROP TABLE {self.staging}")
+        else:
+            for column, _ in key_columns(importer.columns):
+                cursor.execute(f'''
+                    DELETE FROM {self.staging} WHERE ctid IN (
+                        SELECT ctid FROM (
+                            SELECT ctid, ROW_NUMBER() OVER (PARTITION BY {column.name} ORDER BY ctid) AS occurrence
+                            FROM {self.staging}
+                        ) ranked WHERE occurrence > 1
+                    )
+                ''')
+            cursor.execute(f"ALTER TABLE {self.staging} RENAME TO {table_name}")
+            for column, constraint in key_columns(importer.columns):
+                cursor.execute(f"ALTER TABLE {table_name} ADD {constraint} ({column.name})")
+            if self.unlogged:
+                cursor.execute(f"ALTER TABLE {table_name} SET LOGGED")
+            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+            kept_rows = cursor.fetchone()[0]
+        importer.conn.commit()
+
+        importer.load_table = table_name
+        importer.create_indexes()
+        cursor.execute(f"ANALYZE {table_name}")
+        importer.conn.commit()
+        print(f"Table {table_name} built from staging: {kept_rows} of {staged_rows} staged rows kept.")
+        return staged_rows - kept_rows
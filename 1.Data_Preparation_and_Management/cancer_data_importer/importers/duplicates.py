@@ -0,0 +1,271 @@
+"""
+In-flight duplicate-key detection for import_data_bulk and dry_run.
+
+The duplicate checks in dataCleaning_Validation (Duplicate_check_av_patient.sql,
+Duplicate_check_av_tumour.sql) GROUP BY the whole table after it is loaded.
+DuplicateKeys instead remembers each key value as the batches stream past and
+flags every row whose key was already seen earlier in the file:
+
+- a repeated PRIMARY KEY or UNIQUE value (PATIENTID, TUMOURID, GENEID, ...) is
+  routed to the rejects file with reason duplicate_key, before it reaches the
+  database; the first occurrence is kept, as ON CONFLICT DO NOTHING would;
+- a repeated natural_key (MERGED_REGIMEN_ID, ...), which the table does not
+  enforce, is only reported, and the row is loaded.
+
+Every repeated value is written to <file>.duplicate_keys.csv with its number
+of occurrences, in the same format as the deferred strategy's report.
+
+Key values are kept compactly by KeySet: integer keys, and text keys that are
+plain decimal numbers such as GENEID, set one bit in a bitmap over the range
+of values seen (about 200 KB for 1.7 million consecutive patient ids). Values
+outside that range, other text and composite keys go to an exact set, so a
+reported duplicate is always a real one.
+"""
+import csv
+import sys
+
+from .columnar import frame_to_tuples
+from .schema import column_kind, key_columns
+
+# Largest bitmap per key; one bit per possible value, so 32 MB spans 2^28 values.
+MAX_BITMAP_BYTES = 32 << 20
+
+
+class KeySet:
+    """
+    Exact set of key values. Integers go into a bitmap covering at most
+    MAX_BITMAP_BYTES * 8 consecutive values. The bitmap grows upwards, and
+    downwards when a smaller integer arrives, so keys in any order stay in it
+    as long as their range fits. Integers outside that range, and all other
+    values, go into a plain set.
+    """
+
+    def __init__(self, max_bitmap_bytes=MAX_BITMAP_BYTES):
+        self.max_bits = max_bitmap_bytes * 8
+        self.base = None
+        # One past the largest integer in the bitmap.
+        self.top = None
+        self.bits = bytearray()
+        self.others = set()
+
+    def _bit(self, value):
+        """(byte index, mask) of an integer inside the bitmap window, or None."""
+        if self.base is None:
+            self.base = self.top = value - value % 8
+        offset = value - self.base
+        if 0 <= offset < self.max_bits:
+            return offset >> 3, 1 << (offset & 7)
+        return None
+
+    def _grow_down(self, value):
+        """
+        Move the start of the bitmap down to cover `value`, if the bitmap can
+        then still hold every integer it holds now. Returns True if it moved.
+        """
+        max_bytes = self.max_bits // 8
+        needed = (self.base - (value - value % 8)) >> 3
+        room = max_bytes - ((self.top - self.base + 7) >> 3)
+        if needed > room:
+            return False
+        # Grow by doubling here too, so a file in descending key order moves the start a few dozen times.
+        grow = min(max(needed, len(self.bits), 4096), room)
+        self.bits[0:0] = bytes(grow)
+        # Only unused bytes above `top` are cut off. The set holds no integer the
+        # new window covers: any integer below the old start did not fit then either.
+        del self.bits[max_bytes:]
+        self.base -= grow * 8
+        return True
+
+    def __contains__(self, value):
+        if type(value) is int:
+            bit = self._bit(value)
+            if bit is not None:
+                index, mask = bit
+                return index < len(self.bits) and bool(self.bits[index] & mask)
+        return value in self.others
+
+    def add(self, value):
+        if type(value) is int:
+            bit = self._bit(value)
+            if bit is None and value < self.base and self._grow_down(value):
+                bit = self._bit(value)
+            if bit is not None:
+                index, mask = bit
+                if index >= len(self.bits):
+                    # Grow by doubling, so a file in key order extends the bitmap a few dozen times.
+                    size = min(max(index + 1, 2 * len(self.bits), 4096), self.max_bits // 8)
+                    self.bits.extend(bytes(size - len(self.bits)))
+                self.bits[index] |= mask
+                if value >= self.top:
+                    self.top = value + 1
+                return
+        self.others.add(value)
+
+    def nbytes(self):
+        """Approximate memory held: the bitmap, the set table and the values in it."""
+        return len(self.bits) + sys.getsizeof(self.others) + sum(sys.getsizeof(value) for value in self.others)
+
+
+def _key_reader(columns, positions):
+    """Function returning a row's key value (a tuple for composite keys), or None when part of it is missing."""
+    readers = []
+    for column, position in zip(columns, positions):
+        kind = column_kind(column)
+        padded = column.sql_type.upper().startswith('CHAR')
+        readers.append((position, kind, padded))
+
+    def read(row):
+        values = []
+        for position, kind, padded in readers:
+            value = row[position]
+            if value is None or value == '':
+                return None
+            if kind == 'text':
+                # CHAR(n) compares blank-padded, so 'A' and 'A ' are the same key.
+                if padded:
+                    value = value.rstrip()
+                # Plain decimal text (no sign, no leading zero) maps one-to-one onto an int.
+                if value.isascii() and value.isdigit() and (value[0] != '0' or value == '0'):
+                    value = int(value)
+            values.append(value)
+        return values[0] if len(values) == 1 else tuple(values)
+    return read
+
+
+def print_summary(summary):
+    """Print a duplicate summary: {'keys': DuplicateKeys.counts(), 'memory_bytes': ...}."""
+    counts = summary['keys']
+    print(f"  Keys checked for duplicates: {'; '.join(counts)} ({summary['memory_bytes'] / 1024:.0f} KB)")
+    for key, count in counts.items():
+        if count['values']:
+            print(f"    {key}: {count['values']} repeated values, {count['extra_rows']} extra rows "
+                  f"{'rejected' if count['routed'] else 'loaded'}")
+
+
+def combine_summaries(summaries):
+    """One duplicate summary from those of the shards of a file, each of which checked its own byte range."""
+    keys = {}
+    for summary in summaries:
+        for key, count in summary['keys'].items():
+            total = keys.setdefault(key, {'values': 0, 'extra_rows': 0, 'routed': count['routed']})
+            total['values'] += count['values']
+            total['extra_rows'] += count['extra_rows']
+    return {'keys': keys, 'memory_bytes': sum(summary['memory_bytes'] for summary in summaries)}
+
+
+class DuplicateKeys:
+    """
+    The keys of one importer tracked over one file. Each key is a tuple of
+    column names, and has its KeySet and a count of repeated values.
+    """
+
+    def __init__(self, columns, natural_key=None):
+        names = [column.name for column in columns]
+        by_name = dict(zip(names, columns))
+        # (key columns, route) pairs: enforced keys are routed, a natural key is reported.
+        keys = [((column.name,), True) for column, _ in key_columns(columns)]
+        if natural_key and tuple(natural_key) not in [key for key, _ in keys]:
+            keys.append((tuple(natural_key), False))
+        self.keys = [key for key, _ in keys]
+        self.route = [route for _, route in keys]
+        self.positions = [[names.index(name) for name in key] for key in self.keys]
+        self.readers = [_key_reader([by_name[name] for name in key], positions)
+                        for key, positions in zip(self.keys, self.positions)]
+        self.seen = [KeySet() for _ in self.keys]
+        # {value: occurrences} of the values seen more than once, per key.
+        self.repeated = [{} for _ in self.keys]
+
+    @classmethod
+    def for_importer(cls, importer):
+        """A tracker for the importer's keys, or None when its table has no key."""
+        tracker = cls(importer.columns, importer.natural_key)
+        return tracker if tracker.keys else None
+
+    def check(self, row):
+        """
+        Record a row's key values. Returns the name of the first routed key the
+        row repeats, in which case none of its values are recorded (the row
+        will not be loaded), or None when the row is to be loaded.
+        """
+        values = [read(row) for read in self.readers]
+        routed_by = None
+        for index, value in enumerate(values):
+            if value is not None and value in self.seen[index]:
+                repeated = self.repeated[index]
+                repeated[value] = repeated.get(value, 1) + 1
+                if self.route[index] and routed_by is None:
+                    routed_by = ', '.join(self.keys[index])
+        if routed_by is not None:
+            return routed_by
+        for index, value in enumerate(values):
+            if value is not None:
+                self.seen[index].add(value)
+        return None
+
+    def filter_rows(self, rows):
+        """Split converted tuples into (rows to load, [(row, key name)] to route)."""
+        kept = []
+        routed = []
+        for row in rows:
+            routed_by = self.check(row)
+            if routed_by is None:
+                kept.append(row)
+            else:
+                routed.append((row, routed_by))
+        return kept, routed
+
+    def filter_frame(self, frame):
+        """filter_rows for a columnar-engine frame; returns (frame to load, [(row, key name)] to route)."""
+        # Only the key columns are taken out of the frame; rows are {position: value}.
+        positions = sorted({position for key_positions in self.positions for position in key_positions})
+        values = {position: frame.iloc[:, position].astype(object).where(frame.iloc[:, position].notna(), None)
+                  .tolist() for position in positions}
+        keep = []
+        routed_by = []
+        for index in range(len(frame)):
+            key = self.check({position: values[position][index] for position in positions})
+            keep.append(key is None)
+            if key is not None:
+                routed_by.append(key)
+        if not routed_by:
+            return frame, []
+        dropped = [not kept for kept in keep]
+        return frame[keep], list(zip(frame_to_tuples(frame[dropped]), routed_by))
+
+    def counts(self):
+        """{key name: {'values': repeated values, 'extra_rows': occurrences beyond the first, 'routed': bool}}"""
+        return {', '.join(key): {'values': len(repeated), 'extra_rows': sum(repeated.values()) - len(repeated),
+                                 'routed': route}
+                for key, repeated, route in zip(self.keys, self.repeated, self.route)}
+
+    def nbytes(self):
+        return sum(seen.nbytes() for seen in self.seen)
+
+    def summary(self, report_path=None):
+        """
+        Print the repeated key values found, write them to `report_path` when
+        given, and return them for the import summary.
+        """
+        summary = {'keys': self.counts(), 'memory_bytes': self.nbytes()}
+        print_summary(summary)
+        if report_path and self.write_report(report_path):
+            print(f"  Duplicated key values written to {report_path}")
+            summary['report'] = report_path
+        return summary
+
+    def write_report(self, path):
+        """
+        Write every repeated value to `path` (KEY_COLUMN, KEY_VALUE, OCCURRENCES).
+        Returns the number of repeated values; no file is written when there are none.
+        """
+        total = sum(len(repeated) for repeated in self.repeated)
+        if not total:
+            return 0
+        with open(path, 'w', encoding='utf-8', newline='') as report_file:
+            writer = csv.writer(report_file)
+            writer.writerow(['KEY_COLUMN', 'KEY_VALUE', 'OCCURRENCES'])
+            for key, repeated in zip(self.keys, self.repeated):
+                for value, occurrences in repeated.items():
+                    value = ', '.join(map(str, value)) if isinstance(value, tuple) else value
+                    writer.writerow([', '.join(key), value, occurrences])
+        return total
@@ -0,0 +1,183 @@
+from hashlib import blake2b
+
+from psycopg2.extras import execute_values
+
+from .conversion import to_decimal
+
+FINGERPRINT_TABLE = 'import_fingerprint'
+# Row count of each table when its fingerprints were saved.
+FINGERPRINT_STATE_TABLE = 'import_fingerprint_state'
+
+# Separates values inside a key / fingerprint text; NULL is written as \x00,
+# which cannot occur in PostgreSQL text values.
+_SEPARATOR = '\x1f'
+_NULL = '\x00'
+
+
+def row_text(values):
+    """Normalised text of converted values: str() of the parsed int/Decimal/date/time/text."""
+    return _SEPARATOR.join(_NULL if value is None else str(value) for value in values)
+
+
+def row_fingerprint(row):
+    return blake2b(row_text(row).encode('utf-8'), digest_size=16).digest()
+
+
+def discard_fingerprints(cursor, table_name):
+    """
+    Forget the stored fingerprints of a table, because an import other than a
+    delta import is about to change its rows. Does not commit.
+    """
+    cursor.execute("SELECT to_regclass(%s)", (FINGERPRINT_TABLE,))
+    if cursor.fetchone()[0] is not None:
+        cursor.execute(f"DELETE FROM {FINGERPRINT_TABLE} WHERE TABLE_NAME = %s", (table_name,))
+        cursor.execute(f"DELETE FROM {FINGERPRINT_STATE_TABLE} WHERE TABLE_NAME = %s", (table_name,))
+
+
+class RowFingerprints:
+    """
+    Fingerprints of the rows last imported into one table, kept in the
+    import_fingerprint side table and used by strategy='delta'.
+
+    Each converted row is identified by its natural key (the importer's
+    merge_key; the fingerprint itself when the table has none) and fingerprinted
+    with a hash of its normalised values, so the same row from a re-exported
+    extract hashes the same whatever the date formatting in the file. The
+    columnar engine keeps NUMERIC values as their text; that text is read as a
+    Decimal first (`numeric_indexes`), so ' 7' and '1e5' hash like the rows
+    engine's Decimal('7') and Decimal('1E+5').
+    Stored fingerprints are loaded once; rows are then classified in memory and
+    only added or changed rows are passed on to be written.
+
+    The table's row count is saved with the fingerprints. When the table no
+    longer has that many rows (it was dropped, truncated or changed by hand)
+    the fingerprints no longer describe it and are discarded.
+    """
+
+    def __init__(self, cursor, table_name, key_indexes, numeric_indexes=()):
+        self.cursor = cursor
+        self.table_name = table_name
+        self.key_indexes = key_indexes
+        self.numeric_indexes = numeric_indexes
+        self.stored = {}
+        self.seen = {}
+        self.staged = set()
+        self.duplicates = 0
+        # Row count saved with the fingerprints, and the table's count when they were loaded.
+        self.saved_rows = None
+        self.table_rows = 0
+
+    def create_table(self):
+        self.cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (FINGERPRINT_TABLE,))
+        self.cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {FINGERPRINT_TABLE} (
+                TABLE_NAME TEXT NOT NULL,
+                ROW_KEY TEXT NOT NULL,
+                FINGERPRINT BYTEA NOT NULL,
+                PRIMARY KEY (TABLE_NAME, ROW_KEY)
+            )
+        ''')
+        self.cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {FINGERPRINT_STATE_TABLE} (
+                TABLE_NAME TEXT PRIMARY KEY,
+                TABLE_ROWS BIGINT NOT NULL
+            )
+        ''')
+
+    def discard(self):
+        """Forget the stored fingerprints; every row of the file is then compared as new. Does not commit."""
+        discard_fingerprints(self.cursor, self.table_name)
+        self.stored = {}
+        self.saved_rows = None
+
+    def matches_table(self):
+        """
+        Count the table's rows and compare them with the count saved with the
+        fingerprints. A table without saved fingerprints matches only when empty.
+        """
+        self.cursor.execute(f"SELECT COUNT(*) FROM {self.table_name}")
+        self.table_rows = self.cursor.fetchone()[0]
+        return self.table_rows == (self.saved_rows or 0)
+
+    def _normalised(self, row):
+        """The row with NUMERIC text (columnar engine) replaced by its Decimal."""
+        if not any(isinstance(row[index], str) for index in self.numeric_indexes):
+            return row
+        row = list(row)
+        for index in self.numeric_indexes:
+            if isinstance(row[index], str):
+                row[index] = to_decimal(row[index])
+        return row
+
+    def load(self):
+        """Read the stored fingerprints of this table with a server-side cursor."""
+        with self.cursor.connection.cursor(name='import_fingerprint_load') as stored_rows:
+            stored_rows.itersize = 100000
+            stored_rows.execute(f"SELECT ROW_KEY, FINGERPRINT FROM {FINGERPRINT_TABLE} WHERE TABLE_NAME = %s",
+                                (self.table_name,))
+            self.stored = {row_key: bytes(fingerprint) for row_key, fingerprint in stored_rows}
+        self.cursor.execute(f"SELECT TABLE_ROWS FROM {FINGERPRINT_STATE_TABLE} WHERE TABLE_NAME = %s",
+                            (self.table_name,))
+        saved = self.cursor.fetchone()
+        self.saved_rows = saved[0] if saved else None
+        return len(self.stored)
+
+    def changed_rows(self, rows):
+        """Return the rows of a converted batch that are new or differ from their stored fingerprint."""
+        changed_rows = []
+        for row in rows:
+            values = self._normalised(row)
+            fingerprint = row_fingerprint(values)
+            if self.key_indexes:
+                key = [values[index] for index in self.key_indexes]
+                if None in key:
+                    # Cannot be matched; the merge step counts it as skipped.
+                    changed_rows.append(row)
+                    continue
+                row_key = row_text(key)
+            else:
+                row_key = fingerprint.hex()
+
+            if row_key in self.seen:
+                self.duplicates += 1
+            self.seen[row_key] = fingerprint
+            # The merge keeps the last staged occurrence of a key, so once one
+            # occurrence is staged every later one must be staged as well.
+            if row_key in self.staged or self.stored.get(row_key) != fingerprint:
+                self.staged.add(row_key)
+                changed_rows.append(row)
+        return changed_rows
+
+    def save(self, inserted_rows):
+        """
+        Store the fingerprints of added/changed rows, and the table's row count
+        once the merge has inserted `inserted_rows`. Does not commit.
+        """
+        changed = [(self.table_name, row_key, self.seen[row_key]) for row_key in self.staged
+                   if self.seen[row_key] != self.stored.get(row_key)]
+        execute_values(self.cursor, f'''
+            INSERT INTO {FINGERPRINT_TABLE} (TABLE_NAME, ROW_KEY, FINGERPRINT) VALUES %s
+            ON CONFLICT (TABLE_NAME, ROW_KEY) DO UPDATE SET FINGERPRINT = EXCLUDED.FINGERPRINT
+        ''', changed, page_size=1000)
+        self.cursor.execute(f'''
+            INSERT INTO {FINGERPRINT_STATE_TABLE} (TABLE_NAME, TABLE_ROWS) VALUES (%s, %s)
+            ON CONFLICT (TABLE_NAME) DO UPDATE SET TABLE_ROWS = EXCLUDED.TABLE_ROWS
+        ''', (self.table_name, self.table_rows + inserted_rows))
+
+    def counts(self):
+        """Added / changed / unchanged keys of this file against the stored fingerprints, and stored keys it no longer has."""
+        added = changed = 0
+        for row_key, fingerprint in self.seen.items():
+            stored = self.stored.get(row_key)
+            if stored is None:
+                added += 1
+            elif stored != fingerprint:
+                changed += 1
+        unchanged = len(self.seen) - added - changed
+        return {
+            'added': added,
+            'changed': changed,
+            'unchanged': unchanged,
+            'removed': len(self.stored) - unchanged - changed,
+            'duplicates': self.duplicates,
+        }
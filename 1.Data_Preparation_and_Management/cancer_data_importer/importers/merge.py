@@ -0,0 +1,144 @@
+from .fingerprint import RowFingerprints
+from .schema import column_kind, table_ddl
+
+
+class MergeLoad:
+    """
+    strategy='merge' (and 'delta', with delta=True) for one import: the
+    batches are written to a session TEMP table, which skips WAL and
+    disappears with the connection, and `finish` applies it to the target
+    table with set-based statements on the importer's merge_key.
+
+    A delta import first compares each converted row with the fingerprints
+    of the table's previous import (`self.delta`, a RowFingerprints), so only
+    new and changed rows are staged.
+    """
+
+    def __init__(self, importer, delta=False):
+        self.importer = importer
+        self.staging = f"{importer.table_name}_merge"
+        self.key = importer.merge_key()
+        self.use_delta = delta
+        self.delta = None
+
+    def prepare(self):
+        """
+        Create the target table if needed, point the importer's write paths at
+        the TEMP staging table and, for a delta import, load the fingerprints.
+        """
+        importer = self.importer
+        importer.create_table()
+        importer.load_table = self.staging
+        importer.cursor.execute(f"DROP TABLE IF EXISTS {self.staging}")
+        importer.cursor.execute(table_ddl(self.staging, importer.columns, constraints=False, temporary=True))
+        importer.conn.commit()
+        if self.use_delta:
+            self.delta = self._load_fingerprints()
+
+    def _load_fingerprints(self):
+        """
+        Load the fingerprints of the table's previous import. They are
+        discarded when they no longer describe the table: its row count
+        differs from the one saved with them (see RowFingerprints).
+        """
+        importer = self.importer
+        delta = RowFingerprints(importer.cursor, importer.table_name,
+                                [importer.column_names.index(name) for name in self.key],
+                                [index for index, column in enumerate(importer.columns)
+                                 if column_kind(column) == 'numeric'])
+        delta.create_table()
+        importer.conn.commit()
+        stored = delta.load()
+        if not delta.matches_table():
+            if stored:
+                print(f"{importer.table_name} has {delta.table_rows} rows, not the {delta.saved_rows} its "
+                      f"{stored} row fingerprints were saved with; discarding them.")
+            delta.discard()
+            stored = 0
+        importer.conn.commit()
+        print(f"Loaded {stored} row fingerprints for {importer.table_name}.")
+        return delta
+
+    def finish(self):
+        """
+        Apply the staged file to the target table with set-based statements:
+        rows whose natural key exists and whose values changed are updated, rows
+        with a new key are inserted (anti-join), identical rows are left alone.
+        Without a natural key, a staged row is inserted only if no identical row
+        exists. Re-importing the same extract therefore changes nothing.
+        The fingerprints of a delta import are saved in the same transaction,
+        so they always describe the merged table.
+        Returns (inserted, updated, unchanged, skipped) row counts.
+        """
+        importer = self.importer
+        cursor = importer.cursor
+        table_name = importer.table_name
+        column_names = importer.column_names
+        staging = self.staging
+        columns = ', '.join(column_names)
+        key = self.key
+        skipped = 0
+        if importer.partitions is not None:
+            importer.partitions.create_for_table(staging)
+
+        if key:
+            # Rows without a key can never be matched again; leave them out.
+            cursor.execute(f"DELETE FROM {staging} WHERE " +
+                           " OR ".join(f"{name} IS NULL" for name in key))
+            skipped += cursor.rowcount
+            # Keep only the last occurrence of each key in the file.
+            cursor.execute(f'''
+                DELETE FROM {staging} WHERE ctid IN (
+                    SELECT ctid FROM (
+                        SELECT ctid, ROW_NUMBER() OVER (PARTITION BY {', '.join(key)} ORDER BY ctid DESC) AS occurrence
+                        FROM {staging}
+                    ) ranked WHERE occurrence > 1
+                )
+            ''')
+            skipped += cursor.rowcount
+            cursor.execute(f"SELECT COUNT(*) FROM {staging}")
+            staged_rows = cursor.fetchone()[0]
+
+            match = ' AND '.join(f"t.{name} = s.{name}" for name in key)
+            values = [name for name in column_names if name not in key]
+            updated = 0
+            if values:
+                cursor.execute(f'''
+                    UPDATE {table_name} t SET {', '.join(f"{name} = s.{name}" for name in values)}
+                    FROM {staging} s
+                    WHERE {match}
+                      AND ({', '.join(f"t.{name}" for name in values)}) IS DISTINCT FROM
+                          ({', '.join(f"s.{name}" for name in values)})
+                ''')
+                updated = cursor.rowcount
+            cursor.execute(f'''
+                INSERT INTO {table_name} ({columns})
+                SELECT {', '.join(f"s.{name}" for name in column_names)} FROM {staging} s
+                WHERE NOT EXISTS (SELECT 1 FROM {table_name} t WHERE {match})
+            ''')
+            inserted = cursor.rowcount
+        else:
+            cursor.execute(f"SELECT COUNT(*) FROM {staging}")
+            staged_rows = cursor.fetchone()[0]
+            # Whole-row match on a hash of the row text, so the anti-join can hash.
+            cursor.execute(f'''
+                INSERT INTO {table_name} ({columns})
+                SELECT {', '.join(f"s.{name}" for name in column_names)} FROM {staging} s
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM {table_name} t
+                    WHERE md5(ROW({', '.join(f"t.{name}" for name in column_names)})::text)
+                        = md5(ROW({', '.join(f"s.{name}" for name in column_names)})::text)
+                )
+            ''')
+            inserted = cursor.rowcount
+            updated = 0
+
+        cursor.execute(f"DROP TABLE {staging}")
+        if self.delta is not None:
+            self.delta.save(inserted)
+        importer.conn.commit()
+        importer.load_table = table_name
+        unchanged = staged_rows - inserted - updated
+        print(f"Merged into {table_name}: {inserted} new, {updated} updated, "
+              f"{unchanged} unchanged, {skipped} skipped (missing or repeated key).")
+        return inserted, updated, unchanged, skipped
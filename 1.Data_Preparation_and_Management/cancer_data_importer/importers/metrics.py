@@ -0,0 +1,116 @@
+import json
+import threading
+import time
+from collections import Counter
+
+# Upper bounds (milliseconds) of the commit latency histogram buckets.
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+
+class ImportMetrics:
+    """
+    Timings and counters of one import_data_bulk run.
+
+    The conversion engines add the time spent reading and converting each batch
+    with `add`, import_data_bulk closes every batch with `end_batch` (its write
+    and commit time), and rejected rows are counted by reason with `reject`.
+    Stage times are summed per stage; with workers > 1 reading, conversion and
+    writing overlap, so they can add up to more than the wall-clock time.
+    Reading/converting runs on the pipeline thread, so the stage times of a
+    batch entry cover the work done since the previous batch was committed.
+    'wait' is the time the writer spent waiting for the next converted batch.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.started_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self.stage_seconds = Counter()
+        self.rejected = Counter()
+        self.rejected_by_column = Counter()
+        self.batches = []
+        self._batch_stages = Counter()
+        self._last_batch_end = self.started
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self._batch_stages[stage] += seconds
+            self.stage_seconds[stage] += seconds
+
+    def reject(self, reason, count=1, column=''):
+        if count:
+            self.rejected[reason] += count
+            if column:
+                self.rejected_by_column[f'{column}: {reason}'] += count
+
+    def end_batch(self, rows_read, rows_written, write_seconds, commit_seconds):
+        self.add('write', write_seconds)
+        self.add('commit', commit_seconds)
+        now = time.perf_counter()
+        batch_seconds = now - self._last_batch_end
+        self._last_batch_end = now
+        with self._lock:
+            batch_stages, self._batch_stages = self._batch_stages, Counter()
+        self.batches.append({
+            'batch': len(self.batches) + 1,
+            'elapsed_seconds': round(now - self.started, 6),
+            'rows_read': rows_read,
+            'rows_written': rows_written,
+            'rows_per_second': round(rows_read / batch_seconds, 1) if batch_seconds else None,
+            **{f'{stage}_seconds': round(seconds, 6) for stage, seconds in batch_stages.items()},
+        })
+
+    def merge_report(self, report, **labels):
+        """Add the totals and batches of another run's `report` (one shard of a sharded import)."""
+        with self._lock:
+            self.stage_seconds.update(report['stage_seconds'])
+            self.rejected.update(report['rejected'])
+            self.rejected_by_column.update(report['rejected_by_column'])
+            self.batches.extend({**labels, **batch} for batch in report['batches'])
+
+    def commit_latency(self):
+        """Count, mean, percentiles and histogram of the per-batch commit times, in milliseconds."""
+        latencies = sorted(batch['commit_seconds'] * 1000 for batch in self.batches)
+        if not latencies:
+            return {'count': 0}
+        histogram = Counter()
+        for latency in latencies:
+            bucket = next((f'<={bound}' for bound in LATENCY_BUCKETS_MS if latency <= bound),
+                          f'>{LATENCY_BUCKETS_MS[-1]}')
+            histogram[bucket] += 1
+        return {
+            'count': len(latencies),
+            'mean': round(sum(latencies) / len(latencies), 3),
+            'p50': round(latencies[len(latencies) // 2], 3),
+            'p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+            'max': round(latencies[-1], 3),
+            'histogram': dict(histogram),
+        }
+
+    def report(self, summary, settings):
+        return {
+            'started_at': self.started_at,
+            'settings': settings,
+            'summary': summary,
+            'stage_seconds': {stage: round(seconds, 6) for stage, seconds in self.stage_seconds.items()},
+            'commit_latency_ms': self.commit_latency(),
+            'rejected': dict(self.rejected),
+            'rejected_by_column': dict(self.rejected_by_column),
+            'batches': self.batches,
+        }
+
+    def print_summary(self):
+        stages = ', '.join(f"{stage} {seconds:.2f}s" for stage, seconds in self.stage_seconds.items())
+        print(f"  Stage time: {stages}")
+        latency = self.commit_latency()
+        if latency['count'] and latency['max']:  # a dry run has no commits to time
+            print(f"  Commit latency: p50 {latency['p50']:.1f} ms, p95 {latency['p95']:.1f} ms, "
+                  f"max {latency['max']:.1f} ms over {latency['count']} batches")
+        if self.rejected:
+            print(f"  Rejected: {', '.join(f'{reason} {count}' for reason, count in self.rejected.items())}")
+        for column_reason, count in self.rejected_by_column.most_common(5):
+            print(f"    {column_reason}: {count}")
+
+    def write_json(self, report_path, summary, settings):
+        with open(report_path, 'w', encoding='utf-8') as report_file:
+            json.dump(self.report(summary, settings), report_file, indent=2, default=str)
@@ -0,0 +1,161 @@
+from collections import defaultdict
+from datetime import date
+
+INTERVALS = ('year', 'month')
+
+
+def partition_start(value, interval):
+    """First day of the year/month range holding `value` (a date or an ISO date string), or None."""
+    if value is None or value != value:  # None, or NaN from a pandas frame
+        return None
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    if interval == 'month':
+        return date(value.year, value.month, 1)
+    return date(value.year, 1, 1)
+
+
+def partition_end(start, interval):
+    """Exclusive upper bound of the range starting at `start`."""
+    if interval == 'month':
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return date(start.year + 1, 1, 1)
+
+
+class RangePartitions:
+    """
+    The partitions of a table range-partitioned on one DATE column.
+
+    The parent table is created with PARTITION BY RANGE (key); partitions of
+    one year (or month) are created on demand, named <table>_p2019 or
+    <table>_p2019_05, and rows whose key is NULL go to <table>_default. Because
+    every non-NULL date gets its own partition before it is written, the
+    default partition only ever holds NULL keys and new ranges can always be
+    attached.
+
+    `route` splits a converted batch by partition so that import_data_bulk can
+    COPY each group straight into its partition instead of having the parent
+    route every row. PostgreSQL only enforces a UNIQUE/PRIMARY KEY on a
+    partitioned table when it includes the partition key, so the importer's
+    key columns get a unique index on every partition instead: keys are
+    unique within a year (or month), which is what ON CONFLICT DO NOTHING
+    relies on.
+
+    Partitions are created over a connection of their own, opened with
+    `connect`, and committed there one at a time. The import's connection
+    keeps its transaction, so creating a partition never commits a batch or a
+    checkpoint half-way. Routing happens before a batch writes anything, so
+    the import's transaction holds no lock on the parent that the DDL would
+    wait for. `close` closes the DDL connection.
+    """
+
+    def __init__(self, cursor, table_name, column_names, key, interval='year', unique_columns=(), connect=None):
+        if interval not in INTERVALS:
+            raise ValueError(f"Unknown partition interval '{interval}'; expected one of {', '.join(INTERVALS)}")
+        self.cursor = cursor
+        self.connect = connect
+        self._ddl_conn = None
+        self.table_name = table_name
+        self.key = key
+        self.key_index = column_names.index(key)
+        self.interval = interval
+        self.unique_columns = tuple(unique_columns)
+        self.default_name = f"{table_name}_default".lower()
+        self.known = set()
+        # Key value -> partition name; an extract repeats the same dates over and over.
+        self._names = {}
+
+    def is_partitioned(self):
+        self.cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+                            (self.table_name,))
+        return self.cursor.fetchone() is not None
+
+    def load(self):
+        """Read the partitions that already exist and make sure the default partition is there."""
+        self.cursor.execute('''
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(%s)
+        ''', (self.table_name,))
+        self.known = {name for name, in self.cursor.fetchall()}
+        if self.default_name not in self.known:
+            self._create(self.default_name, f"CREATE TABLE IF NOT EXISTS {self.default_name} "
+                                            f"PARTITION OF {self.table_name} DEFAULT")
+        return len(self.known)
+
+    def _create(self, name, ddl):
+        """
+        Create one partition in a transaction of its own on the DDL connection.
+        Creating a partition locks the parent table until commit, so shards of
+        one file creating several partitions in one transaction could deadlock
+        each other; the advisory lock makes shards that meet the same new range
+        take turns.
+        """
+        if self._ddl_conn is None:
+            self._ddl_conn = self.connect()
+        try:
+            with self._ddl_conn.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (name,))
+                cursor.execute(ddl)
+                for column_name in self.unique_columns:
+                    cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {name}_{column_name.lower()}_key "
+                                   f"ON {name} ({column_name})")
+            self._ddl_conn.commit()
+        except Exception:
+            self._ddl_conn.rollback()
+            raise
+        self.known.add(name)
+
+    def close(self):
+        """Close the DDL connection, if one was opened."""
+        if self._ddl_conn is not None:
+            self._ddl_conn.close()
+            self._ddl_conn = None
+
+    def partition_for(self, start):
+        """Name of the partition for a range start (None: the default partition), creating it if needed."""
+        if start is None:
+            return self.default_name
+        suffix = f"{start.year}" if self.interval == 'year' else f"{start.year}_{start.month:02d}"
+        name = f"{self.table_name}_p{suffix}".lower()
+        if name not in self.known:
+            end = partition_end(start, self.interval)
+            self._create(name, f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {self.table_name} "
+                               f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')")
+        return name
+
+    def route(self, rows):
+        """
+        Group converted tuples by partition: {partition name: [rows]}.
+        New partitions are created (and committed on the DDL connection) before
+        any row is written, so they survive a batch that is rolled back and retried.
+        """
+        names = self._names
+        index = self.key_index
+        groups = defaultdict(list)
+        for row in rows:
+            value = row[index]
+            name = names.get(value)
+            if name is None:
+                name = names[value] = self.partition_for(partition_start(value, self.interval))
+            groups[name].append(row)
+        return groups
+
+    def route_frame(self, frame):
+        """`route` for a columnar-engine chunk, whose dates are ISO strings: {partition name: sub-frame}."""
+        width = 4 if self.interval == 'year' else 7
+        labels = frame[self.key].str.slice(0, width).fillna('')
+        groups = {}
+        for label, group in frame.groupby(labels, sort=False):
+            start = None if not label else partition_start(label + ('-01-01' if width == 4 else '-01'),
+                                                           self.interval)
+            groups[self.partition_for(start)] = group
+        return groups
+
+    def create_for_table(self, source_table):
+        """Create the partitions needed by every row of `source_table` (a staging table)."""
+        unit = 'year' if self.interval == 'year' else 'month'
+        self.cursor.execute(f"SELECT DISTINCT date_trunc('{unit}', {self.key})::date FROM {source_table} "
+                            f"WHERE {self.key} IS NOT NULL")
+        for start, in self.cursor.fetchall():
+            self.partition_for(start)
@@ -0,0 +1,67 @@
+import queue
+import threading
+
+_DONE = object()
+
+
+class BatchPipeline:
+    """
+    Run a batch generator (reading + converting) on a background thread while
+    the caller writes the batches it has already received.
+
+    The reader fills a queue of at most `depth` ready batches and blocks when it
+    is full, so memory stays bounded at roughly depth + 2 batches (one being
+    converted, `depth` waiting, one being written). psycopg2 releases the GIL
+    while it waits on the server, so parsing continues while PostgreSQL
+    executes the previous COPY/INSERT and commit. Only the consuming thread
+    uses the database connection.
+
+    An exception in the reader is re-raised in the consumer; leaving the
+    `with` block early (an error while writing, Ctrl+C) stops the reader and
+    closes the generator on its own thread.
+    """
+
+    def __init__(self, batches, depth=2):
+        self.batches = batches
+        self.ready = queue.Queue(maxsize=depth)
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._produce, name='import-reader', daemon=True)
+
+    def _put(self, item):
+        """Queue an item, giving up if the consumer has stopped. Returns False when stopped."""
+        while not self.stop.is_set():
+            try:
+                self.ready.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self):
+        try:
+            for batch in self.batches:
+                if not self._put((batch, None)):
+                    return
+            self._put((_DONE, None))
+        except BaseException as e:
+            self._put((None, e))
+        finally:
+            self.batches.close()
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __iter__(self):
+        while True:
+            batch, error = self.ready.get()
+            if error is not None:
+                raise error
+            if batch is _DONE:
+                return
+            yield batch
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop.set()
+        self.thread.join()
+        return False
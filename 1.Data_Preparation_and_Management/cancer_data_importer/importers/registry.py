@@ -0,0 +1,26 @@
+import importlib
+
+# Table key -> (module in this package, importer class).
+IMPORTERS = {
+    'av_gene': ('av_gene_importer', 'AvGeneImporter'),
+    'av_patient': ('av_patient_importer', 'AvPatientImporter'),
+    'av_tumour': ('av_tumour_importer', 'AvTumourImporter'),
+    'rtds_combined': ('rtds_combined_importer', 'RtdsCombinedImporter'),
+    'rtds_episode': ('rtds_episode_importer', 'RtdsEpisodeImporter'),
+    'rtds_exposure': ('rtds_exposure_importer', 'RtdsExposureImporter'),
+    'rtds_prescription': ('rtds_prescription_importer', 'RtdsPrescriptionImporter'),
+    'sact_cycle': ('sact_cycle_importer', 'SactCycleImporter'),
+    'sact_drug_detail': ('sact_drug_detail_importer', 'SactDrugDetailImporter'),
+    'sact_outcome': ('sact_outcome_importer', 'SactOutcomeImporter'),
+    'sact_regimen': ('sact_regimen_importer', 'SactRegimenImporter'),
+}
+
+
+def load_importer(table):
+    """Import and return the importer class registered for `table` (e.g. 'sact_cycle')."""
+    try:
+        module_name, class_name = IMPORTERS[table.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown table '{table}'. Known tables: {', '.join(sorted(IMPORTERS))}")
+    module = importlib.import_module(f".{module_name}", package=__package__)
+    return getattr(module, class_name)
@@ -0,0 +1,73 @@
+import csv
+import io
+import logging
+import os
+import threading
+from collections import Counter
+
+
+class RejectSink:
+    """
+    Collects the rows an import rejects.
+
+    Each rejected record is written with a reason code and the offending column
+    to a rejects CSV (REASON, COLUMN, LINE) through a large write buffer, and
+    counted per (column, reason). Only the first `log_samples` rejects are
+    logged, so a dirty extract does not turn logging into the hot path.
+    With `path=None` rejects are only counted and sampled. With append=True
+    (a resumed import) rejects are added to an existing file; otherwise a
+    rejects file left by an earlier run is removed.
+    """
+
+    def __init__(self, path=None, log_samples=10, buffer_size=1 << 20, append=False):
+        self.path = path
+        self.append = append
+        if path is not None and not append and os.path.exists(path):
+            os.remove(path)
+        self.log_samples = log_samples
+        self.buffer_size = buffer_size
+        self.counts = Counter()
+        self.total = 0
+        self._file = None
+        self._writer = None
+        self._line = io.StringIO()
+        self._line_writer = csv.writer(self._line, lineterminator='')
+        # Rows are rejected from both the pipeline's reader thread and the writer.
+        self._lock = threading.Lock()
+
+    def _encode(self, values):
+        """The record as one CSV line; NULLs (None) are written as empty fields."""
+        self._line.seek(0)
+        self._line.truncate()
+        self._line_writer.writerow(values)
+        return self._line.getvalue()
+
+    def add(self, values, reason, column=''):
+        """Record one rejected record (its field values in file or table order)."""
+        with self._lock:
+            self._add(values, reason, column)
+
+    def _add(self, values, reason, column):
+        self.counts[(column, reason)] += 1
+        self.total += 1
+        if self.total <= self.log_samples:
+            logging.error(f"Rejected row ({reason}{f' in {column}' if column else ''}): {list(values)}")
+        if self.path is None:
+            return
+        if self._writer is None:
+            new_file = not (self.append and os.path.exists(self.path))
+            self._file = open(self.path, 'w' if new_file else 'a', newline='', encoding='utf-8',
+                              buffering=self.buffer_size)
+            self._writer = csv.writer(self._file)
+            if new_file:
+                self._writer.writerow(['REASON', 'COLUMN', 'LINE'])
+        self._writer.writerow([reason, column, self._encode(values)])
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+        if self.total > self.log_samples:
+            logging.error(f"{self.total - self.log_samples} more rejected rows not logged"
+                          f"{f'; all rejects are in {self.path}' if self.path else ''}")
@@ -0,0 +1,148 @@
+from collections import namedtuple
+
+from .conversion import DATE_FORMAT, TIME_FORMAT, date_parser, time_parser, to_decimal, to_int
+
+# One column of an importer's table. The tuple of Columns declared on an importer
+# is the single source for the DDL, the INSERT/COPY column list and the row converter.
+#   name          CSV header and table column name
+#   sql_type      PostgreSQL type used in CREATE TABLE; also selects the converter
+#   nullable      False -> NOT NULL; rows with an empty/invalid value are rejected
+#   parse_format  strptime format for DATE / TIME columns
+#   primary_key   PRIMARY KEY (implies the row is rejected when the value is missing)
+#   unique        UNIQUE
+Column = namedtuple(
+    'Column',
+    ['name', 'sql_type', 'nullable', 'parse_format', 'primary_key', 'unique'],
+    defaults=(True, None, False, False),
+)
+
+
+def column_kind(column):
+    """Map a column's SQL type to the converter family: int, numeric, date, time or text."""
+    sql_type = column.sql_type.upper()
+    if sql_type.startswith('INT'):
+        return 'int'
+    if sql_type.startswith('NUMERIC'):
+        return 'numeric'
+    if sql_type == 'DATE':
+        return 'date'
+    if sql_type == 'TIME':
+        return 'time'
+    return 'text'
+
+
+def required(value):
+    """Reject the row (via ValueError) when a NOT NULL / key column has no usable value."""
+    if value is None or value == '':
+        raise ValueError('missing required value')
+    return value
+
+
+def value_parser(column):
+    """Return the single-argument parser for a column, or None for text columns."""
+    kind = column_kind(column)
+    if kind == 'int':
+        return to_int
+    if kind == 'numeric':
+        return to_decimal
+    if kind == 'date':
+        return date_parser(column.parse_format or DATE_FORMAT)
+    if kind == 'time':
+        return time_parser(column.parse_format or TIME_FORMAT)
+    return None
+
+
+def _compile(columns, field_expression, arguments='row', fallback=''):
+    """Build the converter for `columns`; field_expression(column) is the Python expression reading its raw value."""
+    namespace = {'_required': required}
+    expressions = []
+    for index, column in enumerate(columns):
+        expression = field_expression(column)
+        parser = value_parser(column)
+        if parser is not None:
+            namespace[f'_p{index}'] = parser
+            expression = f"_p{index}({expression})"
+        if not column.nullable or column.primary_key:
+            expression = f"_required({expression})"
+        expressions.append(expression)
+
+    source = (
+        f"def convert({arguments}):\n"
+        "    try:\n"
+        "        return (\n"
+        + ''.join(f"            {expression},\n" for expression in expressions)
+        + "        )\n"
+        "    except ValueError:\n"
+        "        return None\n"
+        + fallback
+    )
+    exec(source, namespace)
+    return namespace['convert']
+
+
+def compile_converter(columns):
+    """
+    Generate a converter that turns a csv.DictReader row into the insert tuple.
+    The function body is one tuple expression with a direct parser call per column,
+    so converting a row involves no loops over field lists, no per-field type
+    checks and no writes back into the row dict. Returns None for rejected rows.
+    """
+    return _compile(columns, lambda column: f"row.get({column.name!r})")
+
+
+def compile_row_converter(columns, fieldnames):
+    """
+    Generate a converter from a csv.reader record (a list of field values) to
+    the insert tuple, for a file whose header is `fieldnames`. Column positions
+    are resolved once here and compiled in as constant indexes, so no dict is
+    built per row. A column missing from the header is NULL; a short record
+    is padded with None, as csv.DictReader does. A name repeated in the header
+    reads its last occurrence, like a DictReader row.
+    """
+    positions = {name: position for position, name in enumerate(fieldnames)}
+    width = len(fieldnames)
+
+    def field_expression(column):
+        position = positions.get(column.name)
+        return "None" if position is None else f"values[{position}]"
+
+    # Only a short record reaches the IndexError branch, so full records pay nothing for it.
+    fallback = (
+        "    except IndexError:\n"
+        f"        return convert(values + [None] * ({width} - len(values)))\n"
+    )
+    return _compile(columns, field_expression, arguments='values', fallback=fallback)
+
+
+def table_ddl(table_name, columns, constraints=True, unlogged=False, temporary=False, partition_by=None):
+    """
+    Build the CREATE TABLE IF NOT EXISTS statement for a column spec.
+    constraints=False leaves out PRIMARY KEY / UNIQUE (used for staging tables,
+    where keys are added once after the load or not needed at all).
+    partition_by names the DATE column of a range-partitioned table; keys are
+    then left to per-partition unique indexes (see partitioning.RangePartitions).
+    """
+    definitions = []
+    for column in columns:
+        definition = f"{column.name} {column.sql_type}"
+        if constraints and column.primary_key and not partition_by:
+            definition += " PRIMARY KEY"
+        if not column.nullable:
+            definition += " NOT NULL"
+        if constraints and column.unique and not partition_by:
+            definition += " UNIQUE"
+        definitions.append(definition)
+    body = ',\n    '.join(definitions)
+    table_kind = "TEMP TABLE" if temporary else "UNLOGGED TABLE" if unlogged else "TABLE"
+    partitioning = f" PARTITION BY RANGE ({partition_by})" if partition_by else ""
+    return f"CREATE {table_kind} IF NOT EXISTS {table_name} (\n    {body}\n){partitioning}"
+
+
+def key_columns(columns):
+    """Columns with a PRIMARY KEY or UNIQUE constraint, as (column, constraint) pairs."""
+    return [(column, 'PRIMARY KEY' if column.primary_key else 'UNIQUE')
+            for column in columns if column.primary_key or column.unique]
+
+
+def index_ddl(table_name, column_name):
+    return f"CREATE INDEX IF NOT EXISTS {table_name}_{column_name}_idx ON {table_name} ({column_name})"
@@ -0,0 +1,83 @@
+import os
+import shutil
+
+# Bytes scanned per read while looking for record boundaries.
+SCAN_CHUNK = 1 << 22
+
+
+def shard_ranges(path, shards):
+    """
+    Split an uncompressed CSV into at most `shards` byte ranges [start, end)
+    that each begin at the start of a record. The first range includes the
+    header line.
+
+    A newline only ends a record when it is outside a quoted field, i.e. when
+    an even number of quote characters precedes it ("" inside a quoted field
+    counts twice and keeps the parity). The file is therefore scanned once up to
+    the last split point, counting quotes a chunk at a time with bytes.count.
+    Guessing from an arbitrary offset would misplace a split that lands inside
+    a multi-line ADMINISTRATION_ROUTE or DRUG_GROUP value.
+    """
+    file_size = os.path.getsize(path)
+    with open(path, 'rb') as csv_file:
+        header_end = len(csv_file.readline())
+        body = file_size - header_end
+        if shards <= 1 or body <= 0:
+            return [(0, file_size)]
+        targets = [header_end + body * shard // shards for shard in range(1, shards)]
+
+        boundaries = [0]
+        chunk_start = header_end
+        # Whether the scan position is inside a quoted field.
+        in_quotes = False
+        while targets:
+            chunk = csv_file.read(SCAN_CHUNK)
+            if not chunk:
+                break
+            position = 0
+            while targets:
+                target = targets[0] - chunk_start
+                if target > position:
+                    if target >= len(chunk):
+                        break
+                    in_quotes ^= chunk.count(b'"', position, target) % 2 == 1
+                    position = target
+                # Past the split point: the next newline outside quotes ends the shard.
+                newline = chunk.find(b'\n', position)
+                if newline < 0:
+                    break
+                in_quotes ^= chunk.count(b'"', position, newline) % 2 == 1
+                position = newline + 1
+                if not in_quotes:
+                    if chunk_start + position < file_size:
+                        boundaries.append(chunk_start + position)
+                    targets.pop(0)
+            in_quotes ^= chunk.count(b'"', position) % 2 == 1
+            chunk_start += len(chunk)
+    boundaries.append(file_size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+
+def combine_parts(shard_paths, path):
+    """
+    Concatenate the CSV files the shards wrote (rejects, duplicate key reports)
+    into `path`, with the header of the first one, and remove them. Returns
+    `path`, or None when no shard wrote one.
+    """
+    shard_paths = [shard_path for shard_path in shard_paths if os.path.exists(shard_path)]
+    if not shard_paths:
+        return None
+    with open(path, 'w', newline='', encoding='utf-8') as combined:
+        for number, shard_path in enumerate(shard_paths):
+            with open(shard_path, 'r', newline='', encoding='utf-8') as shard_file:
+                header = shard_file.readline()
+                if number == 0:
+                    combined.write(header)
+                shutil.copyfileobj(shard_file, combined)
+            os.remove(shard_path)
+    return path
+
+
+def import_shard(importer, file_path, shard, start, end, options):
+    """Process-pool entry point: import one byte range with the importer's own connection."""
+    return importer._import_range(file_path, shard, start, end, **options)
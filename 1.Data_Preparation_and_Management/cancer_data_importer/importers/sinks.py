@@ -0,0 +1,30 @@
+class TextSink:
+    """
+    Destination of a dry run (BaseImporter.dry_run): the text that would have
+    been sent to PostgreSQL with COPY is written to `path`, or discarded when
+    path is None. Counts the characters written either way, so the cost of
+    encoding batches is measured without a database.
+    """
+
+    def __init__(self, path=None, buffer_size=1 << 20):
+        self.path = path
+        self.characters = 0
+        self._file = open(path, 'w', encoding='utf-8', buffering=buffer_size) if path else None
+
+    def write(self, text):
+        self.characters += len(text)
+        if self._file is not None:
+            self._file.write(text)
+        return len(text)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
@@ -0,0 +1,223 @@
+"""
+Columnar (Parquet) snapshots of imported tables, written during the import.
+
+With snapshot_dir set, import_data_bulk also writes every committed batch,
+less the rows the database rejected or skipped on a key conflict, to a
+zstd-compressed Parquet file, one row group per batch:
+
+    <snapshot_dir>/<table>/load_date=YYYY-MM-DD/part-<source file>.parquet
+
+Columns are typed from the importer's Column specs: INT/INTEGER -> int64,
+NUMERIC -> decimal128, DATE -> date32, TIME -> time32[s], CHAR/VARCHAR -> string.
+NUMERIC(p, s) keeps its precision and scale; a bare NUMERIC, which PostgreSQL
+stores exactly at any scale, becomes decimal128(38, 10) (DEFAULT_DECIMAL), so
+values are rounded to 10 decimal places rather than to the ~16 significant
+digits of a float. Arrow decimals have no NaN or Infinity: those values, and
+values too large for the type, are null in the snapshot.
+The directory is a Hive-partitioned dataset, so pandas.read_parquet or
+pyarrow.dataset can read one table (or one load date of it), and only the
+columns they need, memory-mapped, without going back through PostgreSQL.
+
+A snapshot is written to a hidden .tmp file, which Parquet readers skip, and
+renamed into place only once the import has finished. Re-importing the same
+source file on the same day replaces its part. pyarrow is only needed when a
+snapshot is requested, so it is imported lazily.
+"""
+import os
+import re
+from datetime import date
+from decimal import Context, Decimal, InvalidOperation
+
+from .conversion import to_decimal
+from .schema import column_kind
+
+COMPRESSION = 'zstd'
+# (precision, scale) of a NUMERIC column declared without them.
+DEFAULT_DECIMAL = (38, 10)
+NUMERIC_TYPE = re.compile(r'NUMERIC\s*\(\s*(\d+)\s*(?:,\s*(\d+)\s*)?\)', re.IGNORECASE)
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("snapshot_dir requires pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+def arrow_type(column):
+    pa = _pyarrow()
+    kind = column_kind(column)
+    if kind == 'int':
+        return pa.int64()
+    if kind == 'numeric':
+        match = NUMERIC_TYPE.match(column.sql_type)
+        precision, scale = (int(match.group(1)), int(match.group(2) or 0)) if match else DEFAULT_DECIMAL
+        return pa.decimal128(precision, scale) if precision <= 38 else pa.decimal256(precision, scale)
+    if kind == 'date':
+        return pa.date32()
+    if kind == 'time':
+        return pa.time32('s')
+    return pa.string()
+
+
+def decimal_values(values, decimal_type):
+    """
+    Decimals rounded to the scale of `decimal_type`, for a column of Decimals
+    (rows engine) or numeric text (columnar engine). Missing values, NaN,
+    Infinity and values with more digits than the type holds become None.
+    """
+    quantum = Decimal(1).scaleb(-decimal_type.scale)
+    context = Context(prec=decimal_type.precision, traps=[InvalidOperation])
+    result = []
+    for value in values:
+        if value is not None and not isinstance(value, Decimal):
+            value = to_decimal(value) if isinstance(value, str) else None
+        if value is not None and value.is_finite():
+            try:
+                value = value.quantize(quantum, context=context)
+            except InvalidOperation:
+                value = None
+        else:
+            value = None
+        result.append(value)
+    return result
+
+
+def table_directory(snapshot_dir, table_name, load_date=None):
+    """<snapshot_dir>/<table>/load_date=<date>: one load date of a table's snapshot."""
+    load_date = load_date or date.today()
+    return os.path.join(snapshot_dir, table_name.lower(), f"load_date={load_date.isoformat()}")
+
+
+def part_prefix(source_path):
+    """Name shared by the parts written from one source file (without .csv, .csv.gz, ...)."""
+    return f"part-{os.path.basename(source_path).split('.')[0]}"
+
+
+def publish_parts(directory, prefix, temporary_paths):
+    """
+    Move finished .tmp parts into place, replacing the parts an earlier import
+    of the same source file wrote on this load date (also with another number
+    of shards).
+    """
+    for name in os.listdir(directory):
+        if name == f"{prefix}.parquet" or (name.startswith(f"{prefix}-shard") and name.endswith('.parquet')):
+            os.remove(os.path.join(directory, name))
+    for temporary_path in temporary_paths:
+        name = os.path.basename(temporary_path)[1:-len('.tmp')]
+        os.replace(temporary_path, os.path.join(directory, name))
+
+
+class ParquetSnapshot:
+    """
+    Parquet part written alongside one import (or one shard of a sharded
+    import, with `shard` set). Use as a context manager around the batches:
+    an exception discards the part, a normal exit closes it, and `publish`
+    then moves it into place.
+    """
+
+    def __init__(self, snapshot_dir, table_name, columns, source_path, shard=None, load_date=None):
+        pa = _pyarrow()
+        self.columns = columns
+        self.kinds = [column_kind(column) for column in columns]
+        self.schema = pa.schema([(column.name, arrow_type(column)) for column in columns])
+        self.directory = table_directory(snapshot_dir, table_name, load_date)
+        self.prefix = part_prefix(source_path)
+        name = self.prefix + (f"-shard{shard}" if shard is not None else '') + '.parquet'
+        self.path = os.path.join(self.directory, name)
+        self.temporary_path = os.path.join(self.directory, f".{name}.tmp")
+        self.rows = 0
+        self._writer = None
+
+    def _write(self, arrays):
+        pa = _pyarrow()
+        if self._writer is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._writer = pa.parquet.ParquetWriter(self.temporary_path, self.schema, compression=COMPRESSION)
+        table = pa.Table.from_arrays(arrays, schema=self.schema)
+        self._writer.write_table(table)
+        self.rows += table.num_rows
+
+    def write_rows(self, rows):
+        """Append a batch of converted tuples (rows engine) as one row group."""
+        if not rows:
+            return
+        pa = _pyarrow()
+        arrays = []
+        for values, kind, field in zip(zip(*rows), self.kinds, self.schema):
+            if kind == 'numeric':
+                array = pa.array(decimal_values(values, field.type), field.type)
+            else:
+                array = pa.array(values, field.type)
+            arrays.append(array)
+        self._write(arrays)
+
+    def write_frame(self, frame):
+        """Append a converted columnar-engine chunk (ISO date/time strings, numeric text) as one row group."""
+        if not len(frame):
+            return
+        pa = _pyarrow()
+        arrays = []
+        for column, kind, field in zip(self.columns, self.kinds, self.schema):
+            values = frame[column.name]
+            if kind == 'numeric':
+                text = values.astype(object).where(values.notna(), None)
+                array = pa.array(decimal_values(text, field.type), field.type)
+            elif kind == 'int':
+                array = pa.array(values, pa.int64(), from_pandas=True)
+            else:
+                array = pa.array(values, pa.string(), from_pandas=True)
+                if kind == 'date':
+                    array = array.cast(pa.date32())
+                elif kind == 'time':
+                    array = pa.compute.strptime(array, format='%H:%M:%S', unit='s').cast(field.type)
+            arrays.append(array)
+        self._write(arrays)
+
+    def close(self):
+        """Finish the file; a snapshot of a file without rows still records the schema."""
+        if self._writer is None:
+            os.makedirs(self.directory, exist_ok=True)
+            _pyarrow().parquet.write_table(self.schema.empty_table(), self.temporary_path, compression=COMPRESSION)
+        else:
+            self._writer.close()
+            self._writer = None
+
+    def discard(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if os.path.exists(self.temporary_path):
+            os.remove(self.temporary_path)
+
+    def publish(self):
+        publish_parts(self.directory, self.prefix, [self.temporary_path])
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+        return False
+
+
+def read_snapshot(snapshot_dir, table_name, columns=None, load_date=None):
+    """
+    Read a table's snapshot into a DataFrame: every load date, or only
+    `load_date`, and only `columns` when given. Files are memory-mapped.
+    """
+    pa = _pyarrow()
+    import pyarrow.dataset as ds
+    import pyarrow.fs
+    dataset = ds.dataset(os.path.join(snapshot_dir, table_name.lower()), format='parquet',
+                         partitioning=ds.partitioning(pa.schema([('load_date', pa.string())]), flavor='hive'),
+                         filesystem=pa.fs.LocalFileSystem(use_mmap=True))
+    row_filter = ds.field('load_date') == load_date.isoformat() if load_date else None
+    return dataset.to_table(columns=columns, filter=row_filter).to_pandas()
@@ -1,65 +1,177 @@
+"""
+Command-line entry point for the importers.
+
+    python main.py import --table sact_cycle --file data/sim_sact_cycle.csv --workers 4 --mode copy
+    python main.py tables
+    python main.py                # interactive: choose an importer and a file
+
+Only the chosen importer module is imported. The exit code reports the outcome:
+0 success, 1 import failed, 2 invalid arguments, 3 more rejected rows than --max-rejects.
+"""
+import argparse
 import os
-import importlib
 import sys
-from config.db_config import DATABASE_CONFIG
 
-print(sys.path, "\n")
+from importers.registry import IMPORTERS, load_importer
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_TOO_MANY_REJECTS = 3
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Import Simulacrum / SACT / RTDS CSV extracts into PostgreSQL.")
+    commands = parser.add_subparsers(dest='command')
+
+    commands.add_parser('tables', help="list the tables that can be imported")
+
+    run = commands.add_parser('import', help="import one CSV file into one table")
+    run.add_argument('--table', required=True, choices=sorted(IMPORTERS), metavar='TABLE',
+                     help="target table: " + ', '.join(sorted(IMPORTERS)))
+    run.add_argument('--file', required=True, help="CSV file (.csv, .csv.gz, .csv.bz2 or .csv.zst)")
+    run.add_argument('--mode', choices=('copy', 'insert'), default='copy')
+    run.add_argument('--engine', choices=('rows', 'columnar'), default='rows')
+    run.add_argument('--strategy', choices=('append', 'deferred', 'merge', 'delta'), default='append')
+    run.add_argument('--workers', type=int, default=1, help="conversion processes (rows engine)")
+    run.add_argument('--shards', type=int, default=1,
+                     help="split the file into this many byte ranges imported in parallel (uncompressed input)")
+    run.add_argument('--batch-size', type=int, default=10000,
+                     help="rows per batch; only the starting size unless --fixed-batch-size")
+    run.add_argument('--fixed-batch-size', action='store_true', help="do not adapt the batch size")
+    run.add_argument('--prefetch', type=int, default=2, help="batches converted ahead of the writer (0: none)")
+    run.add_argument('--resume', action='store_true', help="continue from the last checkpoint of this file")
+    run.add_argument('--unlogged', action='store_true', help="UNLOGGED staging table (deferred strategy)")
+    run.add_argument('--partitioned', action='store_true',
+                     help="create the table range-partitioned by date (sact_drug_detail, sact_cycle, rtds_combined)")
+    run.add_argument('--snapshot', metavar='DIR',
+                     help="also write a typed Parquet snapshot of the table under DIR (needs pyarrow)")
+    run.add_argument('--no-duplicate-check', dest='check_duplicates', action='store_false',
+                     help="do not track keys for duplicates while reading (left to the table's constraints)")
+    run.add_argument('--report', help="path of the JSON import report (default <file>.import_report.json)")
+    run.add_argument('--dry-run', action='store_true',
+                     help="read and convert without a database; report rows/s, rejects and peak memory")
+    run.add_argument('--sink', help="with --dry-run: write the COPY-encoded output here instead of discarding it")
+    run.add_argument('--max-rejects', type=int, default=None,
+                     help="exit with status 3 when more rows than this are rejected")
+    return parser
+
+
+def run_import(args):
+    if not os.path.isfile(args.file):
+        print(f"File error: {args.file} not found")
+        return EXIT_USAGE
+    if args.shards > 1 and args.strategy != 'append':
+        print("--shards only supports --strategy append")
+        return EXIT_USAGE
+
+    try:
+        if args.dry_run:
+            summary = load_importer(args.table)(None).dry_run(
+                args.file,
+                batch_size=args.batch_size,
+                workers=args.workers,
+                engine=args.engine,
+                adaptive=not args.fixed_batch_size,
+                prefetch=args.prefetch,
+                sink_path=args.sink,
+                report_path=args.report,
+                check_duplicates=args.check_duplicates,
+            )
+            return check_rejects(summary, args.max_rejects)
 
+        # Loaded here so that `tables`, dry runs and argument errors need no database configuration.
+        from config.db_config import DATABASE_CONFIG
 
-def get_available_importers():
-    importers = {}
-    counter = 1
-    importers_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "importers")
+        importer = load_importer(args.table)(DATABASE_CONFIG)
+        if args.shards > 1:
+            summary = importer.import_data_sharded(
+                args.file,
+                shards=args.shards,
+                batch_size=args.batch_size,
+                mode=args.mode,
+                engine=args.engine,
+                adaptive=not args.fixed_batch_size,
+                prefetch=args.prefetch,
+                partitioned=args.partitioned,
+                report_path=args.report,
+                snapshot_dir=args.snapshot,
+                resume=args.resume,
+                check_duplicates=args.check_duplicates,
+            )
+        else:
+            summary = importer.import_data_bulk(
+                args.file,
+                batch_size=args.batch_size,
+                mode=args.mode,
+                workers=args.workers,
+                engine=args.engine,
+                resume=args.resume,
+                strategy=args.strategy,
+                unlogged=args.unlogged,
+                report_path=args.report,
+                adaptive=not args.fixed_batch_size,
+                prefetch=args.prefetch,
+                partitioned=args.partitioned,
+                snapshot_dir=args.snapshot,
+                check_duplicates=args.check_duplicates,
+            )
+    except Exception as e:
+        print(f"Import of {args.table} failed: {e}")
+        return EXIT_FAILED
+    return check_rejects(summary, args.max_rejects)
 
-    for file in os.listdir(importers_dir):
-        if file.endswith('_importer.py') and file != 'base_importer.py':
-            module_name = file[:-3]  # Remove '.py'
-            # Build class name by capitalizing each word (excluding the last 'importer' part)
-            class_name = ''.join(word.capitalize() for word in module_name.split('_')[:-1]) + 'Importer'
-            print(f"Detected module: {module_name}, \nclass: {class_name}\n")
-            importers[counter] = (module_name, class_name)
-            counter += 1
-    return importers
 
+def check_rejects(summary, max_rejects):
+    if max_rejects is not None and summary['rows_failed'] > max_rejects:
+        print(f"{summary['rows_failed']} rows were rejected (limit {max_rejects}).")
+        return EXIT_TOO_MANY_REJECTS
+    return EXIT_OK
 
-def main():
-    importers = get_available_importers()
 
+def interactive():
+    tables = sorted(IMPORTERS)
     print("Available importers: ")
-    for num, (module, class_name) in importers.items():
-        print(f"{num}: {module}")
+    for num, table in enumerate(tables, start=1):
+        print(f"{num}: {table}")
 
     try:
         choice = int(input("\nChoose an importer number: "))
-        if choice not in importers:
+        if not 1 <= choice <= len(tables):
             raise ValueError("Invalid importer number")
 
-        module_name, class_name = importers[choice]
-        module = importlib.import_module(f"importers.{module_name}")
-        importer_class = getattr(module, class_name)
-
-        file_path = input("Enter CSV file path: ")
+        file_path = input("Enter CSV file path (.csv, .csv.gz, .csv.bz2 or .csv.zst): ")
         if not os.path.isfile(file_path):
             raise FileNotFoundError("File not found")
 
-        # Instantiate the importer with the database configuration
-        importer = importer_class(DATABASE_CONFIG)
-
-        # Use the bulk import method if available; otherwise, fallback to the row-by-row method.
-        if hasattr(importer, "import_data_bulk"):
-            importer.import_data_bulk(file_path, batch_size=10000)
-        else:
-            importer.import_rows(file_path)
+        from importers.compression import detect_compression
+        compression = detect_compression(file_path)
+        if compression:
+            print(f"Detected {compression} compression; the file will be decompressed while it is imported.")
 
+        resume = input("Resume from the last checkpoint if one exists? (y/N): ").strip().lower() == 'y'
     except ValueError as ve:
         print(f"Invalid input: {ve}")
+        return EXIT_USAGE
     except FileNotFoundError as fnf:
         print(f"File error: {fnf}")
-    except AttributeError as ae:
-        print(f"Importer class not found: {ae}")
-    except Exception as e:
-        print(f"Unexpected error: {e}")
+        return EXIT_USAGE
+
+    args = build_parser().parse_args(['import', '--table', tables[choice - 1], '--file', file_path])
+    args.resume = resume
+    return run_import(args)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == 'tables':
+        for table in sorted(IMPORTERS):
+            print(table)
+        return EXIT_OK
+    if args.command == 'import':
+        return run_import(args)
+    return interactive()
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
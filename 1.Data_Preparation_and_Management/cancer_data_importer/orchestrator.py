@@ -0,0 +1,161 @@
+"""
+Import several tables at once from a manifest.
+
+Usage:
+    python orchestrator.py manifest.json
+
+Manifest format (JSON). Each table maps to a CSV path, or to an object with the
+file and optional import settings:
+
+    {
+        "max_connections": 4,
+        "batch_size": 10000,
+        "adaptive": true,
+        "tables": {
+            "av_patient": "data/sim_av_patient.csv",
+            "av_tumour": {"file": "data/sim_av_tumour.csv", "depends_on": ["av_patient"]},
+            "sact_drug_detail": {"file": "data/sim_sact_drug_detail.csv", "engine": "columnar", "partitioned": true}
+        }
+    }
+
+Tables are imported concurrently over a connection pool of `max_connections`
+connections. A table starts only after every table in its `depends_on` list
+has finished successfully.
+
+Any import_data_bulk setting in IMPORT_OPTIONS (strategy, engine, prefetch,
+unlogged, snapshot_dir, ...) can be given at the top level, as the default
+for every table, or per table. snapshot_dir and report_path are relative to
+the manifest. Sharded imports are not run from a manifest.
+"""
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from psycopg2.pool import ThreadedConnectionPool
+
+from config.db_config import DATABASE_CONFIG
+from importers.registry import load_importer
+
+# Per-table settings passed through to import_data_bulk.
+IMPORT_OPTIONS = ('batch_size', 'mode', 'workers', 'engine', 'strategy', 'resume', 'unlogged', 'adaptive',
+                  'prefetch', 'partitioned', 'snapshot_dir', 'check_duplicates', 'report_path')
+# Settings holding a path, which is relative to the manifest.
+PATH_OPTIONS = ('snapshot_dir', 'report_path')
+
+
+def load_manifest(manifest_path):
+    """Read a manifest and return (settings, {table: task}) with paths resolved."""
+    with open(manifest_path, 'r', encoding='utf-8') as manifest_file:
+        manifest = json.load(manifest_file)
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    tasks = {}
+    for table, entry in manifest['tables'].items():
+        if isinstance(entry, str):
+            entry = {'file': entry}
+        task = dict(entry)
+        for key in ('file',) + PATH_OPTIONS:
+            if task.get(key):
+                task[key] = os.path.join(base_dir, task[key])
+        task['depends_on'] = [dependency.lower() for dependency in task.get('depends_on', [])]
+        tasks[table.lower()] = task
+
+    for table, task in tasks.items():
+        missing = [dependency for dependency in task['depends_on'] if dependency not in tasks]
+        if missing:
+            raise ValueError(f"{table} depends on tables not in the manifest: {', '.join(missing)}")
+        if not os.path.isfile(task['file']):
+            raise FileNotFoundError(f"{table}: file not found: {task['file']}")
+        load_importer(table)  # fail fast on unknown tables
+
+    settings = {key: value for key, value in manifest.items() if key != 'tables'}
+    for key in PATH_OPTIONS:
+        if settings.get(key):
+            settings[key] = os.path.join(base_dir, settings[key])
+    return settings, tasks
+
+
+def run_import(table, task, pool, defaults):
+    importer_class = load_importer(table)
+    options = {key: task.get(key, defaults.get(key)) for key in IMPORT_OPTIONS}
+    options = {key: value for key, value in options.items() if value is not None}
+    importer = importer_class(DATABASE_CONFIG, pool=pool)
+    return importer.import_data_bulk(task['file'], **options)
+
+
+def run_manifest(settings, tasks, config=DATABASE_CONFIG):
+    """
+    Import every table in `tasks`, respecting depends_on.
+    Returns {table: summary dict or exception}.
+    """
+    max_connections = settings.get('max_connections', 4)
+    pool = ThreadedConnectionPool(1, max_connections, **config)
+    results = {}
+    pending = dict(tasks)
+    running = {}
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_connections) as executor:
+            while pending or running:
+                # Start every table whose dependencies have all succeeded
+                for table, task in list(pending.items()):
+                    dependencies = task['depends_on']
+                    failed = [d for d in dependencies if isinstance(results.get(d), Exception)]
+                    if failed:
+                        results[table] = RuntimeError(f"skipped: dependency {', '.join(failed)} failed")
+                        del pending[table]
+                    elif all(d in results for d in dependencies):
+                        running[executor.submit(run_import, table, task, pool, settings)] = table
+                        del pending[table]
+
+                if not running:
+                    if pending:
+                        raise ValueError(f"Circular depends_on between: {', '.join(pending)}")
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    table = running.pop(future)
+                    try:
+                        results[table] = future.result()
+                    except Exception as e:
+                        print(f"Import of {table} failed: {e}")
+                        results[table] = e
+    finally:
+        pool.closeall()
+    return results
+
+
+def print_report(results, elapsed_time):
+    print("\nManifest import completed:")
+    total_rows = 0
+    total_bytes = 0
+    for table, result in sorted(results.items()):
+        if isinstance(result, Exception):
+            print(f"  {table}: FAILED ({result})")
+            continue
+        total_rows += result['rows_inserted']
+        total_bytes += result['bytes']
+        rate = result['rows_inserted'] / result['elapsed_seconds'] if result['elapsed_seconds'] else 0
+        print(f"  {table}: {result['rows_inserted']} rows inserted, {result['rows_failed']} failed/skipped, "
+              f"{result['elapsed_seconds']:.2f}s ({rate:,.0f} rows/s)")
+    print(f"  Total: {total_rows} rows, {total_bytes / 1024 ** 2:.1f} MB in {elapsed_time:.2f} seconds "
+          f"({total_rows / elapsed_time if elapsed_time else 0:,.0f} rows/s aggregate)")
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("Usage: python orchestrator.py manifest.json")
+        return 2
+
+    start_time = time.time()
+    settings, tasks = load_manifest(sys.argv[1])
+    results = run_manifest(settings, tasks)
+    print_report(results, time.time() - start_time)
+    return 1 if any(isinstance(result, Exception) for result in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
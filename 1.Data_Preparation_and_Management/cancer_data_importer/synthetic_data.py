@@ -0,0 +1,423 @@
+"""
+Write synthetic, Simulacrum-shaped CSV extracts for every table in importers/registry.py.
+
+Usage:
+    python synthetic_data.py --out data/synthetic --scale 10 --seed 42 [--gzip]
+
+Scale 1 is 10,000 patients; every other table fans out from them (tumours,
+genes, regimens -> cycles -> drug details, outcomes, radiotherapy episodes ->
+prescriptions -> exposures). Keys are consistent across tables: LINKNUMBER /
+LINK_NUMBER, PATIENTID / ENCORE_PATIENT_ID, TUMOURID, MERGED_REGIMEN_ID,
+MERGED_CYCLE_ID, RADIOTHERAPYEPISODEID and PRESCRIPTIONID all join as they do
+in the real extracts. The same seed always produces the same files, byte for
+byte, compressed or not.
+
+Patients are generated one at a time and their rows are written straight to
+every table's file, so memory does not grow with the scale. The columns and
+their order come from each importer's `columns`, so the files always match
+what the importers expect. A manifest.json for orchestrator.py is written
+next to the files.
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import random
+import re
+import sys
+from datetime import date, timedelta
+
+from tqdm import tqdm
+
+from importers.registry import IMPORTERS, load_importer
+from importers.schema import column_kind
+
+# Patients at scale 1.
+BASE_PATIENTS = 10000
+# Probability that a nullable column without an explicit rule below is empty.
+DEFAULT_NULL_RATE = 0.02
+FIRST_DIAGNOSIS = date(2013, 1, 1)
+LAST_DIAGNOSIS = date(2019, 12, 31)
+LAST_FOLLOW_UP = date(2022, 12, 31)
+
+# Columns that identify or link rows; never left empty.
+KEY_COLUMNS = {
+    'PATIENTID', 'ENCORE_PATIENT_ID', 'LINKNUMBER', 'LINK_NUMBER', 'TUMOURID', 'GENEID',
+    'MERGED_REGIMEN_ID', 'MERGED_CYCLE_ID', 'MERGED_DRUG_DETAIL_ID',
+    'RADIOTHERAPYEPISODEID', 'PRESCRIPTIONID', 'ATTENDID',
+}
+
+# (ICD-10 site, weight) for tumours; roughly the mix of the registry.
+SITES = (('C50', 15), ('C61', 13), ('C34', 12), ('C18', 8), ('C44', 10), ('C43', 4), ('C20', 4),
+         ('C67', 3), ('C64', 3), ('C25', 3), ('C16', 2), ('C56', 2), ('C71', 1), ('C22', 1), ('C73', 1))
+STAGES = (('1', 20), ('2', 18), ('3', 14), ('4', 16), ('1A', 4), ('2B', 4), ('3C', 3), ('X', 6), ('U', 15))
+GENES = ('EGFR', 'KRAS', 'BRAF', 'BRCA1', 'BRCA2', 'ALK', 'ERBB2', 'TP53', 'NRAS', 'PIK3CA', 'MLH1', 'ROS1')
+# (mapped regimen, benchmark group, weight)
+REGIMENS = (
+    ('Capecitabine', 'CAPECITABINE', 10),
+    ('FOLFOX', 'FLUOROURACIL + OXALIPLATIN', 6),
+    ('Carboplatin + Paclitaxel', 'CARBOPLATIN + PACLITAXEL', 7),
+    ('Irinotecan + Modified De Gramont', 'FLUOROURACIL + IRINOTECAN', 3),
+    ('Docetaxel', 'DOCETAXEL', 6),
+    ('Pembrolizumab', 'PEMBROLIZUMAB', 6),
+    ('Letrozole', 'LETROZOLE', 5),
+    ('Zoledronic acid', 'ZOLEDRONIC ACID', 5),
+    ('AC', 'CYCLOPHOSPHAMIDE + DOXORUBICIN', 4),
+    ('Gemcitabine + Carboplatin', 'CARBOPLATIN + GEMCITABINE', 3),
+    ('Trastuzumab', 'TRASTUZUMAB', 4),
+    ('Not matched', 'NOT MATCHED', 3),
+)
+TYPICAL_DOSES = (2.5, 10, 75, 125, 150, 200, 400, 500, 750, 1000, 1500, 2000)
+RT_SITES = ('BRE', 'PRO', 'LUN', 'REC', 'BRA', 'HNK', 'BON', 'BLA', 'OES')
+RT_SCHEDULES = ((40, 15), (26, 5), (8, 1), (20, 5), (60, 30), (55, 20), (36.25, 5), (50, 25))
+
+
+def _width(column):
+    """Character length of a CHAR/VARCHAR column, or None."""
+    match = re.search(r'\((\d+)\)', column.sql_type)
+    return int(match.group(1)) if match else None
+
+
+class SyntheticExtract:
+    """
+    Writes one synthetic extract. All randomness comes from one seeded
+    random.Random consumed in a fixed order, so a seed and scale always give
+    the same files.
+    """
+
+    def __init__(self, out_dir, scale=1.0, seed=0, compress=False):
+        if scale <= 0:
+            raise ValueError("scale must be positive")
+        self.out_dir = out_dir
+        self.patients = max(1, round(BASE_PATIENTS * scale))
+        self.rng = random.Random(seed)
+        self.compress = compress
+        self.columns = {table: load_importer(table).columns for table in IMPORTERS}
+        self.rows = dict.fromkeys(IMPORTERS, 0)
+        self.paths = {}
+        self._files = {}
+        self._writers = {}
+        # Generic values for text columns without an explicit rule, per (table, column).
+        self._vocabularies = {}
+        self._ids = {}
+
+    def _next_id(self, name, first):
+        self._ids[name] = self._ids.get(name, first - 1) + 1
+        return self._ids[name]
+
+    def _null(self, rate, value):
+        return None if self.rng.random() < rate else value
+
+    def _weighted(self, choices):
+        return self.rng.choices([choice[0] for choice in choices], [choice[-1] for choice in choices])[0]
+
+    def _days_after(self, day, low, high):
+        return min(LAST_FOLLOW_UP, day + timedelta(days=self.rng.randint(low, high)))
+
+    def _filler(self, table, column, on):
+        """A plausible value for a column no rule below sets, by its SQL type."""
+        kind = column_kind(column)
+        if kind == 'int':
+            return self.rng.randint(0, 20)
+        if kind == 'numeric':
+            return round(self.rng.uniform(0, 100), 1)
+        if kind == 'date':
+            return self._days_after(on, 0, 365)
+        if kind == 'time':
+            return f"{self.rng.randint(8, 18):02d}:{self.rng.choice((0, 15, 30, 45)):02d}"
+        vocabulary = self._vocabularies.get((table, column.name))
+        if vocabulary is None:
+            width = _width(column) or 30
+            vocabulary = ('Y', 'N') if width == 1 else tuple(
+                f"{column.name[0]}{code}"[:width] for code in range(1, 9))
+            self._vocabularies[(table, column.name)] = vocabulary
+        return self.rng.choice(vocabulary)
+
+    def _write(self, table, values, on):
+        """
+        Write one row: `values` holds the columns set by the rules below (None
+        for an empty field); other columns are filled by type and left empty
+        at DEFAULT_NULL_RATE.
+        """
+        row = []
+        for column in self.columns[table]:
+            if column.name in values:
+                value = values[column.name]
+            else:
+                value = self._filler(table, column, on)
+                if column.nullable and not column.primary_key and column.name not in KEY_COLUMNS:
+                    value = self._null(DEFAULT_NULL_RATE, value)
+            row.append('' if value is None else value)
+        self._writers[table].writerow(row)
+        self.rows[table] += 1
+
+    def _open(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        for table in IMPORTERS:
+            path = os.path.join(self.out_dir, f"sim_{table}.csv{'.gz' if self.compress else ''}")
+            if self.compress:
+                # mtime=0: gzip.open stores the current time in the header, so files differed between runs.
+                csv_file = io.TextIOWrapper(gzip.GzipFile(path, 'wb', compresslevel=6, mtime=0),
+                                            encoding='utf-8', newline='')
+            else:
+                csv_file = open(path, 'w', encoding='utf-8', newline='', buffering=1 << 20)
+            self.paths[table] = path
+            self._files[table] = csv_file
+            self._writers[table] = csv.writer(csv_file)
+            self._writers[table].writerow([column.name for column in self.columns[table]])
+
+    def _close(self):
+        for csv_file in self._files.values():
+            csv_file.close()
+        self._files = {}
+
+    def write(self):
+        """Generate every table and the manifest. Returns {table: rows written}."""
+        self._open()
+        try:
+            for index in tqdm(range(self.patients), desc="Generating patients", unit=" patients"):
+                self._patient(index)
+        finally:
+            self._close()
+        self._write_manifest()
+        return dict(self.rows)
+
+    def _write_manifest(self):
+        tables = {table: {'file': os.path.basename(path)} for table, path in self.paths.items()}
+        tables['av_tumour']['depends_on'] = ['av_patient']
+        tables['av_gene']['depends_on'] = ['av_tumour']
+        with open(os.path.join(self.out_dir, 'manifest.json'), 'w', encoding='utf-8') as manifest_file:
+            json.dump({'max_connections': 4, 'adaptive': True, 'tables': tables}, manifest_file, indent=2)
+
+    # --- one patient and everything that hangs off them -------------------------------------
+
+    def _patient(self, index):
+        rng = self.rng
+        patient_id = 10000001 + index
+        link_number = 100000001 + index
+        diagnosed = FIRST_DIAGNOSIS + timedelta(days=rng.randint(0, (LAST_DIAGNOSIS - FIRST_DIAGNOSIS).days))
+        gender = self._weighted((('1', 49), ('2', 50), ('9', 1)))
+        died = rng.random() < 0.57
+        site = self._weighted(SITES)
+
+        death_cause = f"{site}{rng.randint(0, 9)}" if died else None
+        self._write('av_patient', {
+            'PATIENTID': patient_id,
+            'GENDER': gender,
+            'ETHNICITY': self._null(0.08, self._weighted((('A', 80), ('B', 2), ('C', 5), ('H', 2), ('J', 2),
+                                                         ('M', 1), ('N', 1), ('Z', 5), ('X', 2)))),
+            'DEATHCAUSECODE_1A': death_cause,
+            'DEATHCAUSECODE_1B': self._null(0.6, death_cause) if died else None,
+            'DEATHCAUSECODE_1C': None,
+            'DEATHCAUSECODE_2': self._null(0.7, 'I10') if died else None,
+            'DEATHCAUSECODE_UNDERLYING': death_cause,
+            'DEATHLOCATIONCODE': rng.choice(('1', '2', '3', '4', '5')) if died else None,
+            'VITALSTATUS': 'D' if died else 'A',
+            'VITALSTATUSDATE': self._days_after(diagnosed, 30, 3000),
+            'LINKNUMBER': link_number,
+        }, diagnosed)
+
+        tumours = self._weighted(((1, 90), (2, 9), (3, 1)))
+        for number in range(tumours):
+            tumour_site = site if number == 0 else self._weighted(SITES)
+            tumour_diagnosed = diagnosed if number == 0 else self._days_after(diagnosed, 30, 1500)
+            tumour_id = self._next_id('tumour', 10000001)
+            self._write('av_tumour', {
+                'TUMOURID': tumour_id,
+                'GENDER': gender,
+                'PATIENTID': patient_id,
+                'DIAGNOSISDATEBEST': tumour_diagnosed,
+                'SITE_ICD10_O2_3CHAR': tumour_site,
+                'SITE_ICD10_O2': f"{tumour_site}{rng.randint(0, 9)}",
+                'SITE_ICD10R4_O2_3CHAR_FROM2013': tumour_site,
+                'SITE_ICD10R4_O2_FROM2013': f"{tumour_site}{rng.randint(0, 9)}",
+                'STAGE_BEST': self._weighted(STAGES),
+                'GRADE': self._null(0.3, rng.choice(('G1', 'G2', 'G3', 'GX'))),
+                'AGE': max(0, min(104, round(rng.gauss(67, 14)))),
+                'DATE_FIRST_SURGERY': self._null(0.6, self._days_after(tumour_diagnosed, 10, 120)),
+                'COMORBIDITIES_27_03': self._null(0.4, str(rng.randint(0, 12))),
+                'GLEASON_COMBINED': rng.randint(6, 10) if tumour_site == 'C61' and rng.random() < 0.6 else None,
+            }, tumour_diagnosed)
+            if rng.random() < 0.3:
+                self._genes(patient_id, tumour_id, tumour_diagnosed)
+
+        if rng.random() < 0.3:
+            self._regimens(patient_id, link_number, diagnosed)
+        if rng.random() < 0.15:
+            self._radiotherapy(patient_id, diagnosed)
+
+    def _genes(self, patient_id, tumour_id, diagnosed):
+        rng = self.rng
+        for gene in rng.sample(GENES, rng.randint(1, 4)):
+            tested = self._days_after(diagnosed, 0, 90)
+            variant = self._null(0.3, f"c.{rng.randint(100, 3000)}{rng.choice('ACGT')}>{rng.choice('ACGT')}")
+            self._write('av_gene', {
+                'GENEID': str(self._next_id('gene', 1000001)),
+                'TUMOURID': tumour_id,
+                'PATIENTID': patient_id,
+                'GENE_DESC': gene,
+                'GENE': GENES.index(gene) + 1,
+                'COUNT_TESTS': rng.randint(1, 3),
+                'SEQ_VAR': variant,
+                'NO_OF_SEQ_VARS': 1 if variant else None,
+                'DATE_OVERALL_TS': tested,
+                'MIN_DATE': tested,
+                'MAX_DATE': self._days_after(tested, 0, 60),
+            }, tested)
+
+    def _regimens(self, patient_id, link_number, diagnosed):
+        rng = self.rng
+        decided = self._days_after(diagnosed, 14, 200)
+        for _ in range(self._weighted(((1, 55), (2, 25), (3, 12), (4, 5), (5, 2), (6, 1)))):
+            regimen_id = self._next_id('regimen', 10030621)
+            mapped, benchmark, _ = REGIMENS[[r[0] for r in REGIMENS].index(self._weighted(REGIMENS))]
+            started = self._days_after(decided, 0, 30)
+            self._write('sact_regimen', {
+                'ENCORE_PATIENT_ID': patient_id,
+                'MERGED_REGIMEN_ID': regimen_id,
+                'HEIGHT_AT_START_OF_REGIMEN': self._null(0.2, round(rng.gauss(1.68, 0.1), 2)),
+                'WEIGHT_AT_START_OF_REGIMEN': self._null(0.15, round(rng.gauss(75, 15), 1)),
+                'INTENT_OF_TREATMENT': self._weighted(((None, 29), ('P', 33), ('A', 9), ('C', 9), ('N', 6),
+                                                       ('03', 4), ('D', 1))),
+                'DATE_DECISION_TO_TREAT': decided,
+                'START_DATE_OF_REGIMEN': started,
+                'MAPPED_REGIMEN': self._null(0.07, mapped),
+                'CLINICAL_TRIAL': self._weighted((('02', 72), (None, 13), ('N', 8), ('01', 3), ('2', 2),
+                                                  ('99', 1), ('Y', 1))),
+                'CHEMO_RADIATION': self._weighted((('N', 54), (None, 44), ('Y', 2))),
+                'BENCHMARK_GROUP': benchmark,
+                'LINK_NUMBER': link_number,
+            }, started)
+
+            last_cycle = self._cycles(regimen_id, started, benchmark)
+            if rng.random() < 0.85:
+                self._write('sact_outcome', {
+                    'MERGED_REGIMEN_ID': regimen_id,
+                    'DATE_OF_FINAL_TREATMENT': self._days_after(last_cycle, 0, 21),
+                    'REGIMEN_MOD_DOSE_REDUCTION': self._null(0.17, 'Y' if rng.random() < 0.3 else 'N'),
+                    'REGIMEN_MOD_TIME_DELAY': self._null(0.43, 'Y' if rng.random() < 0.25 else 'N'),
+                    'REGIMEN_MOD_STOPPED_EARLY': self._null(0.4, 'Y' if rng.random() < 0.19 else 'N'),
+                    'REGIMEN_OUTCOME_SUMMARY': self._null(0.3, rng.choice(('1', '2', '3', '4', '5', '9'))),
+                }, last_cycle)
+            decided = self._days_after(last_cycle, 14, 300)
+
+    def _cycles(self, regimen_id, started, benchmark):
+        """Write a regimen's cycles and their drug administrations; returns the last cycle's start."""
+        rng = self.rng
+        drugs = benchmark.split(' + ')
+        interval = rng.choice((7, 14, 21, 28))
+        cycle_start = started
+        # Cycles per regimen: median 3, mean about 4, long tail.
+        for cycle_number in range(1, 2 + min(40, int(rng.expovariate(1 / 3.5)))):
+            cycle_id = self._next_id('cycle', 10000001)
+            self._write('sact_cycle', {
+                'MERGED_REGIMEN_ID': regimen_id,
+                'MERGED_CYCLE_ID': cycle_id,
+                'CYCLE_NUMBER': cycle_number,
+                'START_DATE_OF_CYCLE': self._null(0.01, cycle_start),
+                'OPCS_PROCUREMENT_CODE': self._null(0.61, rng.choice(('X701', 'X702', 'X711', 'X712', 'X721'))),
+                'PERF_STATUS_START_OF_CYCLE': self._null(0.2, rng.choice(('0', '1', '2', '3', '4'))),
+            }, cycle_start)
+            for drug in drugs:
+                dose = rng.choice(TYPICAL_DOSES)
+                for day in range(1 if rng.random() < 0.8 else rng.randint(2, 5)):
+                    self._write('sact_drug_detail', {
+                        'MERGED_DRUG_DETAIL_ID': self._next_id('drug_detail', 20000001),
+                        'MERGED_CYCLE_ID': cycle_id,
+                        'ACTUAL_DOSE_PER_ADMINISTRATION': self._null(0.03, dose),
+                        'OPCS_DELIVERY_CODE': self._null(0.3, rng.choice(('X721', 'X722', 'X723', 'X724', 'X729'))),
+                        'ADMINISTRATION_ROUTE': self._null(0.05, rng.choice(('1', '2', '3', '4'))),
+                        'ADMINISTRATION_DATE': self._null(0.02, self._days_after(cycle_start, day, day)),
+                        'DRUG_GROUP': drug,
+                    }, cycle_start)
+            last_cycle = cycle_start
+            cycle_start = self._days_after(cycle_start, interval, interval + 7)
+        return last_cycle
+
+    def _radiotherapy(self, patient_id, diagnosed):
+        """Episodes -> prescriptions -> one exposure per fraction; Rtds_Combined gets one row per exposure."""
+        rng = self.rng
+        for _ in range(1 if rng.random() < 0.85 else 2):
+            episode_id = self._next_id('episode', 30000001)
+            decided = self._days_after(diagnosed, 20, 400)
+            earliest = self._days_after(decided, 0, 14)
+            first_appointment = self._days_after(earliest, 0, 30)
+            link_code = str(rng.randint(1, 3))
+            episode = {
+                'PATIENTID': patient_id,
+                'RADIOTHERAPYEPISODEID': episode_id,
+                'ATTENDID': f"{episode_id}-001",
+                'APPTDATE': first_appointment,
+                'LINKCODE': link_code,
+                'DECISIONTOTREATDATE': decided,
+                'EARLIESTCLINAPPROPDATE': self._null(0.1, earliest),
+                'RADIOTHERAPYPRIORITY': self._null(0.05, rng.choice(('U', 'R', 'E'))),
+                'RADIOTHERAPYINTENT': self._null(0.05, rng.choice(('01', '02', '03'))),
+            }
+            self._write('rtds_episode', episode, first_appointment)
+
+            appointment = first_appointment
+            for _ in range(1 if rng.random() < 0.8 else 2):
+                prescription_id = self._next_id('prescription', 40000001)
+                dose, fractions = rng.choice(RT_SCHEDULES)
+                delivered = fractions if rng.random() < 0.95 else rng.randint(1, fractions)
+                prescription = {
+                    'PATIENTID': patient_id,
+                    'PRESCRIPTIONID': prescription_id,
+                    'RTTREATMENTMODALITY': rng.choice((1, 2, 3, 4, 5, 6)),
+                    'RTPRESCRIBEDDOSE': dose,
+                    'PRESCRIBEDFRACTIONS': fractions,
+                    'RTACTUALDOSE': round(dose * delivered / fractions, 2),
+                    'RTACTUALFRACTIONS': delivered,
+                    'RTTREATMENTREGION': rng.choice(('P', 'R', 'M', 'A', 'O')),
+                    'RTTREATMENTANATOMICALSITE': rng.choice(RT_SITES),
+                    'RADIOTHERAPYEPISODEID': episode_id,
+                    'ATTENDID': episode['ATTENDID'],
+                    'APPTDATE': appointment,
+                    'LINKCODE': link_code,
+                }
+                self._write('rtds_prescription', prescription, appointment)
+
+                beam_type = self._weighted((('Photon', 90), ('Electron', 8), ('Proton', 2)))
+                for fraction in range(1, delivered + 1):
+                    exposure = {
+                        'PRESCRIPTIONID': prescription_id,
+                        'RADIOISOTOPE': None if rng.random() < 0.97 else 'I-125',
+                        'RADIOTHERAPYBEAMTYPE': beam_type,
+                        'RADIOTHERAPYBEAMENERGY': rng.choice((6, 10, 15, 18)),
+                        'TIMEOFEXPOSURE': f"{rng.randint(8, 18):02d}:{rng.choice((0, 15, 30, 45)):02d}",
+                        'RADIOTHERAPYEPISODEID': episode_id,
+                        'ATTENDID': f"{episode_id}-{fraction:03d}",
+                        'APPTDATE': appointment,
+                        'LINKCODE': link_code,
+                        'PATIENTID': patient_id,
+                    }
+                    self._write('rtds_exposure', exposure, appointment)
+                    self._write('rtds_combined', {**episode, **prescription, **exposure}, appointment)
+                    # Weekday fractions: mostly the next day, over a weekend three days on.
+                    appointment = self._days_after(appointment, 1, 1 if rng.random() < 0.8 else 3)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic Simulacrum-shaped CSV extracts.")
+    parser.add_argument('--out', default=os.path.join('data', 'synthetic'), help="output directory")
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help=f"size multiplier; 1 = {BASE_PATIENTS:,} patients (use up to 100)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed; the same seed gives the same files")
+    parser.add_argument('--gzip', action='store_true', help="write .csv.gz files")
+    args = parser.parse_args(argv)
+
+    extract = SyntheticExtract(args.out, scale=args.scale, seed=args.seed, compress=args.gzip)
+    rows = extract.write()
+    print(f"\nSynthetic extract written to {args.out} (scale {args.scale:g}, seed {args.seed}):")
+    for table, count in rows.items():
+        size = os.path.getsize(extract.paths[table]) / 1024 ** 2
+        print(f"  {table}: {count} rows, {size:.1f} MB")
+    print(f"  Manifest: {os.path.join(args.out, 'manifest.json')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Shared fixtures for the importer tests.
+
+Tests that need PostgreSQL use the `db_config` fixture. They run against the
+database named by IMPORTER_TEST_DATABASE, with the other connection settings
+taken from the usual POSTGRES_* variables, and are skipped when it is not set.
+They drop and recreate the importer tables there, so never point it at a
+database holding real data.
+"""
+import os
+import sys
+
+import psycopg2
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def write_csv(tmp_path):
+    """write_csv(name, lines): write `lines` (without newlines) to tmp_path/name and return the path."""
+    def write(name, lines):
+        path = tmp_path / name
+        with open(path, 'w', encoding='utf-8', newline='') as csv_file:
+            csv_file.write(''.join(f"{line}\n" for line in lines))
+        return str(path)
+    return write
+
+
+@pytest.fixture
+def interrupt_batch():
+    """interrupt_batch(importer, method='write_batch', batch=2): raise KeyboardInterrupt on that batch's write."""
+    def interrupt(importer, method='write_batch', batch=2):
+        write = getattr(importer, method)
+        calls = []
+
+        def interrupted(data, mode='copy'):
+            calls.append(len(data))
+            if len(calls) == batch:
+                raise KeyboardInterrupt
+            return write(data, mode)
+        setattr(importer, method, interrupted)
+    return interrupt
+
+
+def run_query(config, sql, params=None):
+    conn = psycopg2.connect(**config)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall() if cursor.description else None
+        conn.commit()
+        return rows
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def db_config():
+    database = os.getenv('IMPORTER_TEST_DATABASE')
+    if not database:
+        pytest.skip("IMPORTER_TEST_DATABASE is not set")
+    config = {
+        'dbname': database,
+        'user': os.getenv('POSTGRES_USER'),
+        'password': os.getenv('POSTGRES_PASSWORD'),
+        'host': os.getenv('POSTGRES_HOST'),
+        'port': os.getenv('POSTGRES_PORT'),
+    }
+    try:
+        psycopg2.connect(**config).close()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"test database not reachable: {e}")
+    return config
+
+
+@pytest.fixture
+def query(db_config):
+    """query(sql, params=None): run one statement on the test database and return its rows."""
+    return lambda sql, params=None: run_query(db_config, sql, params)
+
+
+@pytest.fixture
+def fresh_tables(db_config):
+    """Drop the given tables (and their checkpoints) now and again after the test."""
+    tables = []
+
+    def drop(*names):
+        tables.extend(names)
+        for name in names:
+            run_query(db_config, f"DROP TABLE IF EXISTS {name} CASCADE")
+        run_query(db_config, "DROP TABLE IF EXISTS import_checkpoint")
+        run_query(db_config, "DROP TABLE IF EXISTS import_fingerprint")
+        run_query(db_config, "DROP TABLE IF EXISTS import_fingerprint_state")
+
+    yield drop
+    for name in tables:
+        run_query(db_config, f"DROP TABLE IF EXISTS {name} CASCADE")
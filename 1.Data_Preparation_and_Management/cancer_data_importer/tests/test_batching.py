@@ -0,0 +1,71 @@
+import math
+
+from importers import batching
+from importers.batching import BatchSizer
+
+
+def _feed(sizer, seconds_for, batches=100):
+    """Record full batches that take seconds_for(size) until the sizer settles; returns the sizes tried."""
+    sizes = []
+    for _ in range(batches):
+        if sizer.settled:
+            break
+        sizes.append(sizer.size)
+        sizer.record(sizer.size, seconds_for(sizer.size))
+    return sizes
+
+
+def test_fixed_size_never_changes():
+    sizer = BatchSizer(500)
+    assert sizer.settled
+    for _ in range(10):
+        sizer.record(500, 10.0)
+    assert sizer.size == 500
+
+
+def test_adaptive_size_climbs_to_the_fastest_size():
+    # Throughput peaks at 20000 rows per batch.
+    def seconds_for(size):
+        return size / (100000 * math.exp(-math.log(size / 20000) ** 2))
+    sizer = BatchSizer(10000, adaptive=True)
+    sizes = _feed(sizer, seconds_for)
+    assert sizer.settled
+    assert sizer.size == 20000
+    assert 40000 in sizes and max(sizes) < 50000
+
+
+def test_adaptive_size_stays_within_its_limits():
+    sizer = BatchSizer(10, adaptive=True, min_size=1000, max_size=200000)
+    assert sizer.size == 1000
+    # A batch takes one second whatever its size: larger is always faster, up to max_size.
+    _feed(sizer, lambda size: 1.0)
+    assert sizer.settled and sizer.size == 200000
+
+
+def test_warm_up_and_short_batches_are_not_measured():
+    sizer = BatchSizer(10000, adaptive=True, samples=1)
+    sizer.record(10000, 1.0)  # warm-up
+    sizer.record(1234, 0.001)  # the last, short batch of a file
+    assert sizer.size == 10000
+    sizer.record(10000, 1.0)
+    assert sizer.size == 20000
+
+
+def test_slow_batches_cap_the_size():
+    sizer = BatchSizer(40000, adaptive=True, max_latency=5.0)
+    _feed(sizer, lambda size: 6.0, batches=3)
+    assert sizer.max_size == 20000
+    assert sizer.size == 20000
+    assert not sizer.settled
+
+
+def test_memory_limit_caps_the_size(monkeypatch):
+    monkeypatch.setattr(batching, 'current_rss_mb', lambda: 4096)
+    sizer = BatchSizer(40000, adaptive=True, memory_limit_mb=2048)
+    _feed(sizer, lambda size: 0.5, batches=3)
+    assert sizer.max_size == 20000
+    assert sizer.size == 20000
+    # It never grows past the cap again.
+    monkeypatch.setattr(batching, 'current_rss_mb', lambda: 100)
+    _feed(sizer, lambda size: 0.5)
+    assert sizer.size <= 20000
@@ -0,0 +1,30 @@
+import pytest
+
+from importers.sact_cycle_importer import SactCycleImporter
+
+# SACT_CYCLE has no required column, so a blank line converted by mistake becomes an all-NULL row.
+LINES = [
+    "MERGED_REGIMEN_ID,MERGED_CYCLE_ID,CYCLE_NUMBER,START_DATE_OF_CYCLE,OPCS_PROCUREMENT_CODE,PERF_STATUS_START_OF_CYCLE",
+    "10030621,10000001,1,2014-03-29,X712,3",
+    "",
+    "10030621,10000002,2,2014-04-22,,4",
+    "",
+]
+
+
+@pytest.mark.parametrize('options', [{}, {'workers': 2}, {'engine': 'columnar'}])
+def test_dry_run_skips_blank_lines(tmp_path, write_csv, options):
+    file_path = write_csv('cycle.csv', LINES)
+    summary = SactCycleImporter(None).dry_run(file_path, report_path=str(tmp_path / 'report.json'), **options)
+    assert summary['rows_read'] == 2
+    assert summary['rows_converted'] == 2
+    assert summary['rows_failed'] == 0
+
+
+@pytest.mark.parametrize('options', [{}, {'workers': 2}])
+def test_import_skips_blank_lines(write_csv, db_config, query, fresh_tables, options):
+    fresh_tables('SACT_CYCLE')
+    file_path = write_csv('cycle.csv', LINES)
+    summary = SactCycleImporter(db_config).import_data_bulk(file_path, **options)
+    assert summary['rows_inserted'] == 2
+    assert query("SELECT COUNT(*), COUNT(MERGED_CYCLE_ID) FROM SACT_CYCLE") == [(2, 2)]
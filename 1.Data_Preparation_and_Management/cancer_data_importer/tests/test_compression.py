@@ -0,0 +1,79 @@
+import bz2
+import gzip
+import os
+
+import pytest
+
+from importers.compression import detect_compression
+from importers.sact_outcome_importer import SactOutcomeImporter
+
+HEADER = ("MERGED_REGIMEN_ID,DATE_OF_FINAL_TREATMENT,REGIMEN_MOD_DOSE_REDUCTION,REGIMEN_MOD_TIME_DELAY,"
+          "REGIMEN_MOD_STOPPED_EARLY,REGIMEN_OUTCOME_SUMMARY")
+LINES = [HEADER] + [f"{regimen},2014-05-{regimen:02d},Y,N,N,01" for regimen in range(1, 8)]
+
+
+def _compress(path, compression, suffix):
+    with open(path, 'rb') as plain_file:
+        data = plain_file.read()
+    if compression == 'gzip':
+        data = gzip.compress(data)
+    elif compression == 'bz2':
+        data = bz2.compress(data)
+    else:
+        data = pytest.importorskip('zstandard').ZstdCompressor().compress(data)
+    compressed_path = path + suffix
+    with open(compressed_path, 'wb') as compressed_file:
+        compressed_file.write(data)
+    return compressed_path
+
+
+@pytest.mark.parametrize('compression, suffix', [('gzip', '.gz'), ('bz2', '.bz2'), ('zstd', '.zst')])
+def test_compression_is_detected_from_extension_or_magic_bytes(write_csv, compression, suffix):
+    plain_path = write_csv('outcome.csv', LINES)
+    assert detect_compression(plain_path) is None
+    compressed_path = _compress(plain_path, compression, suffix)
+    assert detect_compression(compressed_path) == compression
+    os.rename(compressed_path, plain_path + '.extract')
+    assert detect_compression(plain_path + '.extract') == compression
+
+
+@pytest.mark.parametrize('compression, suffix', [('gzip', '.gz'), ('bz2', '.bz2'), ('zstd', '.zst')])
+@pytest.mark.parametrize('engine', ['rows', 'columnar'])
+def test_compressed_file_imports_like_the_plain_one(write_csv, db_config, query, fresh_tables, compression, suffix,
+                                                    engine):
+    fresh_tables('Sact_Outcome')
+    file_path = _compress(write_csv('outcome.csv', LINES), compression, suffix)
+
+    summary = SactOutcomeImporter(db_config).import_data_bulk(file_path, engine=engine)
+    assert (summary['rows_read'], summary['rows_inserted']) == (7, 7)
+    assert query("SELECT MERGED_REGIMEN_ID, DATE_OF_FINAL_TREATMENT::text FROM Sact_Outcome ORDER BY 1") == [
+        (regimen, f"2014-05-{regimen:02d}") for regimen in range(1, 8)]
+
+
+@pytest.mark.parametrize('compression, suffix', [('gzip', '.gz'), ('bz2', '.bz2'), ('zstd', '.zst')])
+def test_interrupted_compressed_import_resumes(write_csv, db_config, query, fresh_tables, interrupt_batch,
+                                               compression, suffix):
+    fresh_tables('Sact_Outcome')
+    file_path = _compress(write_csv('outcome.csv', LINES), compression, suffix)
+    options = {'batch_size': 3, 'prefetch': 0}
+
+    importer = SactOutcomeImporter(db_config)
+    interrupt_batch(importer)
+    with pytest.raises(KeyboardInterrupt):
+        importer.import_data_bulk(file_path, **options)
+    assert query("SELECT COUNT(*) FROM Sact_Outcome") == [(3,)]
+
+    # The checkpoint offset counts decompressed bytes; the stream is read up to it again.
+    summary = SactOutcomeImporter(db_config).import_data_bulk(file_path, resume=True, **options)
+    assert (summary['rows_read'], summary['rows_inserted'], summary['rows_skipped_on_conflict']) == (7, 7, 0)
+    assert query("SELECT COUNT(*) FROM Sact_Outcome") == [(7,)]
+
+
+def test_compressed_file_is_not_sharded(write_csv, db_config, query, fresh_tables):
+    fresh_tables('Sact_Outcome')
+    file_path = _compress(write_csv('outcome.csv', LINES), 'gzip', '.gz')
+
+    summary = SactOutcomeImporter(db_config).import_data_sharded(file_path, shards=2)
+    assert 'shards' not in summary
+    assert summary['rows_inserted'] == 7
+    assert query("SELECT COUNT(*) FROM Sact_Outcome") == [(7,)]
@@ -0,0 +1,31 @@
+import pytest
+
+from importers.sact_outcome_importer import SactOutcomeImporter
+
+HEADER = ("MERGED_REGIMEN_ID,DATE_OF_FINAL_TREATMENT,REGIMEN_MOD_DOSE_REDUCTION,REGIMEN_MOD_TIME_DELAY,"
+          "REGIMEN_MOD_STOPPED_EARLY,REGIMEN_OUTCOME_SUMMARY")
+FIRST = [HEADER, "1,2014-05-01,Y,N,N,01", "2,2014-06-01,N,N,Y,02"]
+# Regimens 1 and 2 are already loaded; only 3 is new.
+REFRESH = [HEADER, "1,2014-05-01,Y,N,N,01", "3,2014-07-01,N,Y,N,03", "2,2014-06-01,N,N,Y,02"]
+
+
+@pytest.mark.parametrize('options', [{}, {'mode': 'insert'}, {'engine': 'columnar'}, {'workers': 2}])
+def test_rows_skipped_on_conflict_are_not_counted_as_inserted(write_csv, db_config, query, fresh_tables, options):
+    fresh_tables('Sact_Outcome')
+    SactOutcomeImporter(db_config).import_data_bulk(write_csv('first.csv', FIRST))
+
+    summary = SactOutcomeImporter(db_config).import_data_bulk(write_csv('refresh.csv', REFRESH), **options)
+    assert summary['rows_read'] == 3
+    assert summary['rows_inserted'] == 1
+    assert summary['rows_skipped_on_conflict'] == 2
+    assert query("SELECT COUNT(*) FROM Sact_Outcome") == [(3,)]
+
+
+def test_sharded_import_counts_conflicts(write_csv, db_config, query, fresh_tables):
+    fresh_tables('Sact_Outcome')
+    SactOutcomeImporter(db_config).import_data_bulk(write_csv('first.csv', FIRST))
+
+    summary = SactOutcomeImporter(db_config).import_data_sharded(write_csv('refresh.csv', REFRESH), shards=2)
+    assert summary['rows_inserted'] == 1
+    assert summary['rows_skipped_on_conflict'] == 2
+    assert query("SELECT COUNT(*) FROM Sact_Outcome") == [(3,)]
@@ -0,0 +1,62 @@
+import csv
+
+import pytest
+
+from importers.sact_outcome_importer import SactOutcomeImporter
+from importers.sact_regimen_importer import SactRegimenImporter
+
+OUTCOME_HEADER = ("MERGED_REGIMEN_ID,DATE_OF_FINAL_TREATMENT,REGIMEN_MOD_DOSE_REDUCTION,REGIMEN_MOD_TIME_DELAY,"
+                  "REGIMEN_MOD_STOPPED_EARLY,REGIMEN_OUTCOME_SUMMARY")
+# Regimen 1 repeats; the first occurrence is kept.
+OUTCOMES = [OUTCOME_HEADER, "1,2014-05-01,Y,N,N,01", "2,2014-06-01,N,N,Y,02", "1,2014-05-02,Y,N,N,01"]
+
+REGIMEN_HEADER = ("ENCORE_PATIENT_ID,MERGED_REGIMEN_ID,HEIGHT_AT_START_OF_REGIMEN,WEIGHT_AT_START_OF_REGIMEN,"
+                  "INTENT_OF_TREATMENT,DATE_DECISION_TO_TREAT,START_DATE_OF_REGIMEN,MAPPED_REGIMEN,CLINICAL_TRIAL,"
+                  "CHEMO_RADIATION,BENCHMARK_GROUP,LINK_NUMBER")
+REGIMENS = [REGIMEN_HEADER,
+            "10000004,10030621,,84.2,N,2016-09-02,2016-09-21,Irinotecan,01,,FLUOROURACIL,100000004",
+            "10000005,10030622,,70.1,N,2016-09-03,2016-09-22,Capecitabine,01,,FLUOROURACIL,100000005"]
+
+
+@pytest.mark.parametrize('unlogged', [False, True])
+def test_deferred_load_builds_the_new_table_from_staging(write_csv, db_config, query, fresh_tables, unlogged):
+    fresh_tables('Sact_Outcome', 'Sact_Outcome_staging')
+    file_path = write_csv('outcome.csv', OUTCOMES)
+
+    # Without the streaming check, duplicates are found with GROUP BY on the staging table.
+    summary = SactOutcomeImporter(db_config).import_data_bulk(file_path, strategy='deferred', unlogged=unlogged,
+                                                              check_duplicates=False)
+    assert summary['rows_read'] == 3
+    assert summary['rows_inserted'] == 2
+    assert query("SELECT MERGED_REGIMEN_ID, DATE_OF_FINAL_TREATMENT::text FROM Sact_Outcome ORDER BY 1") == [
+        (1, '2014-05-01'), (2, '2014-06-01')]
+    assert query("SELECT to_regclass('sact_outcome_staging')") == [(None,)]
+    assert query("SELECT relpersistence FROM pg_class WHERE relname = 'sact_outcome'") == [('p',)]
+    assert query("SELECT contype FROM pg_constraint WHERE conrelid = 'sact_outcome'::regclass") == [('p',)]
+    with open(f"{file_path}.duplicate_keys.csv", newline='') as report:
+        assert list(csv.reader(report)) == [['KEY_COLUMN', 'KEY_VALUE', 'OCCURRENCES'],
+                                            ['MERGED_REGIMEN_ID', '1', '2']]
+
+
+def test_deferred_load_into_an_existing_table(write_csv, db_config, query, fresh_tables):
+    fresh_tables('Sact_Outcome', 'Sact_Outcome_staging')
+    SactOutcomeImporter(db_config).import_data_bulk(write_csv('first.csv', OUTCOMES[:2]))
+
+    summary = SactOutcomeImporter(db_config).import_data_bulk(write_csv('outcome.csv', OUTCOMES),
+                                                              strategy='deferred', check_duplicates=False)
+    # Regimen 1 is already in the table and repeated in the file: only regimen 2 is added.
+    assert summary['rows_inserted'] == 1
+    assert summary['rows_failed'] == 2
+    assert query("SELECT MERGED_REGIMEN_ID FROM Sact_Outcome ORDER BY 1") == [(1,), (2,)]
+    assert query("SELECT to_regclass('sact_outcome_staging')") == [(None,)]
+
+
+def test_deferred_load_creates_the_secondary_indexes(write_csv, db_config, query, fresh_tables):
+    fresh_tables('Sact_Regimen', 'Sact_Regimen_staging')
+    SactRegimenImporter(db_config).import_data_bulk(write_csv('regimen.csv', REGIMENS), strategy='deferred')
+
+    indexed = query("SELECT a.attname FROM pg_index i JOIN pg_attribute a "
+                    "ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey) "
+                    "WHERE i.indrelid = 'sact_regimen'::regclass ORDER BY 1")
+    assert indexed == [('encore_patient_id',), ('merged_regimen_id',)]
+    assert query("SELECT COUNT(*) FROM Sact_Regimen") == [(2,)]
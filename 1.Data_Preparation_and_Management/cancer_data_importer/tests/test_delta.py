@@ -0,0 +1,86 @@
+import pytest
+
+from importers.fingerprint import RowFingerprints
+from importers.sact_drug_detail_importer import SactDrugDetailImporter
+from importers.sact_outcome_importer import SactOutcomeImporter
+
+LINES = [
+    "MERGED_REGIMEN_ID,DATE_OF_FINAL_TREATMENT,REGIMEN_MOD_DOSE_REDUCTION,REGIMEN_MOD_TIME_DELAY,"
+    "REGIMEN_MOD_STOPPED_EARLY,REGIMEN_OUTCOME_SUMMARY",
+    "1,2014-05-01,Y,N,N,01",
+    "2,2014-06-01,N,N,Y,02",
+]
+# NUMERIC text that the columnar engine keeps as written and the rows engine reads as a Decimal.
+DRUG_DETAIL_LINES = [
+    "MERGED_DRUG_DETAIL_ID,MERGED_CYCLE_ID,ACTUAL_DOSE_PER_ADMINISTRATION,OPCS_DELIVERY_CODE,"
+    "ADMINISTRATION_ROUTE,ADMINISTRATION_DATE,DRUG_GROUP",
+    "1,10000001, 7,X721,Oral,2014-03-29,CAPECITABINE",
+    "2,10000001,1e5,X721,Oral,2014-03-30,CAPECITABINE",
+    "3,10000002,1.50,,,2014-04-22,",
+]
+
+
+def test_fingerprints_are_saved_with_the_merge(write_csv, db_config, query, fresh_tables, monkeypatch):
+    fresh_tables('Sact_Outcome')
+    file_path = write_csv('outcome.csv', LINES)
+
+    def fail(self, inserted_rows):
+        raise RuntimeError("fingerprints not saved")
+    monkeypatch.setattr(RowFingerprints, 'save', fail)
+    with pytest.raises(RuntimeError, match="fingerprints not saved"):
+        SactOutcomeImporter(db_config).import_data_bulk(file_path, strategy='delta')
+    # Merged rows without their fingerprints would all be re-sent as new by the next delta import.
+    assert query("SELECT COUNT(*) FROM Sact_Outcome") == [(0,)]
+
+    monkeypatch.undo()
+    summary = SactOutcomeImporter(db_config).import_data_bulk(file_path, strategy='delta')
+    assert summary['delta']['added'] == 2
+    summary = SactOutcomeImporter(db_config).import_data_bulk(file_path, strategy='delta')
+    assert summary['delta']['unchanged'] == 2
+    assert query("SELECT COUNT(*) FROM Sact_Outcome") == [(2,)]
+
+
+def test_unchanged_rows_are_not_counted_as_inserted(write_csv, db_config, fresh_tables):
+    fresh_tables('Sact_Outcome')
+    file_path = write_csv('outcome.csv', LINES)
+    summary = SactOutcomeImporter(db_config).import_data_bulk(file_path, strategy='delta')
+    assert (summary['rows_inserted'], summary['rows_unchanged'], summary['rows_failed']) == (2, 0, 0)
+    summary = SactOutcomeImporter(db_config).import_data_bulk(file_path, strategy='delta')
+    assert (summary['rows_inserted'], summary['rows_unchanged'], summary['rows_failed']) == (0, 2, 0)
+
+
+@pytest.mark.parametrize('change', ["TRUNCATE Sact_Outcome", "DROP TABLE Sact_Outcome",
+                                    "DELETE FROM Sact_Outcome WHERE MERGED_REGIMEN_ID = 2"])
+def test_fingerprints_of_a_changed_table_are_discarded(write_csv, db_config, query, fresh_tables, change):
+    fresh_tables('Sact_Outcome')
+    file_path = write_csv('outcome.csv', LINES)
+    SactOutcomeImporter(db_config).import_data_bulk(file_path, strategy='delta')
+
+    query(change)
+    summary = SactOutcomeImporter(db_config).import_data_bulk(file_path, strategy='delta')
+    assert summary['delta']['unchanged'] == 0
+    assert query("SELECT COUNT(*) FROM Sact_Outcome") == [(2,)]
+
+
+def test_other_imports_discard_the_fingerprints(write_csv, db_config, query, fresh_tables):
+    fresh_tables('Sact_Outcome')
+    file_path = write_csv('outcome.csv', LINES)
+    SactOutcomeImporter(db_config).import_data_bulk(file_path, strategy='delta')
+    # A merge that changes a value without changing the row count.
+    changed = write_csv('changed.csv', [LINES[0], "1,2014-05-01,N,N,N,01"])
+    SactOutcomeImporter(db_config).import_data_bulk(changed, strategy='merge')
+
+    summary = SactOutcomeImporter(db_config).import_data_bulk(file_path, strategy='delta')
+    assert summary['delta']['unchanged'] == 0
+    assert query("SELECT REGIMEN_MOD_DOSE_REDUCTION FROM Sact_Outcome WHERE MERGED_REGIMEN_ID = 1") == [('Y',)]
+
+
+def test_fingerprints_do_not_depend_on_the_engine(write_csv, db_config, fresh_tables):
+    fresh_tables('Sact_Drug_Detail')
+    file_path = write_csv('drug_detail.csv', DRUG_DETAIL_LINES)
+    summary = SactDrugDetailImporter(db_config).import_data_bulk(file_path, strategy='delta', engine='columnar')
+    assert summary['delta']['added'] == 3
+    summary = SactDrugDetailImporter(db_config).import_data_bulk(file_path, strategy='delta')
+    assert summary['delta']['unchanged'] == 3
+    summary = SactDrugDetailImporter(db_config).import_data_bulk(file_path, strategy='delta', engine='columnar')
+    assert summary['delta']['unchanged'] == 3
@@ -0,0 +1,21 @@
+from importers.duplicates import KeySet
+
+
+def test_bitmap_grows_downwards_for_keys_out_of_order():
+    keys = KeySet(max_bitmap_bytes=1 << 16)
+    values = list(range(500000, 400000, -3)) + list(range(500001, 600000, 5))
+    for value in values:
+        keys.add(value)
+    assert not keys.others
+    assert all(value in keys for value in values)
+    assert 400002 not in keys and 500002 not in keys and 399999 not in keys
+
+
+def test_keys_outside_the_bitmap_range_stay_exact():
+    keys = KeySet(max_bitmap_bytes=16)
+    for value in (1000, 1050, 10, 940, 'A1', 1200):
+        keys.add(value)
+    # The bitmap spans 128 values: 940 moves its start down, 10 and 1200 stay outside it.
+    assert keys.others == {10, 1200, 'A1'}
+    assert all(value in keys for value in (1000, 1050, 10, 940, 'A1', 1200))
+    assert 11 not in keys and 941 not in keys and 1199 not in keys and 'A2' not in keys
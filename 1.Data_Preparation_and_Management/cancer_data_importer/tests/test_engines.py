@@ -0,0 +1,57 @@
+import pytest
+
+from importers.sact_drug_detail_importer import SactDrugDetailImporter
+
+HEADER = ("MERGED_DRUG_DETAIL_ID,MERGED_CYCLE_ID,ACTUAL_DOSE_PER_ADMINISTRATION,OPCS_DELIVERY_CODE,"
+          "ADMINISTRATION_ROUTE,ADMINISTRATION_DATE,DRUG_GROUP")
+# Integer and numeric text the rows engine (int() / Decimal()) reads in its own way.
+LINES = [
+    HEADER,
+    "1,10000001,1250,X721,Oral,2014-03-29,CAPECITABINE",
+    "2,1.0,1e3,X721,Oral,2014-3-5,CAPECITABINE",
+    "3, 7 ,NaN,,,2014-04-22,",
+    "4,1_000,Infinity,,,,FLUOROURACIL",
+    "5,-12,-inf,,,2014-04-23,",
+    "6,1e3,1_0.5,,,not a date,",
+    "7,x,,,,2014-04-24,",
+    "8,+5,.5,,,2014-04-25,",
+    "1.0,10000002,1,,,2014-04-26,",
+    ",10000002,1,,,2014-04-26,",
+]
+
+
+def _import(db_config, query, fresh_tables, file_path, **options):
+    fresh_tables('Sact_Drug_Detail')
+    summary = SactDrugDetailImporter(db_config).import_data_bulk(file_path, **options)
+    rows = query("SELECT * FROM Sact_Drug_Detail ORDER BY MERGED_DRUG_DETAIL_ID")
+    # As text: Decimal('NaN') never equals itself.
+    return summary, [tuple(map(str, row)) for row in rows]
+
+
+@pytest.mark.parametrize('options', [{'engine': 'columnar'}, {'engine': 'columnar', 'mode': 'insert'}, {'workers': 2}])
+def test_engines_load_the_same_rows(write_csv, db_config, query, fresh_tables, options):
+    file_path = write_csv('drug_detail.csv', LINES)
+    expected_summary, expected = _import(db_config, query, fresh_tables, file_path)
+    summary, rows = _import(db_config, query, fresh_tables, file_path, **options)
+
+    assert [row[0] for row in expected] == ['1', '2', '3', '4', '5', '6', '7', '8']
+    assert rows == expected
+    assert summary['rows_inserted'] == expected_summary['rows_inserted'] == 8
+
+
+def test_engines_convert_the_same_rows_in_a_dry_run(tmp_path, write_csv):
+    file_path = write_csv('drug_detail.csv', LINES)
+    summaries = [SactDrugDetailImporter(None).dry_run(file_path, engine=engine,
+                                                      report_path=str(tmp_path / f'{engine}.json'))
+                 for engine in ('rows', 'columnar')]
+    assert [(summary['rows_converted'], summary['rows_failed']) for summary in summaries] == [(8, 2), (8, 2)]
+
+
+@pytest.mark.parametrize('engine', ['rows', 'columnar'])
+def test_text_that_reads_as_the_null_marker_stays_text(write_csv, db_config, query, fresh_tables, engine):
+    file_path = write_csv('drug_detail.csv', [HEADER, r'1,10000001,1250,\N,"Oral, ""slow""",2014-03-29,',
+                                              '2,10000001,1250,,,2014-03-29,'])
+    _import(db_config, query, fresh_tables, file_path, engine=engine)
+    # CHAR columns pad their values; a NULL would come back as None.
+    assert query("SELECT rtrim(OPCS_DELIVERY_CODE), rtrim(ADMINISTRATION_ROUTE), rtrim(DRUG_GROUP) "
+                 "FROM Sact_Drug_Detail ORDER BY MERGED_DRUG_DETAIL_ID") == [('\\N', 'Oral, "slow"', ''), ('', '', '')]
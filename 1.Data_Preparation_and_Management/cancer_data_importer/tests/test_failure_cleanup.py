@@ -0,0 +1,83 @@
+import json
+import os
+
+import pytest
+from psycopg2.pool import ThreadedConnectionPool
+
+import orchestrator
+from importers.sact_cycle_importer import SactCycleImporter
+
+CYCLE_LINES = [
+    "MERGED_REGIMEN_ID,MERGED_CYCLE_ID,CYCLE_NUMBER,START_DATE_OF_CYCLE,OPCS_PROCUREMENT_CODE,PERF_STATUS_START_OF_CYCLE",
+    "10030621,10000001,1,2014-03-29,X712,3",
+    "10030621,10000002,2,2014-04-22,,4",
+]
+REGIMEN_LINES = [
+    "ENCORE_PATIENT_ID,MERGED_REGIMEN_ID,HEIGHT_AT_START_OF_REGIMEN,WEIGHT_AT_START_OF_REGIMEN,INTENT_OF_TREATMENT,"
+    "DATE_DECISION_TO_TREAT,START_DATE_OF_REGIMEN,MAPPED_REGIMEN,CLINICAL_TRIAL,CHEMO_RADIATION,BENCHMARK_GROUP,"
+    "LINK_NUMBER",
+    "10000002,10030621,1.44,,,2014-03-25,2014-03-29,Capecitabine,02,,CAPECITABINE,100000002",
+]
+
+
+def test_failed_import_returns_pooled_connection(write_csv, db_config, fresh_tables):
+    fresh_tables('SACT_CYCLE')
+    file_path = write_csv('cycle.csv', CYCLE_LINES)
+    pool = ThreadedConnectionPool(1, 1, **db_config)
+    try:
+        importer = SactCycleImporter(db_config, pool=pool)
+
+        def fail(rows, mode):
+            raise RuntimeError("write failed")
+        importer.write_batch = fail
+        with pytest.raises(RuntimeError, match="write failed"):
+            importer.import_data_bulk(file_path, prefetch=0)
+        assert importer.conn is None
+        assert importer.rejects._file is None
+
+        # The single pooled connection is free again, and clean.
+        summary = SactCycleImporter(db_config, pool=pool).import_data_bulk(file_path)
+        assert summary['rows_inserted'] == 2
+    finally:
+        pool.closeall()
+
+
+def test_manifest_keeps_going_after_a_failed_table(tmp_path, write_csv, db_config, query, fresh_tables):
+    fresh_tables('SACT_CYCLE', 'Sact_Regimen', 'Sact_Outcome')
+    write_csv('cycle.csv', CYCLE_LINES)
+    write_csv('regimen.csv', REGIMEN_LINES)
+    # Not gzip data: fails while reading, after the connection was taken.
+    write_csv('outcome.csv.gz', ["MERGED_REGIMEN_ID", "1"])
+    manifest = {
+        'max_connections': 1,
+        'tables': {
+            'sact_outcome': 'outcome.csv.gz',
+            'sact_cycle': {'file': 'cycle.csv', 'strategy': 'merge', 'prefetch': 0},
+            'sact_regimen': {'file': 'regimen.csv', 'report_path': 'reports/regimen.json'},
+        },
+    }
+    os.makedirs(tmp_path / 'reports')
+    manifest_path = tmp_path / 'manifest.json'
+    manifest_path.write_text(json.dumps(manifest))
+
+    settings, tasks = orchestrator.load_manifest(str(manifest_path))
+    assert tasks['sact_regimen']['report_path'] == str(tmp_path / 'reports' / 'regimen.json')
+    results = orchestrator.run_manifest(settings, tasks, config=db_config)
+
+    assert isinstance(results['sact_outcome'], Exception)
+    assert results['sact_cycle']['merge']['inserted'] == 2
+    assert results['sact_regimen']['rows_inserted'] == 1
+    assert os.path.isfile(tmp_path / 'reports' / 'regimen.json')
+    assert query("SELECT COUNT(*) FROM SACT_CYCLE") == [(2,)]
+
+
+def test_manifest_paths_are_relative_to_the_manifest(tmp_path, write_csv):
+    write_csv('regimen.csv', REGIMEN_LINES)
+    manifest_path = tmp_path / 'manifest.json'
+    manifest_path.write_text(json.dumps({
+        'snapshot_dir': 'snapshots',
+        'tables': {'sact_regimen': {'file': 'regimen.csv', 'snapshot_dir': 'regimen_snapshots', 'unlogged': True}},
+    }))
+    settings, tasks = orchestrator.load_manifest(str(manifest_path))
+    assert settings['snapshot_dir'] == str(tmp_path / 'snapshots')
+    assert tasks['sact_regimen']['snapshot_dir'] == str(tmp_path / 'regimen_snapshots')
@@ -0,0 +1,47 @@
+import pytest
+
+import main
+
+HEADER = ("MERGED_REGIMEN_ID,DATE_OF_FINAL_TREATMENT,REGIMEN_MOD_DOSE_REDUCTION,REGIMEN_MOD_TIME_DELAY,"
+          "REGIMEN_MOD_STOPPED_EARLY,REGIMEN_OUTCOME_SUMMARY")
+# One row without its primary key is rejected.
+LINES = [HEADER, "1,2014-05-01,Y,N,N,01", ",2014-06-01,N,N,Y,02", "3,2014-07-01,N,Y,N,01"]
+
+
+def _import(file_path, *options):
+    return main.main(['import', '--table', 'sact_outcome', '--file', file_path, *options])
+
+
+def test_tables_lists_the_importers(capsys):
+    assert main.main(['tables']) == main.EXIT_OK
+    assert 'sact_outcome' in capsys.readouterr().out.split()
+
+
+def test_dry_run_exit_codes(write_csv):
+    file_path = write_csv('outcome.csv', LINES)
+    assert _import(file_path, '--dry-run') == main.EXIT_OK
+    assert _import(file_path, '--dry-run', '--max-rejects', '1') == main.EXIT_OK
+    assert _import(file_path, '--dry-run', '--max-rejects', '0') == main.EXIT_TOO_MANY_REJECTS
+
+
+def test_invalid_arguments_exit_with_usage_error(write_csv, tmp_path):
+    file_path = write_csv('outcome.csv', LINES)
+    assert _import(str(tmp_path / 'missing.csv'), '--dry-run') == main.EXIT_USAGE
+    assert _import(file_path, '--shards', '2', '--strategy', 'merge') == main.EXIT_USAGE
+    with pytest.raises(SystemExit) as exit_info:
+        main.main(['import', '--table', 'no_such_table', '--file', file_path])
+    assert exit_info.value.code == main.EXIT_USAGE
+
+
+def test_failed_import_exits_with_failure(write_csv, tmp_path, monkeypatch):
+    monkeypatch.setattr('config.db_config.DATABASE_CONFIG', {'dbname': 'importer_test', 'host': str(tmp_path)})
+    assert _import(write_csv('outcome.csv', LINES)) == main.EXIT_FAILED
+
+
+def test_import_exit_codes(write_csv, db_config, query, fresh_tables, monkeypatch):
+    fresh_tables('Sact_Outcome')
+    monkeypatch.setattr('config.db_config.DATABASE_CONFIG', db_config)
+    file_path = write_csv('outcome.csv', LINES)
+    assert _import(file_path, '--max-rejects', '1') == main.EXIT_OK
+    assert query("SELECT COUNT(*) FROM Sact_Outcome") == [(2,)]
+    assert _import(file_path, '--shards', '2', '--max-rejects', '0') == main.EXIT_TOO_MANY_REJECTS
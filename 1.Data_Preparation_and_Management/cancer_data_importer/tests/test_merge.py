@@ -0,0 +1,64 @@
+import pytest
+
+from importers.rtds_exposure_importer import RtdsExposureImporter
+from importers.sact_outcome_importer import SactOutcomeImporter
+from importers.sact_regimen_importer import SactRegimenImporter
+
+OUTCOME_HEADER = ("MERGED_REGIMEN_ID,DATE_OF_FINAL_TREATMENT,REGIMEN_MOD_DOSE_REDUCTION,REGIMEN_MOD_TIME_DELAY,"
+                  "REGIMEN_MOD_STOPPED_EARLY,REGIMEN_OUTCOME_SUMMARY")
+OUTCOMES = [OUTCOME_HEADER, "1,2014-05-01,Y,N,N,01", "2,2014-06-01,N,N,Y,02"]
+# Regimen 1 changed, 2 unchanged, 3 new and repeated: its last occurrence is kept.
+REFRESHED_OUTCOMES = [OUTCOME_HEADER, "1,2014-05-09,Y,N,N,03", "2,2014-06-01,N,N,Y,02",
+                      "3,2014-07-01,N,Y,N,01", "3,2014-07-02,N,Y,N,02"]
+
+REGIMEN_HEADER = ("ENCORE_PATIENT_ID,MERGED_REGIMEN_ID,HEIGHT_AT_START_OF_REGIMEN,WEIGHT_AT_START_OF_REGIMEN,"
+                  "INTENT_OF_TREATMENT,DATE_DECISION_TO_TREAT,START_DATE_OF_REGIMEN,MAPPED_REGIMEN,CLINICAL_TRIAL,"
+                  "CHEMO_RADIATION,BENCHMARK_GROUP,LINK_NUMBER")
+
+EXPOSURE_HEADER = ("PRESCRIPTIONID,RADIOISOTOPE,RADIOTHERAPYBEAMTYPE,RADIOTHERAPYBEAMENERGY,TIMEOFEXPOSURE,"
+                   "RADIOTHERAPYEPISODEID,ATTENDID,APPTDATE,LINKCODE,PATIENTID")
+EXPOSURES = [EXPOSURE_HEADER, "40000001,,Photon,18,16:15,30000001,30000001-001,2014-01-10,2,10000002",
+             "40000001,,Photon,18,11:00,30000001,30000001-002,2014-01-13,2,10000002"]
+
+
+@pytest.mark.parametrize('engine', ['rows', 'columnar'])
+def test_merge_updates_changed_rows_and_inserts_new_keys(write_csv, db_config, query, fresh_tables, engine):
+    fresh_tables('Sact_Outcome')
+    SactOutcomeImporter(db_config).import_data_bulk(write_csv('outcome.csv', OUTCOMES), strategy='merge')
+
+    refreshed = write_csv('refreshed.csv', REFRESHED_OUTCOMES)
+    summary = SactOutcomeImporter(db_config).import_data_bulk(refreshed, strategy='merge', engine=engine)
+    assert summary['merge'] == {'inserted': 1, 'updated': 1, 'unchanged': 1, 'skipped': 1}
+    assert summary['rows_inserted'] == 3
+    assert query("SELECT MERGED_REGIMEN_ID, DATE_OF_FINAL_TREATMENT::text, REGIMEN_OUTCOME_SUMMARY "
+                 "FROM Sact_Outcome ORDER BY 1") == [(1, '2014-05-09', '03'), (2, '2014-06-01', '02'),
+                                                      (3, '2014-07-02', '02')]
+
+    # Merging the same extract again changes nothing.
+    summary = SactOutcomeImporter(db_config).import_data_bulk(refreshed, strategy='merge', engine=engine)
+    assert summary['merge'] == {'inserted': 0, 'updated': 0, 'unchanged': 3, 'skipped': 1}
+    assert query("SELECT COUNT(*) FROM Sact_Outcome") == [(3,)]
+
+
+def test_merge_on_natural_key_skips_rows_without_one(write_csv, db_config, query, fresh_tables):
+    fresh_tables('Sact_Regimen')
+    lines = [REGIMEN_HEADER,
+             "10000004,10030621,,84.2,N,2016-09-02,2016-09-21,Irinotecan,01,,FLUOROURACIL,100000004",
+             "10000005,,,70.1,N,2016-09-03,2016-09-22,Capecitabine,01,,FLUOROURACIL,100000005"]
+    SactRegimenImporter(db_config).import_data_bulk(write_csv('regimen.csv', lines), strategy='merge')
+
+    lines[1] = lines[1].replace(',84.2,', ',86.0,')
+    summary = SactRegimenImporter(db_config).import_data_bulk(write_csv('regimen.csv', lines), strategy='merge')
+    assert summary['merge'] == {'inserted': 0, 'updated': 1, 'unchanged': 0, 'skipped': 1}
+    assert query("SELECT MERGED_REGIMEN_ID, WEIGHT_AT_START_OF_REGIMEN FROM Sact_Regimen") == [(10030621, 86)]
+
+
+def test_merge_without_key_inserts_only_rows_not_already_loaded(write_csv, db_config, query, fresh_tables):
+    fresh_tables('Rtds_Exposure')
+    RtdsExposureImporter(db_config).import_data_bulk(write_csv('exposure.csv', EXPOSURES), strategy='merge')
+
+    lines = EXPOSURES + ["40000001,,Photon,18,11:00,30000001,30000001-002,2014-01-14,2,10000002"]
+    summary = RtdsExposureImporter(db_config).import_data_bulk(write_csv('exposure.csv', lines), strategy='merge')
+    assert summary['merge'] == {'inserted': 1, 'updated': 0, 'unchanged': 2, 'skipped': 0}
+    assert query("SELECT APPTDATE::text FROM Rtds_Exposure ORDER BY 1") == [
+        ('2014-01-10',), ('2014-01-13',), ('2014-01-14',)]
@@ -0,0 +1,53 @@
+import pytest
+
+from importers.checkpoint import ImportCheckpoint
+from importers.sact_drug_detail_importer import SactDrugDetailImporter
+
+HEADER = ("MERGED_DRUG_DETAIL_ID,MERGED_CYCLE_ID,ACTUAL_DOSE_PER_ADMINISTRATION,OPCS_DELIVERY_CODE,"
+          "ADMINISTRATION_ROUTE,ADMINISTRATION_DATE,DRUG_GROUP")
+# Batches of two; every batch needs a partition the one before did not.
+LINES = [
+    HEADER,
+    "1,10000001,1250,X721,Oral,2014-03-29,CAPECITABINE", "2,10000001,75.5,X721,Oral,2014-03-30,CAPECITABINE",
+    "3,10000002,12.25,,,2015-04-22,FLUOROURACIL", "4,10000002,12.25,,,2015-04-23,FLUOROURACIL",
+    "5,10000003,1,,,2016-01-02,", "6,10000003,1,,,,",
+]
+
+
+def test_creating_a_partition_leaves_the_import_transaction_open(write_csv, db_config, query, fresh_tables):
+    fresh_tables('Sact_Drug_Detail')
+    importer = SactDrugDetailImporter(db_config)
+    importer.connect()
+    try:
+        partitions = importer._prepare_partitions()
+        checkpoint = ImportCheckpoint(importer.cursor, importer.table_name, write_csv('drug_detail.csv', LINES))
+        checkpoint.create_table()
+        importer.conn.commit()
+        # A batch's checkpoint is pending when the next range is met; it must not be committed with the DDL.
+        checkpoint.save(100, 2, 2)
+        partitions.route([(2, 1, None, None, None, '2019-05-01', None)])
+        importer.conn.rollback()
+    finally:
+        importer.disconnect()
+    assert query("SELECT COUNT(*) FROM import_checkpoint") == [(0,)]
+    assert query("SELECT to_regclass('sact_drug_detail_p2019') IS NOT NULL") == [(True,)]
+
+
+@pytest.mark.parametrize('engine', ['rows', 'columnar'])
+def test_resumed_partitioned_import_writes_each_row_once(write_csv, db_config, query, fresh_tables, interrupt_batch,
+                                                         engine):
+    fresh_tables('Sact_Drug_Detail')
+    file_path = write_csv('drug_detail.csv', LINES)
+    options = {'engine': engine, 'batch_size': 2, 'prefetch': 0, 'partitioned': True}
+
+    importer = SactDrugDetailImporter(db_config)
+    interrupt_batch(importer, 'write_frame' if engine == 'columnar' else 'write_batch')
+    with pytest.raises(KeyboardInterrupt):
+        importer.import_data_bulk(file_path, **options)
+    assert query("SELECT COUNT(*) FROM Sact_Drug_Detail") == [(2,)]
+
+    summary = SactDrugDetailImporter(db_config).import_data_bulk(file_path, resume=True, **options)
+    assert summary['rows_inserted'] == 6
+    assert query("SELECT tableoid::regclass::text, MERGED_DRUG_DETAIL_ID FROM Sact_Drug_Detail ORDER BY 2") == [
+        ('sact_drug_detail_p2014', 1), ('sact_drug_detail_p2014', 2), ('sact_drug_detail_p2015', 3),
+        ('sact_drug_detail_p2015', 4), ('sact_drug_detail_p2016', 5), ('sact_drug_detail_default', 6)]
@@ -0,0 +1,89 @@
+import csv
+import json
+
+import pytest
+
+from importers.rejects import RejectSink
+from importers.sact_outcome_importer import SactOutcomeImporter
+
+HEADER = ("MERGED_REGIMEN_ID,DATE_OF_FINAL_TREATMENT,REGIMEN_MOD_DOSE_REDUCTION,REGIMEN_MOD_TIME_DELAY,"
+          "REGIMEN_MOD_STOPPED_EARLY,REGIMEN_OUTCOME_SUMMARY")
+# A missing and an unparseable primary key; an unparseable date in a nullable column becomes NULL.
+LINES = [HEADER, "1,2014-05-01,Y,N,N,01", ",2014-06-01,N,N,Y,02", "x3,2014-07-01,N,Y,N,01",
+         "4,2014-13-01,N,N,N,01"]
+
+
+def _rejects(path):
+    with open(path, newline='') as rejects_file:
+        return list(csv.reader(rejects_file))
+
+
+@pytest.mark.parametrize('options', [{}, {'engine': 'columnar'}, {'workers': 2}])
+def test_rejected_rows_are_written_with_reason_and_column(write_csv, db_config, query, fresh_tables, options):
+    fresh_tables('Sact_Outcome')
+    file_path = write_csv('outcome.csv', LINES)
+
+    summary = SactOutcomeImporter(db_config).import_data_bulk(file_path, **options)
+    assert (summary['rows_read'], summary['rows_inserted'], summary['rows_failed']) == (4, 2, 2)
+    assert _rejects(summary['rejects']) == [
+        ['REASON', 'COLUMN', 'LINE'],
+        ['missing_value', 'MERGED_REGIMEN_ID', ',2014-06-01,N,N,Y,02'],
+        ['invalid_value', 'MERGED_REGIMEN_ID', 'x3,2014-07-01,N,Y,N,01'],
+    ]
+    assert query("SELECT MERGED_REGIMEN_ID, DATE_OF_FINAL_TREATMENT::text FROM Sact_Outcome ORDER BY 1") == [
+        (1, '2014-05-01'), (4, None)]
+    with open(summary['report']) as report_file:
+        report = json.load(report_file)
+    assert report['rejected'] == {'missing_value': 1, 'invalid_value': 1}
+    assert report['rejected_by_column'] == {'MERGED_REGIMEN_ID: missing_value': 1,
+                                            'MERGED_REGIMEN_ID: invalid_value': 1}
+
+
+def test_rows_the_database_rejects_are_written_with_its_error(write_csv, db_config, fresh_tables):
+    fresh_tables('Sact_Outcome')
+    # REGIMEN_OUTCOME_SUMMARY is CHAR(2): the whole batch fails in the database.
+    file_path = write_csv('outcome.csv', [HEADER, "1,2014-05-01,Y,N,N,01", "2,2014-06-01,N,N,Y,002"])
+
+    summary = SactOutcomeImporter(db_config).import_data_bulk(file_path, mode='insert')
+    assert (summary['rows_inserted'], summary['rows_failed']) == (0, 2)
+    assert [row[:2] for row in _rejects(summary['rejects'])[1:]] == [['string_data_right_truncation', '']] * 2
+
+
+def test_clean_import_removes_the_rejects_of_an_earlier_run(write_csv, db_config, fresh_tables):
+    fresh_tables('Sact_Outcome')
+    file_path = write_csv('outcome.csv', LINES)
+    assert 'rejects' in SactOutcomeImporter(db_config).import_data_bulk(file_path)
+
+    file_path = write_csv('outcome.csv', LINES[:2])
+    summary = SactOutcomeImporter(db_config).import_data_bulk(file_path)
+    assert 'rejects' not in summary
+    with pytest.raises(FileNotFoundError):
+        _rejects(f"{file_path}.rejects.csv")
+
+
+def test_reject_sink_appends_for_a_resumed_import(tmp_path):
+    path = str(tmp_path / 'outcome.csv.rejects.csv')
+    sink = RejectSink(path)
+    sink.add(['', '2014-06-01'], 'missing_value', 'MERGED_REGIMEN_ID')
+    sink.close()
+
+    sink = RejectSink(path, append=True)
+    sink.add(['x3', None], 'invalid_value', 'MERGED_REGIMEN_ID')
+    sink.close()
+    assert _rejects(path) == [['REASON', 'COLUMN', 'LINE'],
+                              ['missing_value', 'MERGED_REGIMEN_ID', ',2014-06-01'],
+                              ['invalid_value', 'MERGED_REGIMEN_ID', 'x3,']]
+
+    RejectSink(path).close()
+    with pytest.raises(FileNotFoundError):
+        _rejects(path)
+
+
+def test_reject_sink_without_a_path_only_counts(tmp_path):
+    sink = RejectSink(log_samples=1)
+    for line in range(3):
+        sink.add([str(line)], 'missing_value', 'MERGED_REGIMEN_ID')
+    sink.close()
+    assert sink.total == 3
+    assert sink.counts == {('MERGED_REGIMEN_ID', 'missing_value'): 3}
+    assert list(tmp_path.iterdir()) == []
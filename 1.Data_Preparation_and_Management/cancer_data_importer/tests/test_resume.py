@@ -0,0 +1,39 @@
+import csv
+
+import pytest
+
+from importers.sact_outcome_importer import SactOutcomeImporter
+
+HEADER = ("MERGED_REGIMEN_ID,DATE_OF_FINAL_TREATMENT,REGIMEN_MOD_DOSE_REDUCTION,REGIMEN_MOD_TIME_DELAY,"
+          "REGIMEN_MOD_STOPPED_EARLY,REGIMEN_OUTCOME_SUMMARY")
+# Batches of three: regimen 1 repeats inside the first batch and again after the interruption.
+LINES = [
+    HEADER,
+    "1,2014-05-01,Y,N,N,01", "2,2014-06-01,N,N,Y,02", "1,2014-05-02,Y,N,N,01",
+    "3,2014-07-01,N,Y,N,03", "4,2014-08-01,N,N,N,01", "1,2014-05-03,Y,N,N,01",
+    "5,2014-09-01,N,N,N,02",
+]
+
+
+@pytest.mark.parametrize('strategy', ['append', 'deferred'])
+@pytest.mark.parametrize('engine', ['rows', 'columnar'])
+def test_resume_keeps_checking_duplicates(write_csv, db_config, query, fresh_tables, interrupt_batch, strategy,
+                                          engine):
+    fresh_tables('Sact_Outcome', 'Sact_Outcome_staging')
+    file_path = write_csv('outcome.csv', LINES)
+    options = {'strategy': strategy, 'engine': engine, 'batch_size': 3, 'prefetch': 0}
+
+    importer = SactOutcomeImporter(db_config)
+    interrupt_batch(importer, 'write_frame' if engine == 'columnar' else 'write_batch')
+    with pytest.raises(KeyboardInterrupt):
+        importer.import_data_bulk(file_path, **options)
+
+    summary = SactOutcomeImporter(db_config).import_data_bulk(file_path, resume=True, **options)
+    assert summary['rows_read'] == 7
+    assert summary['rows_inserted'] == 5
+    assert summary['duplicates']['keys']['MERGED_REGIMEN_ID']['extra_rows'] == 2
+    assert query("SELECT MERGED_REGIMEN_ID, DATE_OF_FINAL_TREATMENT::text FROM Sact_Outcome ORDER BY 1") == [
+        (1, '2014-05-01'), (2, '2014-06-01'), (3, '2014-07-01'), (4, '2014-08-01'), (5, '2014-09-01')]
+
+    with open(summary['duplicates']['report'], newline='') as report:
+        assert list(csv.reader(report))[1:] == [['MERGED_REGIMEN_ID', '1', '3']]
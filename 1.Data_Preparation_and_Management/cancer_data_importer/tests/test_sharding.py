@@ -0,0 +1,78 @@
+import csv
+
+import pytest
+
+from importers.sact_outcome_importer import SactOutcomeImporter
+from importers.sharding import shard_ranges
+
+HEADER = ("MERGED_REGIMEN_ID,DATE_OF_FINAL_TREATMENT,REGIMEN_MOD_DOSE_REDUCTION,REGIMEN_MOD_TIME_DELAY,"
+          "REGIMEN_MOD_STOPPED_EARLY,REGIMEN_OUTCOME_SUMMARY")
+# Two shards: regimen 1 repeats in the first, regimen 7 in the second (rows 7, 8, 7, 9, 10).
+IDS = [1, 2, 1, 3, 4, 5, 6, 7, 8, 7, 9, 10]
+LINES = [HEADER] + [f"{regimen},2014-05-{day:02d},Y,N,N,01" for day, regimen in enumerate(IDS, 1)]
+
+
+def _second_shard(file_path):
+    ranges = shard_ranges(file_path, 2)
+    with open(file_path, 'rb') as csv_file:
+        csv_file.seek(ranges[1][0])
+        assert csv_file.readline().startswith(b'7,')
+    return ranges[1]
+
+
+def test_sharded_import_rejects_keys_repeated_within_a_shard(write_csv, db_config, query, fresh_tables):
+    fresh_tables('Sact_Outcome')
+    file_path = write_csv('outcome.csv', LINES)
+    _second_shard(file_path)
+
+    summary = SactOutcomeImporter(db_config).import_data_sharded(file_path, shards=2)
+    assert summary['rows_inserted'] == 10
+    assert summary['rows_skipped_on_conflict'] == 0
+    assert summary['duplicates']['keys']['MERGED_REGIMEN_ID'] == {'values': 2, 'extra_rows': 2, 'routed': True}
+    assert query("SELECT MIN(DATE_OF_FINAL_TREATMENT)::text, COUNT(*) FROM Sact_Outcome") == [('2014-05-01', 10)]
+    with open(summary['duplicates']['report'], newline='') as report:
+        assert sorted(list(csv.reader(report))[1:]) == [['MERGED_REGIMEN_ID', '1', '2'],
+                                                        ['MERGED_REGIMEN_ID', '7', '2']]
+    with open(summary['rejects'], newline='') as rejects:
+        assert [row[:2] for row in csv.reader(rejects)] == [
+            ['REASON', 'COLUMN'], ['duplicate_key', 'MERGED_REGIMEN_ID'],
+            ['duplicate_key', 'MERGED_REGIMEN_ID']]
+
+
+def test_interrupted_shard_resumes_from_its_checkpoint(write_csv, db_config, query, fresh_tables, interrupt_batch):
+    fresh_tables('Sact_Outcome')
+    file_path = write_csv('outcome.csv', LINES)
+    start, end = _second_shard(file_path)
+    options = {'batch_size': 2, 'prefetch': 0}
+
+    # The second shard commits regimens 7 and 8, then stops.
+    importer = SactOutcomeImporter(db_config)
+    importer.connect()
+    importer.create_table()
+    importer.conn.commit()
+    interrupt_batch(importer)
+    try:
+        with pytest.raises(KeyboardInterrupt):
+            importer._import_range(file_path, 1, start, end, **options)
+    finally:
+        importer.disconnect()
+    assert query("SELECT MERGED_REGIMEN_ID FROM Sact_Outcome ORDER BY 1") == [(7,), (8,)]
+
+    with pytest.raises(ValueError):
+        SactOutcomeImporter(db_config).import_data_sharded(file_path, shards=3, resume=True, **options)
+    with pytest.raises(ValueError):
+        SactOutcomeImporter(db_config).import_data_bulk(file_path, resume=True, **options)
+
+    summary = SactOutcomeImporter(db_config).import_data_sharded(file_path, shards=2, resume=True, **options)
+    assert summary['rows_read'] == 12
+    assert summary['rows_inserted'] == 10
+    # The repeat of regimen 7 is found although its first occurrence was loaded before the interruption.
+    assert summary['rows_skipped_on_conflict'] == 0
+    assert summary['duplicates']['keys']['MERGED_REGIMEN_ID']['extra_rows'] == 2
+    assert query("SELECT MERGED_REGIMEN_ID FROM Sact_Outcome ORDER BY 1") == [(regimen,) for regimen in range(1, 11)]
+
+    # Once every shard has finished, the file counts as fully imported.
+    summary = SactOutcomeImporter(db_config).import_data_bulk(file_path, resume=True, **options)
+    assert summary['skipped'] and summary['rows_inserted'] == 10
+    summary = SactOutcomeImporter(db_config).import_data_sharded(file_path, shards=2, resume=True, **options)
+    assert summary['skipped'] and summary['rows_inserted'] == 10
@@ -0,0 +1,37 @@
+from decimal import Decimal
+
+import pytest
+
+pq = pytest.importorskip('pyarrow.parquet')
+
+from importers.sact_drug_detail_importer import SactDrugDetailImporter  # noqa: E402
+from importers.schema import Column  # noqa: E402
+from importers.snapshot import arrow_type, decimal_values  # noqa: E402
+
+HEADER = ("MERGED_DRUG_DETAIL_ID,MERGED_CYCLE_ID,ACTUAL_DOSE_PER_ADMINISTRATION,OPCS_DELIVERY_CODE,"
+          "ADMINISTRATION_ROUTE,ADMINISTRATION_DATE,DRUG_GROUP")
+FIRST = [HEADER, "1,10000001,1250,X721,Oral,2014-03-29,CAPECITABINE", "2,10000001,75.5,X721,Oral,2014-03-30,CAPECITABINE"]
+# Details 1 and 2 are already loaded and are skipped on conflict.
+REFRESH = [HEADER, "1,10000001,1250,X721,Oral,2014-03-29,CAPECITABINE", "3,10000002,Infinity,X721,Oral,2014-04-22,",
+           "2,10000001,75.5,X721,Oral,2014-03-30,CAPECITABINE", "4,10000002,1234567890123456.05,,,2014-04-23,FLUOROURACIL"]
+
+
+@pytest.mark.parametrize('options', [{}, {'mode': 'insert'}, {'engine': 'columnar'}, {'workers': 2}])
+def test_snapshot_holds_only_the_rows_written(tmp_path, write_csv, db_config, fresh_tables, options):
+    fresh_tables('Sact_Drug_Detail')
+    SactDrugDetailImporter(db_config).import_data_bulk(write_csv('first.csv', FIRST))
+
+    summary = SactDrugDetailImporter(db_config).import_data_bulk(
+        write_csv('refresh.csv', REFRESH), snapshot_dir=str(tmp_path / 'snapshots'), **options)
+    assert summary['rows_inserted'] == 2
+    snapshot = pq.read_table(summary['snapshot']).to_pydict()
+    assert snapshot['MERGED_DRUG_DETAIL_ID'] == [3, 4]
+    # Exact to the default scale, beyond float precision; Arrow decimals have no Infinity.
+    assert snapshot['ACTUAL_DOSE_PER_ADMINISTRATION'] == [None, Decimal('1234567890123456.0500000000')]
+
+
+def test_numeric_columns_keep_their_declared_precision():
+    decimal_type = arrow_type(Column('WEIGHT', 'NUMERIC(5, 2)'))
+    assert (decimal_type.precision, decimal_type.scale) == (5, 2)
+    assert decimal_values(['1.005', Decimal('-2.5'), '1000', 'NaN', None, ' 7'], decimal_type) == [
+        Decimal('1.00'), Decimal('-2.50'), None, None, None, Decimal('7.00')]
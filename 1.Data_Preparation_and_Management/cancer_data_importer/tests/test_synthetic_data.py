@@ -0,0 +1,17 @@
+import filecmp
+import gzip
+import os
+
+from synthetic_data import SyntheticExtract
+
+
+def test_gzip_extract_is_reproducible(tmp_path, monkeypatch):
+    directories = [tmp_path / 'first', tmp_path / 'second']
+    for day, directory in enumerate(directories):
+        # A different clock for each run, as when the extract is regenerated another day.
+        monkeypatch.setattr(gzip.time, 'time', lambda: 1_700_000_000 + day * 86400)
+        SyntheticExtract(str(directory), scale=0.01, seed=7, compress=True).write()
+    names = sorted(name for name in os.listdir(directories[0]) if name.endswith('.csv.gz'))
+    assert names
+    _, mismatch, errors = filecmp.cmpfiles(*directories, names, shallow=False)
+    assert (mismatch, errors) == ([], [])
@@ -25,8 +25,8 @@ def load_data_from_postgres(table_name, connection_string):
         cur = conn.cursor()
         #create a buffer to store the data
         buffer = io.StringIO()
-        #excute copy command
-        cur.copy_expert(f"COPY {table_name} TO STDOUT WITH CSV HEADER", buffer)
+        #excute copy command (the SELECT form also reads partitioned tables)
+        cur.copy_expert(f"COPY (SELECT * FROM {table_name}) TO STDOUT WITH CSV HEADER", buffer)
         #reset buffer contents into a DataFrame
         buffer.seek(0)
         #read buffer contents into a dataframe
@@ -5,7 +5,7 @@ import pandas as pd
 
 def load_data_from_postgres(table_name, connection_string):
     """
-    Using 'COPY' Command Load data from a PostgreSQL table.
+    Using 'COPY (SELECT ...)' Command Load data from a PostgreSQL table (partitioned tables included).
 
     Parameters:
     - table_name (str): The name of the table to load.
@@ -18,7 +18,7 @@ def load_data_from_postgres(table_name, connection_string):
         conn = psycopg2.connect(connection_string)
         cur = conn.cursor()
         buffer = io.StringIO()
-        cur.copy_expert(f"COPY {table_name} TO STDOUT WITH CSV HEADER", buffer)
+        cur.copy_expert(f"COPY (SELECT * FROM {table_name}) TO STDOUT WITH CSV HEADER", buffer)
         buffer.seek(0)
         df = pd.read_csv(buffer)
         cur.close()
@@ -123,7 +123,7 @@ def load_data_with_optimized_memory(file_path):
 
     # ✅ Drop the specified columns before processing
     columns_to_drop = ["weight_at_start_of_regimen", "height_at_start_of_regimen"]
-    df.drop(columns=[col for col in columns_to_drop if col in df.columns], axis=1, inplace=True)
+    df.drop(columns=[col for col in columns_to_drop if col in df.columns], inplace=True)
 
     return df
 
@@ -284,7 +284,7 @@ def execute_final_preprocessing(input_file, raw_data_file, output_file):
 
         # ✅ Drop unnecessary columns before saving
         columns_to_drop = ["weight_at_start_of_regimen", "height_at_start_of_regimen"]
-        chunk.drop(columns=[col for col in columns_to_drop if col in chunk.columns], axis=1, inplace=True)
+        chunk.drop(columns=[col for col in columns_to_drop if col in chunk.columns], inplace=True)
 
         chunk.to_csv(output_temp_file, mode='a', index=False, header=not os.path.exists(output_temp_file))
 
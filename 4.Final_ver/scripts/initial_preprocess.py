@@ -4,7 +4,7 @@ import psycopg2
 import pandas as pd
 
 # Function to load data from a PostgreSQL table into a Pandas DataFrame
-# Uses COPY TO STDOUT for efficient data retrieval
+# Uses COPY (SELECT ...) TO STDOUT for efficient data retrieval, partitioned tables included
 def load_data_from_postgres(table_name, connection_string):
     """
     Retrieve data from a PostgreSQL table and load it into a Pandas DataFrame.
@@ -14,7 +14,7 @@ def load_data_from_postgres(table_name, connection_string):
         conn = psycopg2.connect(connection_string)
         cur = conn.cursor()
         buffer = io.StringIO()
-        cur.copy_expert(f"COPY {table_name} TO STDOUT WITH CSV HEADER", buffer)
+        cur.copy_expert(f"COPY (SELECT * FROM {table_name}) TO STDOUT WITH CSV HEADER", buffer)
         buffer.seek(0)
         df = pd.read_csv(buffer)
         cur.close()